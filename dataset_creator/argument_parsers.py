@@ -52,6 +52,10 @@ _parser_info['arguments']['--config_path'] = _ArgumentInfo()
 _parser_info['arguments']['--loglevel'] = _ArgumentInfo(default='warning')
 _parser_info['arguments']['--token'] = (
     _ArgumentInfo(default=None, type=json.loads))
+_parser_info['arguments']['--shard_index'] = (
+    _ArgumentInfo(default=None, type=int))
+_parser_info['arguments']['--shard_count'] = (
+    _ArgumentInfo(default=None, type=int))
 
 
 def parser_argument_choice(
@@ -0,0 +1,251 @@
+from collections.abc import Generator
+from concurrent import futures
+import contextlib
+import fcntl
+import hashlib
+import logging
+import os
+import pathlib
+import shutil
+from typing import Any
+try:
+    from typing import Self
+except ImportError:
+    from typing_extensions import Self
+import uuid
+
+import fsspec
+import git
+
+
+class ShardCache:
+    """A content-addressed local cache of downloaded dataset shards.
+
+    Each file is keyed by a digest of its URL and its remote checksum, so a
+    shard which has changed remotely is downloaded again. Once the files in the
+    cache take up more than `max_size` bytes, the least recently used files are
+    evicted, except for the ones just fetched.
+    """
+    def __init__(
+        self: Self,
+        directory: str,
+        max_size: int | None = None,
+        max_workers: int = 4,
+    ) -> None:
+        self._directory = directory
+        self._max_size = max_size
+        self._max_workers = max_workers
+
+    def fetch(
+        self: Self,
+        url: str,
+        storage_options: dict[str, Any] | None = None,
+    ) -> str:
+        (pathname,) = self.fetch_all([url], storage_options=storage_options)
+        return pathname
+
+    def fetch_all(
+        self: Self,
+        urls: list[str],
+        storage_options: dict[str, Any] | None = None,
+    ) -> list[str]:
+        """Fetches files concurrently, returning the local pathnames."""
+        pathlib.Path(self._directory).mkdir(parents=True, exist_ok=True)
+        storage_options = dict() if storage_options is None else storage_options
+        with futures.ThreadPoolExecutor(self._max_workers) as executor:
+            pathnames = list(executor.map(
+                lambda url: self._fetch(url, storage_options), urls))
+        self._evict(set(pathnames))
+        return pathnames
+
+    def _fetch(self: Self, url: str, storage_options: dict[str, Any]) -> str:
+        file_system, path = fsspec.core.url_to_fs(url, **storage_options)
+        checksum = file_system.checksum(path)
+        key = hashlib.sha256(f'{url}\n{checksum}'.encode()).hexdigest()
+        extension = os.path.splitext(path)[1]
+        pathname = os.path.join(self._directory, f'{key}{extension}')
+        if os.path.isfile(pathname):
+            logging.debug(f'shard cache hit: {url}')
+            # The modification time is used to track the least recent use.
+            os.utime(pathname)
+            return pathname
+        logging.info(f'shard cache miss: {url}')
+        temp_pathname = f'{pathname}.{uuid.uuid4().hex}.tmp'
+        try:
+            file_system.get_file(path, temp_pathname)
+            os.replace(temp_pathname, pathname)
+        finally:
+            if os.path.exists(temp_pathname):
+                os.remove(temp_pathname)
+        return pathname
+
+    def _evict(self: Self, kept_pathnames: set[str]) -> None:
+        if self._max_size is None:
+            return
+        entries = list()
+        for entry in os.scandir(self._directory):
+            if not entry.is_file() or entry.name.endswith('.tmp'):
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, pathname in sorted(entries):
+            if total_size <= self._max_size:
+                break
+            if pathname in kept_pathnames:
+                continue
+            logging.info(f'shard cache eviction: {pathname}')
+            os.remove(pathname)
+            total_size -= size
+
+
+class RepositoryCache:
+    """A local cache of bare mirrors of repositories, keyed by their URLs.
+
+    Repositories are checked out as worktrees of their mirrors, so a remote is
+    only cloned from if it has no mirror, and only fetched from if its mirror is
+    missing the commit to check out. Once the mirrors take up more than
+    `max_size` bytes, the least recently used mirrors without worktrees are
+    evicted. The size of each mirror is recorded when it is cloned or fetched
+    into, so that eviction does not walk the mirrors. Each mirror is locked
+    while in use, so the cache can be shared by threads and processes.
+    """
+    def __init__(
+        self: Self,
+        directory: str,
+        max_size: int | None = None,
+    ) -> None:
+        self._directory = directory
+        self._max_size = max_size
+
+    def check_out(
+        self: Self,
+        repository_url: str,
+        worktree_pathname: str,
+        hexsha: str | None = None,
+    ) -> git.Repo:
+        """Checks out a commit, or else the cached head, into a worktree."""
+        pathlib.Path(self._directory).mkdir(parents=True, exist_ok=True)
+        key = hashlib.sha256(repository_url.encode()).hexdigest()
+        mirror_pathname = os.path.join(self._directory, f'{key}.git')
+        with self._lock(key):
+            if os.path.isdir(mirror_pathname):
+                logging.debug(f'repository cache hit: {repository_url}')
+            else:
+                logging.info(f'repository cache miss: {repository_url}')
+                self._clone_mirror(repository_url, mirror_pathname)
+                self._record_size(key, mirror_pathname)
+            mirror = git.Repo(mirror_pathname)
+            if hexsha is not None and not _has_commit(mirror, hexsha):
+                logging.info(f'repository cache fetch: {repository_url}')
+                mirror.git.fetch('origin')
+                if not _has_commit(mirror, hexsha):
+                    mirror.git.fetch('origin', hexsha)
+                self._record_size(key, mirror_pathname)
+            # Worktrees which have since been removed are forgotten.
+            mirror.git.worktree('prune')
+            mirror.git.worktree('add', '--detach',
+                os.path.abspath(worktree_pathname),
+                'HEAD' if hexsha is None else hexsha)
+            # The modification time is used to track the least recent use.
+            os.utime(mirror_pathname)
+        self._evict({mirror_pathname})
+        repo = git.Repo(worktree_pathname)
+        return repo
+
+    def _clone_mirror(self: Self, repository_url: str, pathname: str) -> None:
+        temp_pathname = f'{pathname}.{uuid.uuid4().hex}.tmp'
+        try:
+            git.Repo.clone_from(repository_url, temp_pathname, mirror=True)
+            os.replace(temp_pathname, pathname)
+        finally:
+            if os.path.exists(temp_pathname):
+                shutil.rmtree(temp_pathname)
+
+    def _record_size(self: Self, key: str, mirror_pathname: str) -> None:
+        size_pathname = os.path.join(self._directory, f'{key}.size')
+        temp_pathname = f'{size_pathname}.{uuid.uuid4().hex}.tmp'
+        with open(temp_pathname, mode='w') as size_file:
+            size_file.write(str(_find_dir_size(mirror_pathname)))
+        os.replace(temp_pathname, size_pathname)
+
+    def _read_size(self: Self, key: str, mirror_pathname: str) -> int:
+        """Reads the recorded size of a mirror, or else finds it."""
+        size_pathname = os.path.join(self._directory, f'{key}.size')
+        try:
+            with open(size_pathname) as size_file:
+                return int(size_file.read())
+        except (FileNotFoundError, ValueError):
+            return _find_dir_size(mirror_pathname)
+
+    @contextlib.contextmanager
+    def _lock(
+        self: Self,
+        key: str,
+        blocking: bool = True,
+    ) -> Generator[bool, None, None]:
+        """Locks a mirror, yielding whether it could be locked."""
+        lock_pathname = os.path.join(self._directory, f'{key}.lock')
+        with open(lock_pathname, 'a') as lock_file:
+            operation = fcntl.LOCK_EX
+            if not blocking:
+                operation |= fcntl.LOCK_NB
+            try:
+                fcntl.flock(lock_file, operation)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _evict(self: Self, kept_pathnames: set[str]) -> None:
+        if self._max_size is None:
+            return
+        entries = list()
+        for entry in os.scandir(self._directory):
+            if not entry.is_dir() or not entry.name.endswith('.git'):
+                continue
+            key = entry.name.removesuffix('.git')
+            size = self._read_size(key, entry.path)
+            entries.append((entry.stat().st_mtime, size, entry.path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, pathname in sorted(entries):
+            if total_size <= self._max_size:
+                break
+            if pathname in kept_pathnames:
+                continue
+            key = os.path.basename(pathname).removesuffix('.git')
+            with self._lock(key, blocking=False) as is_locked:
+                if not is_locked or _has_worktrees(git.Repo(pathname)):
+                    continue
+                logging.info(f'repository cache eviction: {pathname}')
+                shutil.rmtree(pathname)
+                size_pathname = os.path.join(self._directory, f'{key}.size')
+                if os.path.exists(size_pathname):
+                    os.remove(size_pathname)
+            total_size -= size
+
+
+def _has_commit(repo: git.Repo, hexsha: str) -> bool:
+    try:
+        repo.git.cat_file('-e', f'{hexsha}^{{commit}}')
+    except git.GitCommandError:
+        return False
+    return True
+
+
+def _has_worktrees(repo: git.Repo) -> bool:
+    repo.git.worktree('prune')
+    worktree_list = repo.git.worktree('list', '--porcelain')
+    # The bare repository itself is listed first.
+    return worktree_list.count('worktree ') > 1
+
+
+def _find_dir_size(dir_pathname: str) -> int:
+    size = 0
+    for parent_pathname, _, file_names in os.walk(dir_pathname):
+        for file_name in file_names:
+            size += os.path.getsize(os.path.join(parent_pathname, file_name))
+    return size
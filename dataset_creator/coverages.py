@@ -29,7 +29,13 @@ class CodeCov(abc.ABC):
     def create_coverage(
         self: Self,
         request_data: CreateCoverageRequestData,
+        working_dir_pathname: str | None = None,
     ) -> Coverage:
+        """Creates the coverage of a test method on a focal class.
+
+        The coverage is created in the working directory if given, or the
+        current one otherwise, as the pathnames of the request can be relative.
+        """
         raise NotImplementedError()
 
 
@@ -47,7 +53,9 @@ class CodeCovApi(CodeCov):
     def create_coverage(
         self: Self,
         request_data: CreateCoverageRequestData,
+        working_dir_pathname: str | None = None,
     ) -> Coverage:
+        # The server resolves any relative pathnames itself.
         url = os.path.join(self._base_url, 'coverages')
         logging.debug('{url} POST ({fcn}, {tcn}, {tmn})'.format(url=url,
             fcn=request_data['focalClassName'],
@@ -73,19 +81,21 @@ class CodeCovCli(CodeCov):
     def create_coverage(
         self: Self,
         request_data: CreateCoverageRequestData,
+        working_dir_pathname: str | None = None,
     ) -> Coverage:
         input_json_str = json.dumps(request_data)
         args = [self._script_file_pathname]
         logging.debug('{cwd} [{l}] : ({fcn}, {tcn}, {tmn})'.format(
             l=len(input_json_str),
-            cwd=os.getcwd(),
+            cwd=working_dir_pathname or os.getcwd(),
             fcn=request_data['focalClassName'],
             tcn=request_data['testClassName'],
             tmn=request_data['testMethodName'],
         ))
         completed_process = (subprocess
-            .run(args, timeout=self._timeout, check=True, capture_output=True,
-                text=True, input=input_json_str))
+            .run(args, cwd=working_dir_pathname, timeout=self._timeout,
+                check=True, capture_output=True, text=True,
+                input=input_json_str))
         output = completed_process.stdout
         coverage: Coverage = json.loads(output)
         return coverage
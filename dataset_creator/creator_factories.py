@@ -1,5 +1,6 @@
 import abc
 import argparse
+import posixpath
 from typing import Any
 from typing import Generic
 try:
@@ -8,12 +9,16 @@ except ImportError:
     from typing_extensions import Self
 from typing import TypeVar
 
+import fsspec
+import pyarrow
 import requests
 
 from dataset_creator import argument_parsers
+from dataset_creator import caches
 from dataset_creator import coverages
 from dataset_creator import loaders
 from dataset_creator import processors
+from dataset_creator import repositories
 from dataset_creator import savers
 from dataset_creator.methods2test import code_parsers
 
@@ -22,6 +27,209 @@ _T = TypeVar('_T')
 _U = TypeVar('_U')
 
 
+# The only column of The Stack read by TheStackRepositoryProcessor.
+_THE_STACK_COLUMNS = ['max_stars_repo_name']
+
+
+def _find_shard(
+    loader_config: dict[str, Any],
+    args: argparse.Namespace,
+) -> tuple[int | None, int | None]:
+    """Finds the shard to load, preferring the command line to the config."""
+    shard_index: int | None = args.shard_index
+    if shard_index is None:
+        shard_index = loader_config.get('shard_index')
+    shard_count: int | None = args.shard_count
+    if shard_count is None:
+        shard_count = loader_config.get('shard_count')
+    if shard_count is None:
+        return None, None
+    if shard_index is None or not 0 <= shard_index < shard_count:
+        raise ValueError(
+            f'shard index {shard_index} not in range of {shard_count} shards')
+    return shard_index, shard_count
+
+
+# The saver config entries naming where a worker saves its samples.
+_SHARD_SAVER_CONFIG_KEYS = ['file_pathname', 'checkpoint_pathname', 'url',
+    'pathname']
+
+
+def _find_shard_saver_config(
+    saver_config: dict[str, Any],
+    shard_index: int | None,
+) -> dict[str, Any]:
+    """Finds the saver config of a shard, saving to its own files.
+
+    The shard index is added to the pathnames and URLs of the saver config,
+    e.g. `samples-shard-00003.jsonl` for `samples.jsonl`, so that workers
+    started with the same config do not save to the same files. The index
+    of unique samples is left shared. URLs need a path past their bucket.
+    """
+    if shard_index is None:
+        return saver_config
+    shard_saver_config = dict(saver_config)
+    for key in _SHARD_SAVER_CONFIG_KEYS:
+        if key not in saver_config:
+            continue
+        protocol, path = fsspec.core.split_protocol(saver_config[key])
+        directory, file_name = posixpath.split(path.rstrip('/'))
+        if protocol is not None and directory == '':
+            raise ValueError(
+                f'cannot shard a {key} without a path: {saver_config[key]}')
+        stem, dot, extension = file_name.partition('.')
+        shard_file_name = f'{stem}-shard-{shard_index:05d}{dot}{extension}'
+        shard_path = posixpath.join(directory, shard_file_name)
+        if protocol is not None:
+            shard_path = f'{protocol}://{shard_path}'
+        shard_saver_config[key] = shard_path
+    return shard_saver_config
+
+
+def _create_shard_cache(
+    loader_config: dict[str, Any],
+) -> caches.ShardCache | None:
+    cache_config: dict[str, Any] | None = loader_config.get('cache')
+    if cache_config is None:
+        return None
+    directory: str = cache_config['directory']
+    max_size: int | None = cache_config.get('max_size')
+    max_workers: int = cache_config.get('max_workers', 4)
+    cache = caches.ShardCache(
+        directory, max_size=max_size, max_workers=max_workers)
+    return cache
+
+
+def _create_repository_cache(
+    config: dict[str, Any],
+) -> caches.RepositoryCache | None:
+    cache_config: dict[str, Any] | None = config.get('repository_cache')
+    if cache_config is None:
+        return None
+    directory: str = cache_config['directory']
+    max_size: int | None = cache_config.get('max_size')
+    cache = caches.RepositoryCache(directory, max_size=max_size)
+    return cache
+
+
+def _create_fsspec_saver(
+    saver_config: dict[str, Any],
+    token: dict[str, str] | str | None = None,
+    schema: pyarrow.Schema | None = None,
+) -> savers.Saver[dict[str, Any]]:
+    url: str = saver_config['url']
+    storage_options: dict[str, Any] | None = (
+        saver_config.get('storage_options'))
+    if storage_options is not None and token is not None:
+        storage_options['token'] = token
+    limit: int | None = saver_config.get('limit')
+    if saver_config.get('format') == 'normalized':
+        batch_size: int = saver_config.get('batch_size', 1000)
+        saver = savers.NormalizedCoverageSaver(url,
+            storage_options=storage_options, batch_size=batch_size,
+            limit=limit)
+        return saver
+    shard_format: str = saver_config.get('shard_format', 'jsonl')
+    shard_size: int = saver_config.get('shard_size', 10000)
+    max_workers: int = saver_config.get('max_workers', 4)
+    compression: str | None = saver_config.get('compression')
+    encoder: str = saver_config.get('encoder', 'json')
+    saver = savers.FsspecSaver(url, storage_options=storage_options,
+        shard_format=shard_format, shard_size=shard_size,
+        max_workers=max_workers, compression=compression, encoder=encoder,
+        schema=schema, limit=limit)
+    return saver
+
+
+def _create_local_file_saver(
+    saver_config: dict[str, Any],
+) -> savers.Saver[Any]:
+    if 'url' in saver_config:
+        if 'checkpoint_pathname' in saver_config:
+            raise ValueError('checkpoints cannot be used with a url')
+        return _create_fsspec_saver(saver_config)
+    file_pathname: str = saver_config['file_pathname']
+    limit: int | None = saver_config.get('limit')
+    compression: str | None = saver_config.get('compression', 'infer')
+    compression_threads: int = saver_config.get('compression_threads', 1)
+    line_format: str = saver_config.get('line_format', 'str')
+    encoder: str = saver_config.get('encoder', 'json')
+    buffer_size: int = saver_config.get('buffer_size', 1 << 20)
+    flush_every: int | None = saver_config.get('flush_every')
+    fsync: bool = saver_config.get('fsync', False)
+    shard_size: int | None = saver_config.get('shard_size')
+    shard_bytes: int | None = saver_config.get('shard_bytes')
+    checkpoint_pathname: str | None = saver_config.get('checkpoint_pathname')
+    saver = savers.LocalFileSaver(file_pathname, limit=limit,
+        compression=compression, compression_threads=compression_threads,
+        line_format=line_format, encoder=encoder, buffer_size=buffer_size,
+        flush_every=flush_every, fsync=fsync, shard_size=shard_size,
+        shard_bytes=shard_bytes, checkpoint_pathname=checkpoint_pathname)
+    return saver
+
+
+def _create_google_cloud_storage_saver(
+    saver_config: dict[str, Any],
+    token: dict[str, str] | str | None,
+    schema: pyarrow.Schema | None = None,
+) -> savers.Saver[dict[str, Any]]:
+    if 'url' in saver_config:
+        return _create_fsspec_saver(saver_config, token=token, schema=schema)
+    project_id: str = saver_config['project_id']
+    bucket_name: str = saver_config['bucket_name']
+    pathname: str = saver_config['pathname']
+    limit: int | None = saver_config.get('limit')
+    url = f'gs://{bucket_name}/{pathname}'
+    storage_options = {'project': project_id, 'token': token}
+    if saver_config.get('format') == 'parquet':
+        batch_size: int = saver_config.get('batch_size', 1000)
+        saver = savers.ParquetSaver(url, storage_options=storage_options,
+            schema=schema, batch_size=batch_size, limit=limit)
+        return saver
+    shard_size: int | None = saver_config.get('shard_size')
+    if shard_size is not None:
+        max_uploads: int = saver_config.get('max_uploads', 4)
+        saver = savers.IncrementalDatasetSaver(url,
+            storage_options=storage_options, schema=schema,
+            shard_size=shard_size, max_uploads=max_uploads, limit=limit)
+        return saver
+    saver = savers.HuggingFaceGoogleCloudStorageSaver(
+        project_id, bucket_name, pathname, token=token, limit=limit)
+    return saver
+
+
+def _find_checkpoint_repository_count(
+    saver_config: dict[str, Any],
+) -> int | None:
+    """Finds the number of repositories processed in previous runs, if any."""
+    checkpoint_pathname: str | None = saver_config.get('checkpoint_pathname')
+    if checkpoint_pathname is None:
+        return None
+    checkpoint = savers.read_checkpoint(checkpoint_pathname)
+    if checkpoint is None:
+        return 0
+    return checkpoint['repository_count']
+
+
+def _create_disk_loader(
+    loader_config: dict[str, Any],
+    token: dict[str, str] | str | None,
+    shard_index: int | None,
+    shard_count: int | None,
+) -> loaders.HuggingFaceDiskLoader:
+    pathnames: list[str] = loader_config['pathnames']
+    storage_options: dict[str, Any] | None = (
+        loader_config.get('storage_options'))
+    if storage_options is not None:
+        storage_options['token'] = token
+    skip: int | None = loader_config.get('skip')
+    limit: int | None = loader_config.get('limit')
+    loader = loaders.HuggingFaceDiskLoader(pathnames,
+        storage_options=storage_options, skip=skip, limit=limit,
+        shard_index=shard_index, shard_count=shard_count)
+    return loader
+
+
 class CreatorFactory(abc.ABC, Generic[_T, _U]):
     @abc.abstractmethod
     def __init__(
@@ -59,9 +267,13 @@ class TheStackRepositoryLocalDataFactory(
     ) -> None:
         self._token = args.token
         self._loader_config: dict[str, Any] = config['loader']
-        self._saver_config: dict[str, Any] = config['saver']
+        self._shard_index, self._shard_count = (
+            _find_shard(self._loader_config, args))
+        self._saver_config: dict[str, Any] = (
+            _find_shard_saver_config(config['saver'], self._shard_index))
+        self._batch_size: int | None = self._loader_config.get('batch_size')
 
-    def create_loader(self: Self) -> loaders.Loader[dict[str, Any]]:
+    def create_loader(self: Self) -> loaders.Loader[Any]:
         config = self._loader_config['config']
         try:
             config['storage_options']['token'] = self._token
@@ -69,20 +281,33 @@ class TheStackRepositoryLocalDataFactory(
             pass
         skip: int | None = self._loader_config.get('skip')
         limit: int | None = self._loader_config.get('limit')
-        loader = loaders.HuggingFaceLoader(config, skip=skip, limit=limit)
+        columns: list[str] | None = (
+            self._loader_config.get('columns', _THE_STACK_COLUMNS))
+        cache = _create_shard_cache(self._loader_config)
+        if self._batch_size is not None:
+            loader = loaders.HuggingFaceArrowLoader(config, skip=skip,
+                limit=limit, columns=columns, batch_size=self._batch_size,
+                shard_index=self._shard_index, shard_count=self._shard_count,
+                cache=cache)
+            return loader
+        loader = loaders.HuggingFaceLoader(config, skip=skip, limit=limit,
+            columns=columns, shard_index=self._shard_index,
+            shard_count=self._shard_count, cache=cache)
         return loader
 
     def create_saver(self: Self) -> savers.Saver[dict[str, str]]:
-        file_pathname = self._saver_config['file_pathname']
-        limit = self._saver_config.get('limit')
-        saver = savers.LocalFileSaver(file_pathname, limit=limit)
+        saver = _create_local_file_saver(self._saver_config)
         return saver
 
     def create_processor(
         self: Self,
-        loader: loaders.Loader[dict[str, Any]],
+        loader: loaders.Loader[Any],
         saver: savers.Saver[dict[str, str]],
-    ) -> processors.Processor[dict[str, Any], dict[str, str]]:
+    ) -> processors.Processor[Any, dict[str, str]]:
+        if self._batch_size is not None:
+            processor = (
+                processors.TheStackRepositoryBatchProcessor(loader, saver))
+            return processor
         processor = processors.TheStackRepositoryProcessor(loader, saver)
         return processor
 
@@ -98,9 +323,13 @@ class TheStackRepositoryHuggingFaceGoogleCloudStorageFactory(
     ) -> None:
         self._token = args.token
         self._loader_config: dict[str, Any] = config['loader']
-        self._saver_config: dict[str, Any] = config['saver']
+        self._shard_index, self._shard_count = (
+            _find_shard(self._loader_config, args))
+        self._saver_config: dict[str, Any] = (
+            _find_shard_saver_config(config['saver'], self._shard_index))
+        self._batch_size: int | None = self._loader_config.get('batch_size')
 
-    def create_loader(self: Self) -> loaders.Loader[dict[str, Any]]:
+    def create_loader(self: Self) -> loaders.Loader[Any]:
         config = self._loader_config['config']
         try:
             config['storage_options']['token'] = self._token
@@ -108,23 +337,34 @@ class TheStackRepositoryHuggingFaceGoogleCloudStorageFactory(
             pass
         skip: int | None = self._loader_config.get('skip')
         limit: int | None = self._loader_config.get('limit')
-        loader = loaders.HuggingFaceLoader(config, skip=skip, limit=limit)
+        columns: list[str] | None = (
+            self._loader_config.get('columns', _THE_STACK_COLUMNS))
+        cache = _create_shard_cache(self._loader_config)
+        if self._batch_size is not None:
+            loader = loaders.HuggingFaceArrowLoader(config, skip=skip,
+                limit=limit, columns=columns, batch_size=self._batch_size,
+                shard_index=self._shard_index, shard_count=self._shard_count,
+                cache=cache)
+            return loader
+        loader = loaders.HuggingFaceLoader(config, skip=skip, limit=limit,
+            columns=columns, shard_index=self._shard_index,
+            shard_count=self._shard_count, cache=cache)
         return loader
 
     def create_saver(self: Self) -> savers.Saver[dict[str, str]]:
-        project_id = self._saver_config['project_id']
-        bucket_name = self._saver_config['bucket_name']
-        pathname = self._saver_config['pathname']
-        limit = self._saver_config.get('limit')
-        saver = savers.HuggingFaceGoogleCloudStorageSaver(
-            project_id, bucket_name, pathname, token=self._token, limit=limit)
+        saver = _create_google_cloud_storage_saver(
+            self._saver_config, self._token)
         return saver
 
     def create_processor(
         self: Self,
-        loader: loaders.Loader[dict[str, Any]],
+        loader: loaders.Loader[Any],
         saver: savers.Saver[dict[str, str]],
-    ) -> processors.Processor[dict[str, Any], dict[str, str]]:
+    ) -> processors.Processor[Any, dict[str, str]]:
+        if self._batch_size is not None:
+            processor = (
+                processors.TheStackRepositoryBatchProcessor(loader, saver))
+            return processor
         processor = processors.TheStackRepositoryProcessor(loader, saver)
         return processor
 
@@ -140,20 +380,33 @@ class LocalTheStackRepositoryHuggingFaceGoogleCloudStorageFactory(
     ) -> None:
         self._token = args.token
         self._loader_config: dict[str, Any] = config['loader']
-        self._saver_config: dict[str, Any] = config['saver']
+        self._shard_index, self._shard_count = (
+            _find_shard(self._loader_config, args))
+        self._saver_config: dict[str, Any] = (
+            _find_shard_saver_config(config['saver'], self._shard_index))
 
     def create_loader(self: Self) -> loaders.Loader[dict[str, Any]]:
+        skip: int | None = self._loader_config.get('skip')
+        limit: int | None = self._loader_config.get('limit')
+        compression: str | None = (
+            self._loader_config.get('compression', 'infer'))
+        manifest_pathname: str | None = (
+            self._loader_config.get('manifest_pathname'))
+        if manifest_pathname is not None:
+            loader = loaders.JsonlManifestLoader(manifest_pathname, skip=skip,
+                limit=limit, shard_index=self._shard_index,
+                shard_count=self._shard_count, compression=compression)
+            return loader
         pathname: str = self._loader_config['pathname']
-        loader = loaders.JsonlFileLoader(pathname)
+        offset: int | None = self._loader_config.get('offset')
+        loader = loaders.JsonlFileLoader(pathname, skip=skip, limit=limit,
+            offset=offset, shard_index=self._shard_index,
+            shard_count=self._shard_count, compression=compression)
         return loader
 
     def create_saver(self: Self) -> savers.Saver[dict[str, str]]:
-        project_id = self._saver_config['project_id']
-        bucket_name = self._saver_config['bucket_name']
-        pathname = self._saver_config['pathname']
-        limit = self._saver_config.get('limit')
-        saver = savers.HuggingFaceGoogleCloudStorageSaver(
-            project_id, bucket_name, pathname, token=self._token, limit=limit)
+        saver = _create_google_cloud_storage_saver(
+            self._saver_config, self._token)
         return saver
 
     def create_processor(
@@ -176,7 +429,10 @@ class HuggingFaceGoogleCloudStorageToLocalDataFactory(
     ) -> None:
         self._token = args.token
         self._loader_config: dict[str, Any] = config['loader']
-        self._saver_config: dict[str, Any] = config['saver']
+        self._shard_index, self._shard_count = (
+            _find_shard(self._loader_config, args))
+        self._saver_config: dict[str, Any] = (
+            _find_shard_saver_config(config['saver'], self._shard_index))
 
     def create_loader(self: Self) -> loaders.Loader[dict[str, Any]]:
         config = self._loader_config['config']
@@ -186,13 +442,13 @@ class HuggingFaceGoogleCloudStorageToLocalDataFactory(
             pass
         skip: int | None = self._loader_config.get('skip')
         limit: int | None = self._loader_config.get('limit')
-        loader = loaders.HuggingFaceLoader(config, skip=skip, limit=limit)
+        loader = loaders.HuggingFaceLoader(config, skip=skip, limit=limit,
+            shard_index=self._shard_index, shard_count=self._shard_count,
+            cache=_create_shard_cache(self._loader_config))
         return loader
 
     def create_saver(self: Self) -> savers.Saver[dict[str, str]]:
-        file_pathname = self._saver_config['file_pathname']
-        limit = self._saver_config.get('limit')
-        saver = savers.LocalFileSaver(file_pathname, limit=limit)
+        saver = _create_local_file_saver(self._saver_config)
         return saver
 
     def create_processor(
@@ -215,11 +471,24 @@ class CoverageApiLocalDataFactory(
     ) -> None:
         self._token = args.token
         self._loader_config: dict[str, Any] = config['loader']
-        self._saver_config: dict[str, Any] = config['saver']
+        self._shard_index, self._shard_count = (
+            _find_shard(self._loader_config, args))
+        self._saver_config: dict[str, Any] = (
+            _find_shard_saver_config(config['saver'], self._shard_index))
+        self._checkpoint_repository_count = (
+            _find_checkpoint_repository_count(self._saver_config))
         self._base_url = config['base_url']
         self._grammar_file = config['grammar_file']
         self._language = config['language']
         self._timeout = config.get('timeout')
+        self._stage_configs: dict[str, processors.StageConfig] | None = (
+            config.get('stages'))
+        self._stage_depth: int = config.get('stage_depth', 1)
+        self._max_coverage_requests: int = (
+            config.get('max_coverage_requests', 1))
+        self._clone_config: repositories.CloneConfig | None = (
+            config.get('clone'))
+        self._repository_cache = _create_repository_cache(config)
 
     def create_loader(self: Self) -> loaders.Loader[dict[str, Any]]:
         config = self._loader_config['config']
@@ -229,13 +498,18 @@ class CoverageApiLocalDataFactory(
             pass
         skip: int | None = self._loader_config.get('skip')
         limit: int | None = self._loader_config.get('limit')
-        loader = loaders.HuggingFaceLoader(config, skip=skip, limit=limit)
+        resumed_count = self._checkpoint_repository_count
+        if resumed_count is not None:
+            # Continue after the repositories processed in previous runs.
+            skip = (0 if skip is None else skip) + resumed_count
+            limit = None if limit is None else max(limit - resumed_count, 0)
+        loader = loaders.HuggingFaceLoader(config, skip=skip, limit=limit,
+            shard_index=self._shard_index, shard_count=self._shard_count,
+            cache=_create_shard_cache(self._loader_config))
         return loader
 
     def create_saver(self: Self) -> savers.Saver[dict[str, Any]]:
-        file_pathname = self._saver_config['file_pathname']
-        limit = self._saver_config.get('limit')
-        saver = savers.LocalFileSaver(file_pathname, limit=limit)
+        saver = _create_local_file_saver(self._saver_config)
         return saver
 
     def create_processor(
@@ -249,7 +523,12 @@ class CoverageApiLocalDataFactory(
         parser_type = code_parsers.CodeParser
         parser_args = (self._grammar_file, self._language)
         processor = processors.CoverageSamplesProcessor(loader, saver, code_cov,
-            parser_type, parser_args)
+            parser_type, parser_args,
+            checkpoint_repository_count=self._checkpoint_repository_count,
+            stage_configs=self._stage_configs, stage_depth=self._stage_depth,
+            max_coverage_requests=self._max_coverage_requests,
+            clone_config=self._clone_config,
+            repository_cache=self._repository_cache)
         return processor
 
 
@@ -264,11 +543,22 @@ class CoverageApiHuggingFaceGoogleCloudStorageFactory(
     ) -> None:
         self._token = args.token
         self._loader_config: dict[str, Any] = config['loader']
-        self._saver_config: dict[str, Any] = config['saver']
+        self._shard_index, self._shard_count = (
+            _find_shard(self._loader_config, args))
+        self._saver_config: dict[str, Any] = (
+            _find_shard_saver_config(config['saver'], self._shard_index))
         self._base_url = config['base_url']
         self._grammar_file = config['grammar_file']
         self._language = config['language']
         self._timeout = config.get('timeout')
+        self._stage_configs: dict[str, processors.StageConfig] | None = (
+            config.get('stages'))
+        self._stage_depth: int = config.get('stage_depth', 1)
+        self._max_coverage_requests: int = (
+            config.get('max_coverage_requests', 1))
+        self._clone_config: repositories.CloneConfig | None = (
+            config.get('clone'))
+        self._repository_cache = _create_repository_cache(config)
 
     def create_loader(self: Self) -> loaders.Loader[dict[str, Any]]:
         config = self._loader_config['config']
@@ -278,16 +568,14 @@ class CoverageApiHuggingFaceGoogleCloudStorageFactory(
             pass
         skip: int | None = self._loader_config.get('skip')
         limit: int | None = self._loader_config.get('limit')
-        loader = loaders.HuggingFaceLoader(config, skip=skip, limit=limit)
+        loader = loaders.HuggingFaceLoader(config, skip=skip, limit=limit,
+            shard_index=self._shard_index, shard_count=self._shard_count,
+            cache=_create_shard_cache(self._loader_config))
         return loader
 
     def create_saver(self: Self) -> savers.Saver[dict[str, Any]]:
-        project_id = self._saver_config['project_id']
-        bucket_name = self._saver_config['bucket_name']
-        pathname = self._saver_config['pathname']
-        limit = self._saver_config.get('limit')
-        saver = savers.HuggingFaceGoogleCloudStorageSaver(
-            project_id, bucket_name, pathname, token=self._token, limit=limit)
+        saver = _create_google_cloud_storage_saver(self._saver_config,
+            self._token, schema=savers.COVERAGE_SAMPLE_SCHEMA)
         return saver
 
     def create_processor(
@@ -301,7 +589,11 @@ class CoverageApiHuggingFaceGoogleCloudStorageFactory(
         parser_type = code_parsers.CodeParser
         parser_args = (self._grammar_file, self._language)
         processor = processors.CoverageSamplesProcessor(loader, saver, code_cov,
-            parser_type, parser_args)
+            parser_type, parser_args,
+            stage_configs=self._stage_configs, stage_depth=self._stage_depth,
+            max_coverage_requests=self._max_coverage_requests,
+            clone_config=self._clone_config,
+            repository_cache=self._repository_cache)
         return processor
 
 
@@ -316,11 +608,24 @@ class CoverageCliLocalDataFactory(
     ) -> None:
         self._token = args.token
         self._loader_config: dict[str, Any] = config['loader']
-        self._saver_config: dict[str, Any] = config['saver']
+        self._shard_index, self._shard_count = (
+            _find_shard(self._loader_config, args))
+        self._saver_config: dict[str, Any] = (
+            _find_shard_saver_config(config['saver'], self._shard_index))
+        self._checkpoint_repository_count = (
+            _find_checkpoint_repository_count(self._saver_config))
         self._script_file_pathname = config['script_file_pathname']
         self._grammar_file = config['grammar_file']
         self._language = config['language']
         self._timeout = config.get('timeout')
+        self._stage_configs: dict[str, processors.StageConfig] | None = (
+            config.get('stages'))
+        self._stage_depth: int = config.get('stage_depth', 1)
+        self._max_coverage_requests: int = (
+            config.get('max_coverage_requests', 1))
+        self._clone_config: repositories.CloneConfig | None = (
+            config.get('clone'))
+        self._repository_cache = _create_repository_cache(config)
 
     def create_loader(self: Self) -> loaders.Loader[dict[str, Any]]:
         config = self._loader_config['config']
@@ -330,13 +635,18 @@ class CoverageCliLocalDataFactory(
             pass
         skip: int | None = self._loader_config.get('skip')
         limit: int | None = self._loader_config.get('limit')
-        loader = loaders.HuggingFaceLoader(config, skip=skip, limit=limit)
+        resumed_count = self._checkpoint_repository_count
+        if resumed_count is not None:
+            # Continue after the repositories processed in previous runs.
+            skip = (0 if skip is None else skip) + resumed_count
+            limit = None if limit is None else max(limit - resumed_count, 0)
+        loader = loaders.HuggingFaceLoader(config, skip=skip, limit=limit,
+            shard_index=self._shard_index, shard_count=self._shard_count,
+            cache=_create_shard_cache(self._loader_config))
         return loader
 
     def create_saver(self: Self) -> savers.Saver[dict[str, Any]]:
-        file_pathname = self._saver_config['file_pathname']
-        limit = self._saver_config.get('limit')
-        saver = savers.LocalFileSaver(file_pathname, limit=limit)
+        saver = _create_local_file_saver(self._saver_config)
         return saver
 
     def create_processor(
@@ -349,7 +659,12 @@ class CoverageCliLocalDataFactory(
         parser_type = code_parsers.CodeParser
         parser_args = (self._grammar_file, self._language)
         processor = processors.CoverageSamplesProcessor(loader, saver, code_cov,
-            parser_type, parser_args)
+            parser_type, parser_args,
+            checkpoint_repository_count=self._checkpoint_repository_count,
+            stage_configs=self._stage_configs, stage_depth=self._stage_depth,
+            max_coverage_requests=self._max_coverage_requests,
+            clone_config=self._clone_config,
+            repository_cache=self._repository_cache)
         return processor
 
 
@@ -364,11 +679,22 @@ class CoverageCliHuggingFaceGoogleCloudStorageFactory(
     ) -> None:
         self._token = args.token
         self._loader_config: dict[str, Any] = config['loader']
-        self._saver_config: dict[str, Any] = config['saver']
+        self._shard_index, self._shard_count = (
+            _find_shard(self._loader_config, args))
+        self._saver_config: dict[str, Any] = (
+            _find_shard_saver_config(config['saver'], self._shard_index))
         self._script_file_pathname = config['script_file_pathname']
         self._grammar_file = config['grammar_file']
         self._language = config['language']
         self._timeout = config.get('timeout')
+        self._stage_configs: dict[str, processors.StageConfig] | None = (
+            config.get('stages'))
+        self._stage_depth: int = config.get('stage_depth', 1)
+        self._max_coverage_requests: int = (
+            config.get('max_coverage_requests', 1))
+        self._clone_config: repositories.CloneConfig | None = (
+            config.get('clone'))
+        self._repository_cache = _create_repository_cache(config)
 
     def create_loader(self: Self) -> loaders.Loader[dict[str, Any]]:
         config = self._loader_config['config']
@@ -378,16 +704,14 @@ class CoverageCliHuggingFaceGoogleCloudStorageFactory(
             pass
         skip: int | None = self._loader_config.get('skip')
         limit: int | None = self._loader_config.get('limit')
-        loader = loaders.HuggingFaceLoader(config, skip=skip, limit=limit)
+        loader = loaders.HuggingFaceLoader(config, skip=skip, limit=limit,
+            shard_index=self._shard_index, shard_count=self._shard_count,
+            cache=_create_shard_cache(self._loader_config))
         return loader
 
     def create_saver(self: Self) -> savers.Saver[dict[str, Any]]:
-        project_id = self._saver_config['project_id']
-        bucket_name = self._saver_config['bucket_name']
-        pathname = self._saver_config['pathname']
-        limit = self._saver_config.get('limit')
-        saver = savers.HuggingFaceGoogleCloudStorageSaver(
-            project_id, bucket_name, pathname, token=self._token, limit=limit)
+        saver = _create_google_cloud_storage_saver(self._saver_config,
+            self._token, schema=savers.COVERAGE_SAMPLE_SCHEMA)
         return saver
 
     def create_processor(
@@ -400,7 +724,11 @@ class CoverageCliHuggingFaceGoogleCloudStorageFactory(
         parser_type = code_parsers.CodeParser
         parser_args = (self._grammar_file, self._language)
         processor = processors.CoverageSamplesProcessor(loader, saver, code_cov,
-            parser_type, parser_args)
+            parser_type, parser_args,
+            stage_configs=self._stage_configs, stage_depth=self._stage_depth,
+            max_coverage_requests=self._max_coverage_requests,
+            clone_config=self._clone_config,
+            repository_cache=self._repository_cache)
         return processor
 
 
@@ -415,9 +743,17 @@ class CoverageConcatenatedHuggingFaceGoogleCloudStorageFactory(
     ) -> None:
         self._token = args.token
         self._loader_config: dict[str, Any] = config['loader']
-        self._saver_config: dict[str, Any] = config['saver']
+        self._shard_index, self._shard_count = (
+            _find_shard(self._loader_config, args))
+        self._saver_config: dict[str, Any] = (
+            _find_shard_saver_config(config['saver'], self._shard_index))
+        self._memory_budget = config.get('memory_budget')
+        self._spill_dir_pathname = config.get('spill_dir_pathname')
 
     def create_loader(self: Self) -> loaders.Loader[dict[str, Any]]:
+        if 'pathnames' in self._loader_config:
+            return _create_disk_loader(self._loader_config, self._token,
+                self._shard_index, self._shard_count)
         configs = self._loader_config['configs']
         for config in configs:
             try:
@@ -426,13 +762,18 @@ class CoverageConcatenatedHuggingFaceGoogleCloudStorageFactory(
                 continue
         skip: int | None = self._loader_config.get('skip')
         limit: int | None = self._loader_config.get('limit')
-        loader = loaders.HuggingFaceMultiLoader(configs, skip=skip, limit=limit)
+        interleaving: str | None = self._loader_config.get('interleaving')
+        prefetch_depth: int = (
+            self._loader_config.get('source_prefetch_depth', 1))
+        loader = loaders.HuggingFaceMultiLoader(configs, skip=skip,
+            limit=limit, shard_index=self._shard_index,
+            shard_count=self._shard_count, interleaving=interleaving,
+            prefetch_depth=prefetch_depth,
+            cache=_create_shard_cache(self._loader_config))
         return loader
 
     def create_saver(self: Self) -> savers.Saver[dict[str, Any]]:
-        file_pathname = self._saver_config['file_pathname']
-        limit = self._saver_config.get('limit')
-        saver = savers.LocalFileSaver(file_pathname, limit=limit)
+        saver = _create_local_file_saver(self._saver_config)
         return saver
 
     def create_processor(
@@ -440,7 +781,9 @@ class CoverageConcatenatedHuggingFaceGoogleCloudStorageFactory(
         loader: loaders.Loader[dict[str, Any]],
         saver: savers.Saver[dict[str, Any]],
     ) -> processors.Processor[dict[str, Any], dict[str, Any]]:
-        processor = processors.UniqueCoverageSamplesProcessor(loader, saver)
+        processor = processors.UniqueCoverageSamplesProcessor(loader, saver,
+            memory_budget=self._memory_budget,
+            spill_dir_pathname=self._spill_dir_pathname)
         return processor
 
 
@@ -455,9 +798,17 @@ class CoverageConcatenatedHuggingFaceGoogleCloudStorageFactory(
     ) -> None:
         self._token = args.token
         self._loader_config: dict[str, Any] = config['loader']
-        self._saver_config: dict[str, Any] = config['saver']
+        self._shard_index, self._shard_count = (
+            _find_shard(self._loader_config, args))
+        self._saver_config: dict[str, Any] = (
+            _find_shard_saver_config(config['saver'], self._shard_index))
+        self._memory_budget = config.get('memory_budget')
+        self._spill_dir_pathname = config.get('spill_dir_pathname')
 
     def create_loader(self: Self) -> loaders.Loader[dict[str, Any]]:
+        if 'pathnames' in self._loader_config:
+            return _create_disk_loader(self._loader_config, self._token,
+                self._shard_index, self._shard_count)
         configs = self._loader_config['configs']
         for config in configs:
             try:
@@ -466,16 +817,19 @@ class CoverageConcatenatedHuggingFaceGoogleCloudStorageFactory(
                 continue
         skip: int | None = self._loader_config.get('skip')
         limit: int | None = self._loader_config.get('limit')
-        loader = loaders.HuggingFaceMultiLoader(configs, skip=skip, limit=limit)
+        interleaving: str | None = self._loader_config.get('interleaving')
+        prefetch_depth: int = (
+            self._loader_config.get('source_prefetch_depth', 1))
+        loader = loaders.HuggingFaceMultiLoader(configs, skip=skip,
+            limit=limit, shard_index=self._shard_index,
+            shard_count=self._shard_count, interleaving=interleaving,
+            prefetch_depth=prefetch_depth,
+            cache=_create_shard_cache(self._loader_config))
         return loader
 
     def create_saver(self: Self) -> savers.Saver[dict[str, Any]]:
-        project_id = self._saver_config['project_id']
-        bucket_name = self._saver_config['bucket_name']
-        pathname = self._saver_config['pathname']
-        limit = self._saver_config.get('limit')
-        saver = savers.HuggingFaceGoogleCloudStorageSaver(
-            project_id, bucket_name, pathname, token=self._token, limit=limit)
+        saver = _create_google_cloud_storage_saver(self._saver_config,
+            self._token, schema=savers.COVERAGE_SAMPLE_SCHEMA)
         return saver
 
     def create_processor(
@@ -483,5 +837,7 @@ class CoverageConcatenatedHuggingFaceGoogleCloudStorageFactory(
         loader: loaders.Loader[dict[str, Any]],
         saver: savers.Saver[dict[str, Any]],
     ) -> processors.Processor[dict[str, Any], dict[str, Any]]:
-        processor = processors.UniqueCoverageSamplesProcessor(loader, saver)
+        processor = processors.UniqueCoverageSamplesProcessor(loader, saver,
+            memory_budget=self._memory_budget,
+            spill_dir_pathname=self._spill_dir_pathname)
         return processor
@@ -0,0 +1,171 @@
+from collections.abc import Iterable
+import hashlib
+import logging
+import os
+import pathlib
+import shutil
+import sqlite3
+import tempfile
+from types import TracebackType
+from typing import Any
+try:
+    from typing import Self
+except ImportError:
+    from typing_extensions import Self
+
+
+_METHOD_KEYS = ['focal_method', 'test_input_method', 'test_target_method']
+
+
+def digest_method_triplet(sample: dict[str, Any]) -> bytes:
+    """Digests the focal and test method bodies of a coverage sample.
+
+    The digest is a 128-bit BLAKE2b hash, so collisions are negligible even
+    among billions of samples.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for key in _METHOD_KEYS:
+        body: bytes = sample[key]['body'].encode()
+        # The length keeps the bodies apart, so they cannot run into each other.
+        digest.update(len(body).to_bytes(8, 'little'))
+        digest.update(body)
+    return digest.digest()
+
+
+class DigestIndex:
+    """A context manager for a persistent set of digests stored on disk.
+
+    The digests are kept in a SQLite database, which can be shared by several
+    runs and processes. Each digest added is committed at once, so only one of
+    them is ever told that a digest is new.
+
+    With an `owner`, digests are added as claims of that owner until they are
+    committed, so that the claims left by a failed run can be released when
+    the owner runs again. Claimed digests are no longer new to others.
+    """
+    def __init__(
+        self: Self,
+        pathname: str,
+        owner: str | None = None,
+        timeout: float = 60.0,
+    ) -> None:
+        self._pathname = pathname
+        self._owner = owner
+        self._timeout = timeout
+
+    def __enter__(self: Self) -> Self:
+        pathlib.Path(self._pathname).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(
+            self._pathname, timeout=self._timeout, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS digests '
+            + '(digest BLOB PRIMARY KEY, owner TEXT) WITHOUT ROWID')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS digests_owner '
+            + 'ON digests (owner) WHERE owner IS NOT NULL')
+        return self
+
+    def __exit__(
+        self: Self,
+        exception_type: type[BaseException],
+        exception_value: BaseException,
+        exception_traceback: TracebackType,
+    ) -> bool:
+        self._connection.close()
+        return False
+
+    def __contains__(self: Self, digest: bytes) -> bool:
+        cursor = self._connection.execute(
+            'SELECT 1 FROM digests WHERE digest = ?', (digest,))
+        return cursor.fetchone() is not None
+
+    def add(self: Self, digest: bytes) -> bool:
+        """Adds a digest, returning whether it is new."""
+        cursor = self._connection.execute(
+            'INSERT OR IGNORE INTO digests VALUES (?, ?)',
+            (digest, self._owner))
+        return cursor.rowcount == 1
+
+    def add_all(self: Self, digests: Iterable[bytes]) -> None:
+        """Adds digests in a single transaction."""
+        self._connection.execute('BEGIN')
+        try:
+            self._connection.executemany(
+                'INSERT OR IGNORE INTO digests VALUES (?, ?)',
+                ((digest, self._owner) for digest in digests))
+        except BaseException:
+            self._connection.execute('ROLLBACK')
+            raise
+        self._connection.execute('COMMIT')
+
+    def commit(self: Self) -> None:
+        """Commits the digests claimed by the owner."""
+        self._connection.execute(
+            'UPDATE digests SET owner = NULL WHERE owner = ?', (self._owner,))
+
+    def release(self: Self) -> int:
+        """Releases the digests claimed by the owner, returning their count."""
+        cursor = self._connection.execute(
+            'DELETE FROM digests WHERE owner = ?', (self._owner,))
+        return cursor.rowcount
+
+
+# A rough size of a 16-byte digest in a set, including the bytes object.
+_DIGEST_MEMORY_SIZE = 100
+
+
+class SpillingDigestSet:
+    """A context manager for a set of digests which spills to disk.
+
+    Digests are held in memory until they would take up more than
+    `memory_budget` bytes, after which they are all moved into a temporary
+    `DigestIndex` on disk, in `directory` if given, and the memory is reused.
+    The temporary index is removed on exit.
+    """
+    def __init__(
+        self: Self,
+        memory_budget: int | None = None,
+        directory: str | None = None,
+    ) -> None:
+        self._memory_budget = memory_budget
+        self._directory = directory
+
+    def __enter__(self: Self) -> Self:
+        self._digests: set[bytes] = set()
+        self._temp_dir_pathname: str | None = None
+        self._index: DigestIndex | None = None
+        return self
+
+    def __exit__(
+        self: Self,
+        exception_type: type[BaseException],
+        exception_value: BaseException,
+        exception_traceback: TracebackType,
+    ) -> bool:
+        self._digests.clear()
+        if self._index is not None:
+            self._index.__exit__(None, None, None)
+            shutil.rmtree(self._temp_dir_pathname)
+        return False
+
+    def add(self: Self, digest: bytes) -> bool:
+        """Adds a digest, returning whether it is new."""
+        if digest in self._digests:
+            return False
+        if self._index is not None and digest in self._index:
+            return False
+        self._digests.add(digest)
+        if (self._memory_budget is not None
+            and len(self._digests) * _DIGEST_MEMORY_SIZE > self._memory_budget):
+            self._spill()
+        return True
+
+    def _spill(self: Self) -> None:
+        if self._index is None:
+            self._temp_dir_pathname = tempfile.mkdtemp(dir=self._directory)
+            index_pathname = os.path.join(self._temp_dir_pathname, 'index')
+            self._index = DigestIndex(index_pathname).__enter__()
+        logging.info(f'spilling {len(self._digests)} digests to disk')
+        # Sorting makes the insertions into the index mostly sequential.
+        self._index.add_all(sorted(self._digests))
+        self._digests.clear()
@@ -1,6 +1,11 @@
 import abc
+import copy
+import io
 import json
+import os
+import posixpath
 from typing import Any
+from typing import Generator
 from typing import Generic
 from typing import Iterator
 try:
@@ -10,7 +15,12 @@ except ImportError:
 from typing import TypeVar
 
 import datasets
+import datasets.distributed
+import fsspec
+import pyarrow
+import pyarrow.parquet
 
+from dataset_creator import caches
 from dataset_creator import utilities
 
 
@@ -23,24 +33,58 @@ class Loader(abc.ABC, Generic[_T]):
         raise NotImplementedError()
 
 
+class PrefetchLoader(Loader[_T]):
+    """A loader prefetching the samples of another loader in the background.
+
+    The background thread is only started when the first sample is requested,
+    so the iterator returned can still be pickled until then.
+    """
+    def __init__(self: Self, loader: Loader[_T], depth: int = 1) -> None:
+        self._loader = loader
+        self._depth = depth
+
+    def load(self: Self) -> Iterator[_T]:
+        def create_generator():
+            samples = self._loader.load()
+            for sample in utilities.prefetch(samples, depth=self._depth):
+                yield sample
+        iterator = utilities.GeneratorFunctionIterator(create_generator)
+        return iterator
+
+
 class HuggingFaceLoader(Loader[dict[str, Any]]):
     def __init__(
         self: Self,
         config: dict[str, Any],
         skip: int | None = None,
         limit: int | None = None,
+        columns: list[str] | None = None,
+        shard_index: int | None = None,
+        shard_count: int | None = None,
+        cache: caches.ShardCache | None = None,
     ) -> None:
         self._config = dict(streaming=True, **config)
+        if columns is not None:
+            # Pushed down into the Parquet reads, so other columns are skipped.
+            self._config['columns'] = columns
         self._skip = skip
         self._limit = limit
+        self._shard_index = shard_index
+        self._shard_count = shard_count
+        self._cache = cache
 
     def load(self: Self) -> Iterator[dict[str, Any]]:
-        dataset = datasets.load_dataset(**self._config)
+        dataset, skip = _load_dataset(self._config, self._skip,
+            self._shard_index, self._shard_count, self._cache)
+        if skip > 0 and isinstance(dataset, datasets.IterableDataset):
+            dataset = dataset.skip(skip)
+            skip = 0
         def create_generator():
+            if self._limit is not None and self._limit < 1:
+                return
             ds_iterator = iter(dataset)
-            if self._skip is not None:
-                for _ in range(self._skip):
-                    next(ds_iterator, None)
+            for _ in range(skip):
+                next(ds_iterator, None)
             i = 0
             for sample in ds_iterator:
                 yield sample
@@ -53,28 +97,142 @@ class HuggingFaceLoader(Loader[dict[str, Any]]):
         return iterator
 
 
+class HuggingFaceArrowLoader(Loader[pyarrow.Table]):
+    """A loader of Hugging Face datasets as Arrow tables of up to `batch_size`.
+
+    The batches are sliced out of the Arrow tables read by the dataset, so no
+    row is converted to Python objects. Processors can then operate on whole
+    columns at once.
+    """
+    def __init__(
+        self: Self,
+        config: dict[str, Any],
+        skip: int | None = None,
+        limit: int | None = None,
+        columns: list[str] | None = None,
+        batch_size: int = 10000,
+        shard_index: int | None = None,
+        shard_count: int | None = None,
+        cache: caches.ShardCache | None = None,
+    ) -> None:
+        self._config = dict(streaming=True, **config)
+        if columns is not None:
+            self._config['columns'] = columns
+        self._skip = skip
+        self._limit = limit
+        self._batch_size = batch_size
+        self._shard_index = shard_index
+        self._shard_count = shard_count
+        self._cache = cache
+
+    def load(self: Self) -> Iterator[pyarrow.Table]:
+        dataset, skip = _load_dataset(self._config, self._skip,
+            self._shard_index, self._shard_count, self._cache)
+        def create_generator():
+            batches = dataset.with_format('arrow').iter(self._batch_size)
+            to_skip = skip
+            num_remaining = self._limit
+            for batch in batches:
+                if to_skip > 0:
+                    num_skipped = min(to_skip, batch.num_rows)
+                    batch = batch.slice(num_skipped)
+                    to_skip -= num_skipped
+                if num_remaining is not None:
+                    batch = batch.slice(0, num_remaining)
+                    num_remaining -= batch.num_rows
+                if batch.num_rows > 0:
+                    yield batch
+                if num_remaining is not None and num_remaining <= 0:
+                    break
+        iterator = utilities.GeneratorFunctionIterator(create_generator)
+        return iterator
+
+
 class HuggingFaceMultiLoader(Loader[dict[str, Any]]):
+    """A loader of several Hugging Face datasets with the same features.
+
+    By default, the datasets are concatenated and loaded one after another. If
+    an interleaving policy is given, all the datasets are loaded concurrently,
+    each prefetched in the background up to `prefetch_depth` samples, and their
+    samples are interleaved. With `'round_robin'`, one sample is taken from each
+    dataset in turn. With `'size_weighted'`, samples are taken from each dataset
+    in proportion to its number of rows, so all of them end at about the same
+    time. Either way the order is deterministic, so skipping is still
+    reproducible, though it can no longer skip whole shards.
+    """
     def __init__(
         self: Self,
         configs: list[dict[str, Any]],
         skip: int | None = None,
         limit: int | None = None,
+        shard_index: int | None = None,
+        shard_count: int | None = None,
+        interleaving: str | None = None,
+        prefetch_depth: int = 1,
+        cache: caches.ShardCache | None = None,
     ) -> None:
+        if interleaving not in _INTERLEAVINGS:
+            raise ValueError(f'unknown interleaving: {interleaving}')
         self._configs = [dict(streaming=True, **config) for config in configs]
         self._skip = skip
         self._limit = limit
+        self._shard_index = shard_index
+        self._shard_count = shard_count
+        self._interleaving = interleaving
+        self._prefetch_depth = prefetch_depth
+        self._cache = cache
 
     def load(self: Self) -> Iterator[dict[str, Any]]:
         first_dataset = datasets.load_dataset(**self._configs[0])
-        dsets = [
-            datasets.load_dataset(**config, features=first_dataset.features)
-            for config in self._configs]
-        dataset = datasets.concatenate_datasets(dsets)
+        configs = self._configs
+        skip = 0 if self._skip is None else self._skip
+        is_iterable = isinstance(first_dataset, datasets.IterableDataset)
+        is_split_by_example = False
+        if self._shard_count is not None and is_iterable:
+            sharded_configs = _shard_data_files(
+                configs, self._shard_index, self._shard_count)
+            if sharded_configs is None:
+                is_split_by_example = True
+            else:
+                configs = sharded_configs
+        is_concatenated = self._interleaving is None
+        if skip > 0 and is_iterable and is_concatenated:
+            if not is_split_by_example:
+                configs, skip = _skip_shards(configs, skip)
+        if self._cache is not None and is_iterable:
+            configs = [_cache_data_files(config, self._cache)
+                for config in configs]
+        dsets = [first_dataset if config is self._configs[0]
+            else datasets.load_dataset(**config,
+                features=first_dataset.features)
+            for config in configs]
+        if self._shard_count is not None and not is_iterable:
+            dsets = [dset.shard(
+                    self._shard_count, self._shard_index, contiguous=True)
+                for dset in dsets]
+        if is_split_by_example:
+            dsets = [datasets.distributed.split_dataset_by_node(
+                    dset, self._shard_index, self._shard_count)
+                for dset in dsets]
+        if is_concatenated:
+            dataset = datasets.concatenate_datasets(dsets)
+            if skip > 0 and is_iterable:
+                dataset = dataset.skip(skip)
+                skip = 0
+        elif self._interleaving == 'size_weighted':
+            weights = [_count_rows(config, dset)
+                for config, dset in zip(configs, dsets)]
+        else:
+            weights = [1] * len(dsets)
         def create_generator():
-            ds_iterator = iter(dataset)
-            if self._skip is not None:
-                for _ in range(self._skip):
-                    next(ds_iterator, None)
+            if is_concatenated:
+                ds_iterator = iter(dataset)
+            else:
+                sources = [utilities.prefetch(dset, depth=self._prefetch_depth)
+                    for dset in dsets]
+                ds_iterator = utilities.interleave(sources, weights)
+            for _ in range(skip):
+                next(ds_iterator, None)
             i = 0
             for sample in ds_iterator:
                 yield sample
@@ -87,12 +245,489 @@ class HuggingFaceMultiLoader(Loader[dict[str, Any]]):
         return iterator
 
 
+_INTERLEAVINGS = (None, 'round_robin', 'size_weighted')
+
+
+class HuggingFaceDiskLoader(Loader[dict[str, Any]]):
+    """A loader of datasets saved by `datasets.Dataset.save_to_disk`.
+
+    The Arrow files of the datasets are memory-mapped rather than decoded from
+    JSON or Parquet again, and remote datasets are first copied to a local
+    temporary directory. Several datasets are concatenated without copying.
+    Skipping, limiting and sharding select contiguous ranges of rows, so the
+    pages of the rows outside of the range are never read.
+    """
+    def __init__(
+        self: Self,
+        pathnames: list[str],
+        storage_options: dict[str, Any] | None = None,
+        skip: int | None = None,
+        limit: int | None = None,
+        shard_index: int | None = None,
+        shard_count: int | None = None,
+        batch_size: int = 1000,
+    ) -> None:
+        self._pathnames = pathnames
+        self._storage_options = storage_options
+        self._skip = skip
+        self._limit = limit
+        self._shard_index = shard_index
+        self._shard_count = shard_count
+        self._batch_size = batch_size
+
+    def load(self: Self) -> Iterator[dict[str, Any]]:
+        batches = self.load_batches()
+        def create_generator():
+            for batch in batches:
+                for sample in batch.to_pylist():
+                    yield sample
+        iterator = utilities.GeneratorFunctionIterator(create_generator)
+        return iterator
+
+    def load_batches(self: Self) -> Iterator[pyarrow.Table]:
+        """Loads zero-copy Arrow slices of up to `batch_size` rows."""
+        dataset = self._load_dataset().with_format('arrow')
+        def create_generator():
+            for start in range(0, len(dataset), self._batch_size):
+                yield dataset[start:start + self._batch_size]
+        iterator = utilities.GeneratorFunctionIterator(create_generator)
+        return iterator
+
+    def load_sample(self: Self, index: int) -> dict[str, Any]:
+        """Loads the sample at an index of the loaded range of rows."""
+        dataset = self._load_dataset()
+        return dataset[index]
+
+    def _load_dataset(self: Self) -> datasets.Dataset:
+        try:
+            return self._dataset
+        except AttributeError:
+            pass
+        dsets = [datasets.load_from_disk(pathname, keep_in_memory=False,
+                storage_options=self._storage_options)
+            for pathname in self._pathnames]
+        dataset = datasets.concatenate_datasets(dsets)
+        start = 0
+        end = len(dataset)
+        if self._shard_count is not None:
+            start = len(dataset) * self._shard_index // self._shard_count
+            end = len(dataset) * (self._shard_index + 1) // self._shard_count
+        if self._skip is not None:
+            start = min(start + self._skip, end)
+        if self._limit is not None:
+            end = min(start + self._limit, end)
+        self._dataset = dataset.select(range(start, end))
+        return self._dataset
+
+
+def _load_dataset(
+    config: dict[str, Any],
+    skip: int | None,
+    shard_index: int | None,
+    shard_count: int | None,
+    cache: caches.ShardCache | None,
+) -> tuple[datasets.Dataset | datasets.IterableDataset, int]:
+    """Loads the shard of a dataset with its leading shards skipped.
+
+    Returns the dataset with the number of rows that are still to be skipped.
+    If a cache is given, the data files left are read from local copies.
+    """
+    dataset = datasets.load_dataset(**config)
+    skip = 0 if skip is None else skip
+    if not isinstance(dataset, datasets.IterableDataset):
+        if shard_count is not None:
+            dataset = dataset.shard(shard_count, shard_index, contiguous=True)
+        return dataset, skip
+    loaded_config = config
+    if shard_count is not None:
+        sharded_configs = (
+            _shard_data_files([config], shard_index, shard_count))
+        if sharded_configs is None:
+            if cache is not None:
+                dataset = datasets.load_dataset(
+                    **_cache_data_files(config, cache))
+            dataset = datasets.distributed.split_dataset_by_node(
+                dataset, shard_index, shard_count)
+            return dataset, skip
+        (config,) = sharded_configs
+    if skip > 0:
+        (config,), skip = _skip_shards([config], skip)
+    if cache is not None:
+        config = _cache_data_files(config, cache)
+    if config is not loaded_config:
+        dataset = datasets.load_dataset(**config)
+    return dataset, skip
+
+
+def _shard_data_files(
+    configs: list[dict[str, Any]],
+    shard_index: int,
+    shard_count: int,
+) -> list[dict[str, Any]] | None:
+    """Narrows each config to a contiguous block of its data files.
+
+    The blocks of different shard indices are disjoint, so workers with
+    different shard indices read disjoint files without iterating over the
+    files of one another. Returns None if a config has fewer data files than
+    shards, in which case the dataset has to be split by example instead.
+    """
+    sharded_configs = list()
+    for config in configs:
+        builder, split, data_files = _find_data_files(config)
+        if len(data_files) < shard_count:
+            return None
+        start = len(data_files) * shard_index // shard_count
+        end = len(data_files) * (shard_index + 1) // shard_count
+        sharded_config = dict(config, data_files={split: data_files[start:end]})
+        sharded_configs.append(sharded_config)
+    return sharded_configs
+
+
+def _skip_shards(
+    configs: list[dict[str, Any]],
+    skip: int,
+) -> tuple[list[dict[str, Any]], int]:
+    """Drops the leading Parquet shards that would be skipped entirely.
+
+    Only the Parquet footers of the dropped shards (and of the shard the skip
+    ends in) are read to find their row counts. The remaining configs only
+    point to the shards from the one containing the first row not skipped, and
+    the number of rows still to be skipped within that shard is returned with
+    them. The last shard is never dropped so that at least one config remains.
+    """
+    for i, config in enumerate(configs):
+        is_last_config = i == len(configs) - 1
+        builder, split, data_files = _find_data_files(config)
+        if builder.name != 'parquet':
+            return configs[i:], skip
+        for j, data_file in enumerate(data_files):
+            is_last_data_file = is_last_config and j == len(data_files) - 1
+            num_rows = _find_num_rows(data_file, builder.storage_options)
+            if skip < num_rows or is_last_data_file:
+                if j > 0:
+                    config = dict(config, data_files={split: data_files[j:]})
+                return [config, *configs[i + 1:]], skip
+            skip -= num_rows
+    return configs[-1:], skip
+
+
+def _count_rows(
+    config: dict[str, Any],
+    dataset: datasets.Dataset | datasets.IterableDataset,
+) -> int:
+    """Counts the rows of a dataset, or returns 1 if it cannot be counted."""
+    if isinstance(dataset, datasets.Dataset):
+        return len(dataset)
+    builder, _, data_files = _find_data_files(config)
+    if builder.name != 'parquet':
+        return 1
+    num_rows = sum(_find_num_rows(data_file, builder.storage_options)
+        for data_file in data_files)
+    return num_rows
+
+
+def _find_data_files(
+    config: dict[str, Any],
+) -> tuple[datasets.DatasetBuilder, str, list[str]]:
+    builder_config = {key: value for key, value in config.items()
+        if key not in ('split', 'streaming')}
+    builder = datasets.load_dataset_builder(**builder_config)
+    split = config.get('split') or 'train'
+    data_files = list(builder.config.data_files[split])
+    return builder, split, data_files
+
+
+def _cache_data_files(
+    config: dict[str, Any],
+    cache: caches.ShardCache,
+) -> dict[str, Any]:
+    """Points a config to local copies of its data files in a shard cache."""
+    builder, split, data_files = _find_data_files(config)
+    if len(data_files) < 1:
+        return config
+    storage_options = (
+        _find_storage_options(data_files[0], builder.storage_options))
+    local_data_files = cache.fetch_all(data_files, storage_options)
+    cached_config = {key: value for key, value in config.items()
+        if key != 'storage_options'}
+    cached_config['data_files'] = {split: local_data_files}
+    return cached_config
+
+
+def _find_num_rows(data_file: str, storage_options: dict[str, Any]) -> int:
+    options = _find_storage_options(data_file, storage_options)
+    with fsspec.open(data_file, mode='rb', **options) as parquet_file:
+        metadata = pyarrow.parquet.read_metadata(parquet_file)
+    return metadata.num_rows
+
+
+def _find_storage_options(
+    data_file: str,
+    storage_options: dict[str, Any],
+) -> dict[str, Any]:
+    protocol = fsspec.utils.get_protocol(data_file)
+    if protocol == 'hf':
+        return storage_options.get('hf', dict())
+    options = {key: value for key, value in storage_options.items()
+        if key != 'hf'}
+    return options
+
+
 class JsonlFileLoader(Loader[dict[str, Any]]):
-    def __init__(self: Self, pathname: str) -> None:
+    """A loader streaming samples from a JSON Lines file.
+
+    The file is read and decoded one line at a time, so memory use does not
+    depend on the size of the file. Lines to be skipped are not decoded. If an
+    offset is given, reading starts at that byte offset, which must be at the
+    start of a line.
+
+    If sharded, the bytes from the offset are split into `shard_count` equal
+    ranges, and only the lines starting within the range of `shard_index` are
+    loaded, so workers read disjoint parts of the file.
+
+    Gzip and zstd files are decompressed as they are read, with the compression
+    inferred from the extension unless given. As a compressed file cannot be
+    seeked into, the offset is then into the decompressed bytes and is reached
+    by reading, and sharding assigns every `shard_count`-th line to a shard.
+    """
+    def __init__(
+        self: Self,
+        pathname: str,
+        skip: int | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        buffer_size: int = io.DEFAULT_BUFFER_SIZE,
+        shard_index: int | None = None,
+        shard_count: int | None = None,
+        compression: str | None = 'infer',
+    ) -> None:
         self._pathname = pathname
+        self._skip = skip
+        self._limit = limit
+        self._offset = offset
+        self._buffer_size = buffer_size
+        self._shard_index = shard_index
+        self._shard_count = shard_count
+        self._compression = (
+            utilities.find_compression(pathname, compression=compression))
 
     def load(self: Self) -> Iterator[dict[str, Any]]:
-        with open(self._pathname) as jsonl_file:
-            sample_strs = jsonl_file.readlines()
-        samples = map(json.loads, sample_strs)
-        return samples
+        def create_generator():
+            if self._limit is not None and self._limit < 1:
+                return
+            with utilities.open_reader(self._pathname,
+                compression=self._compression,
+                buffer_size=self._buffer_size) as jsonl_file:
+                if self._compression is None:
+                    lines = self._read_lines(jsonl_file)
+                else:
+                    lines = self._read_compressed_lines(jsonl_file)
+                skipped = 0
+                i = 0
+                for line in lines:
+                    if len(line.strip()) < 1:
+                        continue
+                    if self._skip is not None and skipped < self._skip:
+                        skipped += 1
+                        continue
+                    yield json.loads(line)
+                    if self._limit is None:
+                        continue
+                    i += 1
+                    if i >= self._limit:
+                        break
+        iterator = utilities.GeneratorFunctionIterator(create_generator)
+        return iterator
+
+    def _read_lines(
+        self: Self,
+        jsonl_file: io.BufferedReader,
+    ) -> Generator[bytes, None, None]:
+        start, end = self._find_byte_range(jsonl_file)
+        jsonl_file.seek(start)
+        position = start
+        if self._shard_count is not None and start > 0:
+            # The line containing the previous byte is in a prior shard.
+            jsonl_file.seek(start - 1)
+            position = start - 1 + len(jsonl_file.readline())
+        for line in jsonl_file:
+            if end is not None and position >= end:
+                break
+            position += len(line)
+            yield line
+
+    def _read_compressed_lines(
+        self: Self,
+        jsonl_file: io.BufferedReader,
+    ) -> Generator[bytes, None, None]:
+        remaining = 0 if self._offset is None else self._offset
+        while remaining > 0:
+            discarded = jsonl_file.read(min(remaining, self._buffer_size))
+            if len(discarded) < 1:
+                return
+            remaining -= len(discarded)
+        for i, line in enumerate(jsonl_file):
+            if (self._shard_count is not None
+                and i % self._shard_count != self._shard_index):
+                continue
+            yield line
+
+    def _find_byte_range(
+        self: Self,
+        jsonl_file: io.BufferedReader,
+    ) -> tuple[int, int | None]:
+        offset = 0 if self._offset is None else self._offset
+        if self._shard_count is None:
+            return offset, None
+        size = os.fstat(jsonl_file.fileno()).st_size - offset
+        start = offset + size * self._shard_index // self._shard_count
+        end = offset + size * (self._shard_index + 1) // self._shard_count
+        return start, end
+
+
+class JsonlManifestLoader(Loader[dict[str, Any]]):
+    """A loader streaming samples from the JSON Lines shards in a manifest.
+
+    The manifest is the one written by a sharding `LocalFileSaver`, listing the
+    shard files, relative to the manifest, and their sample counts. Shards
+    wholly within the number of samples to skip are not opened.
+
+    If sharded, the shard files are split between workers, with every
+    `shard_count`-th file going to the same worker.
+    """
+    def __init__(
+        self: Self,
+        manifest_pathname: str,
+        skip: int | None = None,
+        limit: int | None = None,
+        shard_index: int | None = None,
+        shard_count: int | None = None,
+        compression: str | None = 'infer',
+    ) -> None:
+        self._manifest_pathname = manifest_pathname
+        self._skip = skip
+        self._limit = limit
+        self._shard_index = shard_index
+        self._shard_count = shard_count
+        self._compression = compression
+
+    def load(self: Self) -> Iterator[dict[str, Any]]:
+        def create_generator():
+            if self._limit is not None and self._limit < 1:
+                return
+            with open(self._manifest_pathname) as manifest_file:
+                manifest = json.load(manifest_file)
+            shards = manifest['shards']
+            if self._shard_count is not None:
+                shards = shards[self._shard_index::self._shard_count]
+            directory = os.path.dirname(self._manifest_pathname)
+            skip = 0 if self._skip is None else self._skip
+            remaining = self._limit
+            for shard in shards:
+                if skip >= shard['num_samples']:
+                    skip -= shard['num_samples']
+                    continue
+                pathname = os.path.join(directory, shard['pathname'])
+                loader = JsonlFileLoader(pathname, skip=skip, limit=remaining,
+                    compression=self._compression)
+                skip = 0
+                for sample in loader.load():
+                    yield sample
+                    if remaining is not None:
+                        remaining -= 1
+                if remaining is not None and remaining < 1:
+                    break
+        iterator = utilities.GeneratorFunctionIterator(create_generator)
+        return iterator
+
+
+class NormalizedCoverageLoader(Loader[dict[str, Any]]):
+    """A loader expanding normalized coverage tables back into samples.
+
+    The tables are the ones written by `savers.NormalizedCoverageSaver`. The
+    repositories, focal methods and test methods are read into memory, while
+    the pairs are read `batch_size` rows at a time and expanded as requested.
+    """
+    def __init__(
+        self: Self,
+        url: str,
+        storage_options: dict[str, Any] | None = None,
+        skip: int | None = None,
+        limit: int | None = None,
+        batch_size: int = 1000,
+    ) -> None:
+        self._url = url
+        self._storage_options = (
+            dict() if storage_options is None else storage_options)
+        self._skip = skip
+        self._limit = limit
+        self._batch_size = batch_size
+
+    def load(self: Self) -> Iterator[dict[str, Any]]:
+        def create_generator():
+            if self._limit is not None and self._limit < 1:
+                return
+            file_system, path = (
+                fsspec.core.url_to_fs(self._url, **self._storage_options))
+            def read_rows(name: str) -> dict[str, dict[str, Any]]:
+                table_pathname = posixpath.join(path, f'{name}.parquet')
+                with file_system.open(table_pathname, mode='rb') as file:
+                    table = pyarrow.parquet.read_table(file)
+                return {row['id']: row for row in table.to_pylist()}
+            repositories = read_rows('repositories')
+            focal_methods = read_rows('focal_methods')
+            test_methods = read_rows('test_methods')
+            pairs_pathname = posixpath.join(path, 'pairs.parquet')
+            skipped = 0
+            i = 0
+            with file_system.open(pairs_pathname, mode='rb') as file:
+                pairs_file = pyarrow.parquet.ParquetFile(file)
+                for batch in pairs_file.iter_batches(self._batch_size):
+                    for pair in batch.to_pylist():
+                        if self._skip is not None and skipped < self._skip:
+                            skipped += 1
+                            continue
+                        yield _expand_coverage_sample(
+                            pair, repositories, focal_methods, test_methods)
+                        if self._limit is None:
+                            continue
+                        i += 1
+                        if i >= self._limit:
+                            return
+        iterator = utilities.GeneratorFunctionIterator(create_generator)
+        return iterator
+
+
+def _expand_coverage_sample(
+    pair: dict[str, Any],
+    repositories: dict[str, dict[str, Any]],
+    focal_methods: dict[str, dict[str, Any]],
+    test_methods: dict[str, dict[str, Any]],
+) -> dict[str, Any]:
+    focal_method_row = focal_methods[pair['focal_method_id']]
+    repository_row = repositories[focal_method_row['repository_id']]
+    focal_method: dict[str, Any] = focal_method_row['focal_method']
+    focal_method_lines: list[str] = focal_method['body'].split('\n')
+    focal_line_indices: list[int] = pair['focal_line_indices']
+    focal_lines = [focal_method_lines[i - focal_method['line_start']]
+        for i in focal_line_indices]
+    sample = dict(
+        repository=dict(
+            repository_url=repository_row['repository_url'],
+            repository_hexsha=repository_row['repository_hexsha'],
+        ),
+        project_path=focal_method_row['project_path'],
+        focal_file=focal_method_row['focal_file'],
+        focal_class=focal_method_row['focal_class'],
+        focal_method=focal_method,
+        focal_line_indices=focal_line_indices,
+        focal_lines=focal_lines,
+        test_file=pair['test_file'],
+        test_class=pair['test_class'],
+        test_input_method=(
+            test_methods[pair['test_input_method_id']]['test_method']),
+        test_target_method=(
+            test_methods[pair['test_target_method_id']]['test_method']),
+    )
+    # Rows are shared between samples, so each sample gets its own copy.
+    return copy.deepcopy(sample)
@@ -1,11 +1,14 @@
 import argparse
 import json
 import logging
+import os
 
 import dotenv
 
 from dataset_creator import argument_parsers
 from dataset_creator import creator_factories
+from dataset_creator import loaders
+from dataset_creator import savers
 
 
 def main(args: argparse.Namespace) -> None:
@@ -21,7 +24,20 @@ def main(args: argparse.Namespace) -> None:
     creator_factory_cls: type[creator_factories.CreatorFactory] = args.creator
     creator_factory = creator_factory_cls(config, args)
     loader = creator_factory.create_loader()
+    prefetch_depth: int | None = config['loader'].get('prefetch_depth')
+    if prefetch_depth is not None:
+        loader = loaders.PrefetchLoader(loader, depth=prefetch_depth)
     saver = creator_factory.create_saver()
+    index_pathname: str | None = config['saver'].get('index_pathname')
+    if index_pathname is not None:
+        # Reruns of a worker, with the same config and shard, own its claims.
+        index_owner: str = config['saver'].get('index_owner',
+            f'{os.path.abspath(config_file_pathname)}#{args.shard_index}')
+        saver = savers.DeduplicatingSaver(saver, index_pathname, index_owner)
+    write_behind_depth: int | None = (
+        config['saver'].get('write_behind_depth'))
+    if write_behind_depth is not None:
+        saver = savers.WriteBehindSaver(saver, depth=write_behind_depth)
     processor = creator_factory.create_processor(loader, saver)
     processor.process()
 
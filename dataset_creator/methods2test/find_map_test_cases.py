@@ -55,16 +55,14 @@ def analyze_project(repo_git, repo_id, grammar_file, tmp, output):
 
 
 def find_test_files(root: str) -> list[str]:
-	with utilities.WorkingDirectory(root):
-		result = (subprocess
-			.check_output(r'grep -l -r @Test --include \*.java', shell=True))
+	result = (subprocess.check_output(
+		r'grep -l -r @Test --include \*.java', shell=True, cwd=root))
 	test_files = result.decode('ascii').splitlines()
 	return test_files
 
 
 def find_java_files(root: str) -> list[str]:
-	with utilities.WorkingDirectory(root):
-		result = subprocess.check_output(['find', '-name', '*.java'])
+	result = subprocess.check_output(['find', '-name', '*.java'], cwd=root)
 	files = result.decode('ascii').splitlines()
 	java_files = [f.replace('./', '') for f in files]
 	return java_files
@@ -153,10 +151,9 @@ def find_focal_method_samples(root, parser: CodeParser) -> list:
 	test_to_focal_files = map_test_to_focal_files(focal_files, test_files)
 	for test_file, focal_file in test_to_focal_files.items():
 		try:
-			with utilities.WorkingDirectory(root):
-				test_methods = parse_test_cases(parser, test_file)
-				focal_methods = (
-					parse_potential_focal_methods(parser, focal_file))
+			test_methods = parse_test_cases(parser, test_file, root=root)
+			focal_methods = (
+				parse_potential_focal_methods(parser, focal_file, root=root))
 		except Exception:
 			continue
 		focal_file_method_samples = find_focal_file_method_samples(
@@ -266,11 +263,12 @@ def find_map_test_cases(root, grammar_file, language, output, repo):
 	return tot_tclass, tot_tc, tot_tclass_fclass, tot_mtc
 
 
-def parse_test_cases(parser, test_file):
+def parse_test_cases(parser, test_file, root=''):
 	"""
 	Parse source file and extracts test cases
+	The file is relative to the root
 	"""
-	parsed_classes = parser.parse_file(test_file)
+	parsed_classes = parser.parse_file(os.path.join(root, test_file))
 
 	test_cases = list()
 
@@ -290,11 +288,12 @@ def parse_test_cases(parser, test_file):
 	return test_cases
 
 
-def parse_potential_focal_methods(parser, focal_file):
+def parse_potential_focal_methods(parser, focal_file, root=''):
 	"""
 	Parse source file and extracts potential focal methods (non test cases)
+	The file is relative to the root
 	"""
-	parsed_classes = parser.parse_file(focal_file)
+	parsed_classes = parser.parse_file(os.path.join(root, focal_file))
 
 	potential_focal_methods = list()
 
@@ -1,8 +1,11 @@
 import abc
 import copy
+from concurrent import futures
 import logging
 import os
+import shutil
 import tempfile
+import threading
 import traceback
 from typing import Any
 from typing import Generator
@@ -13,12 +16,18 @@ try:
 except ImportError:
     from typing_extensions import Self
 from typing import TypeVar
+from typing import TypedDict
 
 import git
+import pyarrow
+import pyarrow.compute
 
+from dataset_creator import caches
 from dataset_creator import coverages
+from dataset_creator import indexes
 from dataset_creator import loaders
 from dataset_creator import projects
+from dataset_creator import repositories
 from dataset_creator import savers
 from dataset_creator import utilities
 from dataset_creator.methods2test import code_parsers
@@ -68,6 +77,46 @@ class TheStackRepositoryProcessor(Processor[dict[str, Any], dict[str, str]]):
         return True
 
 
+class TheStackRepositoryBatchProcessor(
+    Processor[pyarrow.Table, dict[str, str]],
+):
+    """A processor taking the unique repositories of Arrow batches of The Stack.
+
+    The distinct repository names of each batch are found with a vectorised
+    Arrow kernel, so only the names distinct within a batch are looked up in
+    the running set of repository names.
+    """
+    def __init__(
+        self: Self,
+        loader: loaders.Loader[pyarrow.Table],
+        saver: savers.Saver[dict[str, str]],
+    ) -> None:
+        self._loader = loader
+        self._saver = saver
+        self._unique_repository_names = set()
+
+    def process(self: Self) -> None:
+        batches = self._loader.load()
+        def create_generator():
+            for i, batch in enumerate(batches):
+                logging.info(f'batch {i}: {batch.num_rows} samples')
+                repository_names = (
+                    batch.column('max_stars_repo_name').drop_null())
+                batch_repository_names = (
+                    pyarrow.compute.unique(repository_names).to_pylist())
+                new_repository_names = [name for name in batch_repository_names
+                    if name not in self._unique_repository_names]
+                self._unique_repository_names.update(new_repository_names)
+                for repository_name in new_repository_names:
+                    repository_sample = dict(
+                        repository_name=repository_name,
+                        repository_url=f'https://github.com/{repository_name}',
+                    )
+                    yield repository_sample
+        iterator = utilities.GeneratorFunctionIterator(create_generator)
+        self._saver.save(iterator)
+
+
 class IdentityProcessor(Processor[_T, _T]):
     def __init__(
         self: Self,
@@ -82,6 +131,14 @@ class IdentityProcessor(Processor[_T, _T]):
         self._saver.save(iterator)
 
 
+class StageConfig(TypedDict, total=False):
+    workers: int
+    executor: str
+
+
+_STAGE_NAMES = ['clone', 'compile', 'parse', 'cover']
+
+
 class CoverageSamplesProcessor(Processor[dict[str, Any], dict[str, Any]]):
     def __init__(
         self: Self,
@@ -90,17 +147,54 @@ class CoverageSamplesProcessor(Processor[dict[str, Any], dict[str, Any]]):
         code_cov: coverages.CodeCov,
         parser_type: type[code_parsers.CodeParser],
         parser_args: tuple[str, str],
+        checkpoint_repository_count: int | None = None,
+        stage_configs: dict[str, StageConfig] | None = None,
+        stage_depth: int = 1,
+        max_coverage_requests: int = 1,
+        clone_config: repositories.CloneConfig | None = None,
+        repository_cache: caches.RepositoryCache | None = None,
     ) -> None:
+        """Initializes the processor.
+
+        If `checkpoint_repository_count` is given, a `savers.Checkpoint` is
+        passed to the saver after the samples of each repository, counting on
+        from that number of repositories already processed in previous runs.
+
+        If `stage_configs` is given, the repositories are cloned, compiled,
+        parsed and covered concurrently in a pipeline of stages named 'clone',
+        'compile', 'parse' and 'cover', each with its own pool of workers. Up to
+        `stage_depth` items wait for each stage. The samples are still saved in
+        the order of the repositories.
+
+        Up to `max_coverage_requests` coverage requests are made at a time,
+        across the test methods of all the focal methods being covered.
+
+        The repositories are cloned with the options of `clone_config`. If its
+        `pin_hexsha` is set, repositories with a `repository_hexsha` are cloned
+        at that commit. If `repository_cache` is given, the repositories are
+        checked out from its mirrors instead, which are never shallow or
+        partial.
+        """
         self._loader = loader
         self._saver = saver
-        self._code_cov = code_cov
-        # Lazy instantiation allows it to pickle the parser (then the iterator).
-        self._parser_type = parser_type
-        self._parser_args = parser_args
+        self._stages = _CoverageStages(code_cov, parser_type, parser_args,
+            max_coverage_requests=max_coverage_requests,
+            clone_config=clone_config, repository_cache=repository_cache)
+        self._checkpoint_repository_count = checkpoint_repository_count
+        self._stage_configs = stage_configs
+        self._stage_depth = stage_depth
 
     def process(self: Self) -> None:
         repository_samples = self._loader.load()
         def create_generator():
+            if self._stage_configs is not None:
+                yield from (self
+                    ._create_staged_sample_generator(repository_samples))
+                return
+            if self._checkpoint_repository_count is not None:
+                yield from (self
+                    ._create_checkpointed_sample_generator(repository_samples))
+                return
             for sample in self._create_sample_generator(repository_samples):
                 yield sample
         iterator = utilities.GeneratorFunctionIterator(create_generator)
@@ -108,11 +202,63 @@ class CoverageSamplesProcessor(Processor[dict[str, Any], dict[str, Any]]):
 
     @property
     def parser(self: Self) -> code_parsers.CodeParser:
-        try:
-            return self._parser
-        except AttributeError:
-            self._parser = self._parser_type(*self._parser_args)
-            return self._parser
+        return self._stages.parser
+
+    def _create_staged_sample_generator(
+        self: Self,
+        repository_samples: Iterator[dict[str, Any]],
+    ) -> Generator[dict[str, Any] | savers.Checkpoint, None, None]:
+        stage_functions = [
+            self._stages.clone,
+            self._stages.compile,
+            self._stages.parse,
+            self._stages.cover,
+        ]
+        stages = list()
+        for name, function in zip(_STAGE_NAMES, stage_functions):
+            stage_config = self._stage_configs.get(name, StageConfig())
+            stage = utilities.Stage(function,
+                workers=stage_config.get('workers', 1),
+                executor=stage_config.get('executor', 'thread'))
+            stages.append(stage)
+        with tempfile.TemporaryDirectory() as work_dir_pathname:
+            repository_jobs = ((i, repository_sample,
+                    os.path.join(work_dir_pathname, str(i)))
+                for i, repository_sample in enumerate(repository_samples))
+            def remove_repository_dir(repository_job):
+                _, _, repository_dir_pathname = repository_job
+                shutil.rmtree(repository_dir_pathname, ignore_errors=True)
+            for i, with_coverage_data_list in enumerate(
+                utilities.run_stages(repository_jobs, stages,
+                    depth=self._stage_depth, on_done=remove_repository_dir)):
+                for with_coverage_data in with_coverage_data_list:
+                    yield from self._generate_data_samples(with_coverage_data)
+                if self._checkpoint_repository_count is not None:
+                    yield savers.Checkpoint(
+                        self._checkpoint_repository_count + i + 1)
+
+    def _create_checkpointed_sample_generator(
+        self: Self,
+        repository_samples: Iterator[dict[str, Any]],
+    ) -> Generator[dict[str, Any] | savers.Checkpoint, None, None]:
+        loaded_count = 0
+        def count_repository_samples():
+            nonlocal loaded_count
+            for repository_sample in repository_samples:
+                loaded_count += 1
+                yield repository_sample
+        checkpointed_count = 0
+        for sample in (
+            self._create_sample_generator(count_repository_samples())):
+            # The generators are lazy, so only the last loaded repository can
+            # still be being processed.
+            if loaded_count - 1 > checkpointed_count:
+                checkpointed_count = loaded_count - 1
+                yield savers.Checkpoint(
+                    self._checkpoint_repository_count + checkpointed_count)
+            yield sample
+        yield savers.Checkpoint(
+            self._checkpoint_repository_count + loaded_count)
 
     def _create_sample_generator(
         self: Self,
@@ -121,183 +267,43 @@ class CoverageSamplesProcessor(Processor[dict[str, Any], dict[str, Any]]):
         for with_coverage_focal_method_data in (
             self._create_with_coverage_focal_method_data_generator(
                 repository_samples)):
-            repository_index: int = (
-                with_coverage_focal_method_data['repository_index'])
-            with_coverage_focal_method_sample = (
-                with_coverage_focal_method_data[
-                    'with_coverage_focal_method_sample'])
-            repository_url = with_coverage_focal_method_data['repository_url']
-            repository_hexsha = (
-                with_coverage_focal_method_data['repository_hexsha'])
-            project_rel_pathname = (
-                with_coverage_focal_method_data['project_rel_pathname'])
-            logging.info(f'repository {repository_index}: generating samples')
-            for sample in self._generate_samples(repository_url,
-                repository_hexsha, project_rel_pathname,
-                with_coverage_focal_method_sample):
-                yield sample
+            yield from (
+                self._generate_data_samples(with_coverage_focal_method_data))
 
     def _create_with_coverage_focal_method_data_generator(
         self: Self,
         repository_samples: Iterator[dict[str, Any]],
-    ) -> Generator[dict[str, Any], None, None]:
-        for focal_method_data in (
-            self._create_focal_method_data_generator(repository_samples)):
-            repository_index: int = focal_method_data['repository_index']
-            project_pathname: str = focal_method_data['project_pathname']
-            focal_method_sample = focal_method_data['focal_method_sample']
-            classpath_pathnames = focal_method_data['classpath_pathnames']
-            focal_classpath = focal_method_data['focal_classpath']
-            logging.info(f'repository {repository_index}: adding coverage data')
-            with_coverage_focal_method_sample = self._add_coverage_data(
-                focal_method_sample, classpath_pathnames, focal_classpath,
-                project_pathname)
-            with_coverage_focal_method_data = {
-                'repository_index': repository_index,
-                'repository_url': focal_method_data['repository_url'],
-                'repository_hexsha': focal_method_data['repository_hexsha'],
-                'project_rel_pathname': (
-                    focal_method_data['project_rel_pathname']),
-                'with_coverage_focal_method_sample':
-                    with_coverage_focal_method_sample,
-            }
-            yield with_coverage_focal_method_data
-
-    def _create_focal_method_data_generator(
-        self: Self,
-        repository_samples: Iterator[dict[str, Any]],
     ) -> Generator[dict[str, Any], None, None]:
         for project_data in (
             self._create_project_data_generator(repository_samples)):
-            repository_index: int = project_data['repository_index']
-            root_pathname: str = project_data['root_pathname']
-            project_pathname: str = project_data['project_pathname']
-            project_rel_pathname = (
-                os.path.relpath(project_pathname, root_pathname))
-            logging.info(f'project dir: {project_pathname}')
-            try:
-                project = (
-                    projects.create_project(root_pathname, project_pathname))
-                logging.info(f'repository {repository_index}: compiling')
-                project.compile()
-                logging.info(
-                    f'repository {repository_index}: finding classpath')
-                classpath_pathnames = project.find_classpath_pathnames()
-                logging.info(
-                    f'repository {repository_index}: finding focal classpath')
-                focal_classpath = project.find_focal_classpath()
-                logging.info(
-                    f'repository {repository_index}: '
-                    + 'finding focal method samples')
-                focal_method_samples = (find_map_test_cases
-                    .find_focal_method_samples(
-                        project.project_dir_pathname, self.parser))
-            except Exception as exception:
-                logging.warn(f'repository {repository_index}: {exception}')
-                logging.debug(f'{traceback.format_exc()}')
-                continue
-            for focal_method_sample in focal_method_samples:
-                focal_method_data = {
-                    'repository_index': repository_index,
-                    'repository_url': project_data['repository_url'],
-                    'repository_hexsha': project_data['repository_hexsha'],
-                    'project_pathname': project_pathname,
-                    'project_rel_pathname': project_rel_pathname,
-                    'classpath_pathnames': classpath_pathnames,
-                    'focal_classpath': focal_classpath,
-                    'focal_method_sample': focal_method_sample,
-                }
-                yield focal_method_data
+            for compiled_project_data in self._stages.compile(project_data):
+                focal_method_data_list = (
+                    self._stages.parse(compiled_project_data))
+                yield from self._stages.cover_all(focal_method_data_list)
 
     def _create_project_data_generator(
         self: Self,
         repository_samples: Iterator[dict[str, Any]],
     ) -> Generator[dict[str, Any], None, None]:
         for i, repository_sample in enumerate(repository_samples):
-            repository_url = repository_sample['repository_url']
-            logging.info(f'repository {i} url: {repository_url}')
             with tempfile.TemporaryDirectory() as temp_dir_pathname:
-                logging.info(f'repository {i} dir: {temp_dir_pathname}')
-                try:
-                    repo = (
-                        git.Repo.clone_from(repository_url, temp_dir_pathname))
-                    project = (projects
-                        .create_project(temp_dir_pathname, temp_dir_pathname))
-                    subproject_pathnames = (
-                        project.find_subproject_pathnames())
-                except Exception as exception:
-                    logging.warn(f'repository {i}: {exception}')
-                    logging.debug(f'{traceback.format_exc()}')
-                    continue
-                for subproject_pathname in subproject_pathnames:
-                    project_data = {
-                        'repository_index': i,
-                        'repository_url': repository_url,
-                        'repository_hexsha': repo.head.commit.hexsha,
-                        'root_pathname': temp_dir_pathname,
-                        'project_pathname': subproject_pathname,
-                    }
-                    yield project_data
+                yield from self._stages.clone(
+                    (i, repository_sample, temp_dir_pathname))
 
-    def _add_coverage_data(
+    def _generate_data_samples(
         self: Self,
-        focal_method_sample: dict[str, Any],
-        classpath_pathnames: list[str],
-        focal_classpath: str,
-        project_pathname: str,
-    ) -> dict[str, Any]:
-        focal_method: dict[str, Any] = focal_method_sample['focal_method']
-        focal_method_line_start: int = focal_method['line_start']
-        focal_method_line_end: int = focal_method['line_end']
-        focal_method_body: str = focal_method['body']
-        focal_method_lines: list[str] = focal_method_body.split('\n')
-        focal_class: dict[str, Any] = focal_method['class']
-        focal_package: str = focal_class['package']
-        focal_class_identifier: str = focal_class['identifier']
-        focal_class_name = f'{focal_package}.{focal_class_identifier}'
-        test_methods: list[dict[str, Any]] = (
-            focal_method_sample['test_methods'])
-        with_coverage_test_methods = list()
-        for test_method in test_methods:
-            test_class: dict[str, Any] = test_method['class']
-            test_package: str = test_class['package']
-            test_class_identifier: str = test_class['identifier']
-            test_class_name = f'{test_package}.{test_class_identifier}'
-            test_method_name: str = test_method['identifier']
-            request_data = coverages.CreateCoverageRequestData(
-                classpathPathnames=classpath_pathnames,
-                focalClasspath=focal_classpath,
-                focalClassName=focal_class_name,
-                testClassName=test_class_name,
-                testMethodName=test_method_name,
-            )
-            try:
-                with utilities.WorkingDirectory(project_pathname):
-                    coverage = self._code_cov.create_coverage(request_data)
-            except Exception as exception:
-                logging.warn(f'{exception}')
-                logging.debug(f'{traceback.format_exc()}')
-                continue
-            covered_line_indices: list[int] = list()
-            covered_lines: list[str] = list()
-            for covered_line_number in coverage['coveredLineNumbers']:
-                covered_line_index = covered_line_number - 1
-                if (covered_line_index < focal_method_line_start
-                    or covered_line_index > focal_method_line_end):
-                    continue
-                i = covered_line_index - focal_method_line_start
-                covered_line_indices.append(covered_line_index)
-                covered_lines.append(focal_method_lines[i])
-            with_coverage_test_method = copy.deepcopy(test_method)
-            with_coverage_test_method['focal_covered_line_indices'] = (
-                covered_line_indices)
-            with_coverage_test_method['focal_covered_lines'] = covered_lines
-            with_coverage_test_methods.append(with_coverage_test_method)
+        with_coverage_data: dict[str, Any],
+    ) -> Generator[dict[str, Any], None, None]:
+        repository_index: int = with_coverage_data['repository_index']
         with_coverage_focal_method_sample = (
-            copy.deepcopy(focal_method_sample))
-        with_coverage_focal_method_sample['test_methods'] = (
-            with_coverage_test_methods)
-        return with_coverage_focal_method_sample
+            with_coverage_data['with_coverage_focal_method_sample'])
+        repository_url = with_coverage_data['repository_url']
+        repository_hexsha = with_coverage_data['repository_hexsha']
+        project_rel_pathname = with_coverage_data['project_rel_pathname']
+        logging.info(f'repository {repository_index}: generating samples')
+        for sample in self._generate_samples(repository_url, repository_hexsha,
+            project_rel_pathname, with_coverage_focal_method_sample):
+            yield sample
 
     def _generate_samples(
         self: Self,
@@ -410,34 +416,325 @@ class CoverageSamplesProcessor(Processor[dict[str, Any], dict[str, Any]]):
                 yield sample
 
 
+class _CoverageStages:
+    """The stages of finding the coverage data of repositories.
+
+    Each stage maps an item to a list of items for the next stage, logging and
+    skipping what fails. Only what the stages need is kept, so they can be
+    pickled and run in other processes, each of which then has its own limit on
+    coverage requests. Each thread has its own parser.
+    """
+    def __init__(
+        self: Self,
+        code_cov: coverages.CodeCov,
+        parser_type: type[code_parsers.CodeParser],
+        parser_args: tuple[str, str],
+        max_coverage_requests: int = 1,
+        clone_config: repositories.CloneConfig | None = None,
+        repository_cache: caches.RepositoryCache | None = None,
+    ) -> None:
+        self._code_cov = code_cov
+        # Lazy instantiation allows it to pickle the parser (then the iterator).
+        self._parser_type = parser_type
+        self._parser_args = parser_args
+        self._max_coverage_requests = max(max_coverage_requests, 1)
+        self._clone_config = dict() if clone_config is None else clone_config
+        self._repository_cache = repository_cache
+        self._create_unpicklables()
+
+    def __getstate__(self: Self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state['_local']
+        del state['_coverage_executor']
+        return state
+
+    def __setstate__(self: Self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._create_unpicklables()
+
+    def _create_unpicklables(self: Self) -> None:
+        self._local = threading.local()
+        # The coverage requests of all the threads share the in-flight limit.
+        self._coverage_executor = (
+            futures.ThreadPoolExecutor(self._max_coverage_requests))
+
+    @property
+    def parser(self: Self) -> code_parsers.CodeParser:
+        try:
+            return self._local.parser
+        except AttributeError:
+            self._local.parser = self._parser_type(*self._parser_args)
+            return self._local.parser
+
+    def clone(
+        self: Self,
+        repository_job: tuple[int, dict[str, Any], str],
+    ) -> list[dict[str, Any]]:
+        """Clones a repository into a directory, finding its projects."""
+        i, repository_sample, repository_dir_pathname = repository_job
+        repository_url = repository_sample['repository_url']
+        logging.info(f'repository {i} url: {repository_url}')
+        logging.info(f'repository {i} dir: {repository_dir_pathname}')
+        try:
+            repo = self._clone(repository_sample, repository_dir_pathname)
+            project = projects.create_project(
+                repository_dir_pathname, repository_dir_pathname)
+            subproject_pathnames = project.find_subproject_pathnames()
+        except Exception as exception:
+            logging.warn(f'repository {i}: {exception}')
+            logging.debug(f'{traceback.format_exc()}')
+            return list()
+        project_data_list = list()
+        for subproject_pathname in subproject_pathnames:
+            project_data = {
+                'repository_index': i,
+                'repository_url': repository_url,
+                'repository_hexsha': repo.head.commit.hexsha,
+                'root_pathname': repository_dir_pathname,
+                'project_pathname': subproject_pathname,
+            }
+            project_data_list.append(project_data)
+        return project_data_list
+
+    def _clone(
+        self: Self,
+        repository_sample: dict[str, Any],
+        repository_dir_pathname: str,
+    ) -> git.Repo:
+        hexsha: str | None = None
+        if self._clone_config.get('pin_hexsha', False):
+            hexsha = repository_sample.get('repository_hexsha')
+        if self._repository_cache is not None:
+            repo = self._repository_cache.check_out(
+                repository_sample['repository_url'], repository_dir_pathname,
+                hexsha=hexsha)
+            return repo
+        repo = repositories.clone(repository_sample['repository_url'],
+            repository_dir_pathname, depth=self._clone_config.get('depth'),
+            single_branch=self._clone_config.get('single_branch', False),
+            filter_spec=self._clone_config.get('filter'), hexsha=hexsha)
+        return repo
+
+    def compile(
+        self: Self,
+        project_data: dict[str, Any],
+    ) -> list[dict[str, Any]]:
+        """Compiles a project, finding its classpaths."""
+        repository_index: int = project_data['repository_index']
+        root_pathname: str = project_data['root_pathname']
+        project_pathname: str = project_data['project_pathname']
+        logging.info(f'project dir: {project_pathname}')
+        try:
+            project = projects.create_project(root_pathname, project_pathname)
+            logging.info(f'repository {repository_index}: compiling')
+            project.compile()
+            logging.info(f'repository {repository_index}: finding classpath')
+            classpath_pathnames = project.find_classpath_pathnames()
+            logging.info(
+                f'repository {repository_index}: finding focal classpath')
+            focal_classpath = project.find_focal_classpath()
+        except Exception as exception:
+            logging.warn(f'repository {repository_index}: {exception}')
+            logging.debug(f'{traceback.format_exc()}')
+            return list()
+        compiled_project_data = dict(project_data)
+        compiled_project_data['project_dir_pathname'] = (
+            project.project_dir_pathname)
+        compiled_project_data['classpath_pathnames'] = classpath_pathnames
+        compiled_project_data['focal_classpath'] = focal_classpath
+        return [compiled_project_data]
+
+    def parse(
+        self: Self,
+        compiled_project_data: dict[str, Any],
+    ) -> list[dict[str, Any]]:
+        """Finds the focal method samples of a compiled project."""
+        repository_index: int = compiled_project_data['repository_index']
+        root_pathname: str = compiled_project_data['root_pathname']
+        project_pathname: str = compiled_project_data['project_pathname']
+        project_rel_pathname = os.path.relpath(project_pathname, root_pathname)
+        try:
+            logging.info(
+                f'repository {repository_index}: '
+                + 'finding focal method samples')
+            focal_method_samples = (find_map_test_cases
+                .find_focal_method_samples(
+                    compiled_project_data['project_dir_pathname'],
+                    self.parser))
+        except Exception as exception:
+            logging.warn(f'repository {repository_index}: {exception}')
+            logging.debug(f'{traceback.format_exc()}')
+            return list()
+        focal_method_data_list = list()
+        for focal_method_sample in focal_method_samples:
+            focal_method_data = {
+                'repository_index': repository_index,
+                'repository_url': compiled_project_data['repository_url'],
+                'repository_hexsha': compiled_project_data['repository_hexsha'],
+                'project_pathname': project_pathname,
+                'project_rel_pathname': project_rel_pathname,
+                'classpath_pathnames':
+                    compiled_project_data['classpath_pathnames'],
+                'focal_classpath': compiled_project_data['focal_classpath'],
+                'focal_method_sample': focal_method_sample,
+            }
+            focal_method_data_list.append(focal_method_data)
+        return focal_method_data_list
+
+    def cover(
+        self: Self,
+        focal_method_data: dict[str, Any],
+    ) -> list[dict[str, Any]]:
+        """Adds the coverage data of the test methods of a focal method."""
+        return list(self.cover_all([focal_method_data]))
+
+    def cover_all(
+        self: Self,
+        focal_method_data_list: list[dict[str, Any]],
+    ) -> Generator[dict[str, Any], None, None]:
+        """Adds the coverage data of the test methods of focal methods.
+
+        The coverages of all the test methods are requested at once, up to
+        `max_coverage_requests` of them at a time.
+        """
+        coverage_futures_list = [self._request_coverages(focal_method_data)
+            for focal_method_data in focal_method_data_list]
+        try:
+            for focal_method_data, coverage_futures in zip(
+                focal_method_data_list, coverage_futures_list):
+                repository_index: int = focal_method_data['repository_index']
+                logging.info(
+                    f'repository {repository_index}: adding coverage data')
+                with_coverage_focal_method_sample = self._add_coverage_data(
+                    focal_method_data['focal_method_sample'], coverage_futures)
+                with_coverage_focal_method_data = {
+                    'repository_index': repository_index,
+                    'repository_url': focal_method_data['repository_url'],
+                    'repository_hexsha': focal_method_data['repository_hexsha'],
+                    'project_rel_pathname':
+                        focal_method_data['project_rel_pathname'],
+                    'with_coverage_focal_method_sample':
+                        with_coverage_focal_method_sample,
+                }
+                yield with_coverage_focal_method_data
+        finally:
+            for coverage_futures in coverage_futures_list:
+                for coverage_future in coverage_futures:
+                    coverage_future.cancel()
+
+    def _request_coverages(
+        self: Self,
+        focal_method_data: dict[str, Any],
+    ) -> list[futures.Future[coverages.Coverage]]:
+        focal_method_sample: dict[str, Any] = (
+            focal_method_data['focal_method_sample'])
+        focal_class: dict[str, Any] = (
+            focal_method_sample['focal_method']['class'])
+        focal_package: str = focal_class['package']
+        focal_class_identifier: str = focal_class['identifier']
+        focal_class_name = f'{focal_package}.{focal_class_identifier}'
+        test_methods: list[dict[str, Any]] = (
+            focal_method_sample['test_methods'])
+        coverage_futures = list()
+        for test_method in test_methods:
+            test_class: dict[str, Any] = test_method['class']
+            test_package: str = test_class['package']
+            test_class_identifier: str = test_class['identifier']
+            test_class_name = f'{test_package}.{test_class_identifier}'
+            test_method_name: str = test_method['identifier']
+            request_data = coverages.CreateCoverageRequestData(
+                classpathPathnames=focal_method_data['classpath_pathnames'],
+                focalClasspath=focal_method_data['focal_classpath'],
+                focalClassName=focal_class_name,
+                testClassName=test_class_name,
+                testMethodName=test_method_name,
+            )
+            coverage_future = self._coverage_executor.submit(
+                self._create_coverage, request_data,
+                focal_method_data['project_pathname'])
+            coverage_futures.append(coverage_future)
+        return coverage_futures
+
+    def _create_coverage(
+        self: Self,
+        request_data: coverages.CreateCoverageRequestData,
+        project_pathname: str,
+    ) -> coverages.Coverage:
+        coverage = self._code_cov.create_coverage(request_data,
+            working_dir_pathname=project_pathname)
+        return coverage
+
+    def _add_coverage_data(
+        self: Self,
+        focal_method_sample: dict[str, Any],
+        coverage_futures: list[futures.Future[coverages.Coverage]],
+    ) -> dict[str, Any]:
+        focal_method: dict[str, Any] = focal_method_sample['focal_method']
+        focal_method_line_start: int = focal_method['line_start']
+        focal_method_line_end: int = focal_method['line_end']
+        focal_method_body: str = focal_method['body']
+        focal_method_lines: list[str] = focal_method_body.split('\n')
+        test_methods: list[dict[str, Any]] = (
+            focal_method_sample['test_methods'])
+        with_coverage_test_methods = list()
+        for test_method, coverage_future in zip(test_methods, coverage_futures):
+            try:
+                coverage = coverage_future.result()
+            except Exception as exception:
+                logging.warn(f'{exception}')
+                logging.debug(f'{traceback.format_exc()}')
+                continue
+            covered_line_indices: list[int] = list()
+            covered_lines: list[str] = list()
+            for covered_line_number in coverage['coveredLineNumbers']:
+                covered_line_index = covered_line_number - 1
+                if (covered_line_index < focal_method_line_start
+                    or covered_line_index > focal_method_line_end):
+                    continue
+                i = covered_line_index - focal_method_line_start
+                covered_line_indices.append(covered_line_index)
+                covered_lines.append(focal_method_lines[i])
+            with_coverage_test_method = copy.deepcopy(test_method)
+            with_coverage_test_method['focal_covered_line_indices'] = (
+                covered_line_indices)
+            with_coverage_test_method['focal_covered_lines'] = covered_lines
+            with_coverage_test_methods.append(with_coverage_test_method)
+        with_coverage_focal_method_sample = (
+            copy.deepcopy(focal_method_sample))
+        with_coverage_focal_method_sample['test_methods'] = (
+            with_coverage_test_methods)
+        return with_coverage_focal_method_sample
+
+
 class UniqueCoverageSamplesProcessor(Processor[dict[str, Any], dict[str, Any]]):
     def __init__(
         self: Self,
         loader: loaders.Loader[dict[str, Any]],
         saver: savers.Saver[dict[str, Any]],
+        memory_budget: int | None = None,
+        spill_dir_pathname: str | None = None,
     ) -> None:
+        """Initializes the processor.
+
+        Samples are told apart by digests of their method bodies. Beyond
+        `memory_budget` bytes, the digests are spilled to a temporary index on
+        disk, in `spill_dir_pathname` if given.
+        """
         self._loader = loader
         self._saver = saver
-        self._unique_method_triplets = set()
+        self._memory_budget = memory_budget
+        self._spill_dir_pathname = spill_dir_pathname
 
     def process(self: Self) -> None:
         samples = self._loader.load()
         def create_generator():
-            for i, sample in enumerate(samples):
-                logging.info(f'sample {i}')
-                if not self._is_unique(sample):
-                    continue
-                yield sample
+            with indexes.SpillingDigestSet(memory_budget=self._memory_budget,
+                directory=self._spill_dir_pathname) as unique_digests:
+                for i, sample in enumerate(samples):
+                    logging.info(f'sample {i}')
+                    digest = indexes.digest_method_triplet(sample)
+                    if not unique_digests.add(digest):
+                        continue
+                    yield sample
         iterator = utilities.GeneratorFunctionIterator(create_generator)
         self._saver.save(iterator)
-
-    def _is_unique(self: Self, sample: dict[str, Any]) -> bool:
-        method_triplet = (
-            sample['focal_method']['body'],
-            sample['test_input_method']['body'],
-            sample['test_target_method']['body'],
-        )
-        if method_triplet in self._unique_method_triplets:
-            return False
-        self._unique_method_triplets.add(method_triplet)
-        return True
@@ -9,8 +9,6 @@ except ImportError:
     from typing_extensions import Self
 from xml.etree import ElementTree
 
-from dataset_creator import utilities
-
 
 class Project(abc.ABC):
     @abc.abstractmethod
@@ -60,9 +58,8 @@ class MavenProject(Project):
             subproject_pathnames.append(pathname)
             args = ['mvn', 'help:evaluate', '-Dexpression=project.modules',
                 '-q', '-DforceStdout']
-            with utilities.WorkingDirectory(pathname):
-                completed_process = (
-                    subprocess.run(args, capture_output=True, text=True))
+            completed_process = subprocess.run(
+                args, cwd=pathname, capture_output=True, text=True)
             if completed_process.returncode != 0:
                 logging.warn(f'could not find subprojects: {pathname}')
                 continue
@@ -80,16 +77,15 @@ class MavenProject(Project):
 
     def compile(self: Self) -> None:
         args = ['mvn', 'test-compile']
-        with utilities.WorkingDirectory(self._project_dir_pathname):
-            completed_process = subprocess.run(args, stdout=subprocess.DEVNULL)
+        completed_process = subprocess.run(
+            args, cwd=self._project_dir_pathname, stdout=subprocess.DEVNULL)
         completed_process.check_returncode()
 
     def find_classpath_pathnames(self: Self) -> list[str]:
         args = ['mvn', 'dependency:build-classpath',
             '-Dmdep.outputFile=/dev/stdout', '-q']
-        with utilities.WorkingDirectory(self._project_dir_pathname):
-            completed_process = (
-                subprocess.run(args, capture_output=True, text=True))
+        completed_process = subprocess.run(args,
+            cwd=self._project_dir_pathname, capture_output=True, text=True)
         completed_process.check_returncode()
         output = completed_process.stdout
         classpath_pathnames = output.split(os.pathsep)
@@ -102,9 +98,8 @@ class MavenProject(Project):
     def find_focal_classpath(self: Self) -> str:
         args = ['mvn', 'help:evaluate',
             '-Dexpression=project.build.outputDirectory', '-q', '-DforceStdout']
-        with utilities.WorkingDirectory(self._project_dir_pathname):
-            completed_process = (
-                subprocess.run(args, capture_output=True, text=True))
+        completed_process = subprocess.run(args,
+            cwd=self._project_dir_pathname, capture_output=True, text=True)
         completed_process.check_returncode()
         focal_classpath = completed_process.stdout + os.path.sep
         return focal_classpath
@@ -121,9 +116,8 @@ class MavenProject(Project):
         args = ['mvn', 'help:evaluate',
             '-Dexpression=project.build.testOutputDirectory', '-q',
             '-DforceStdout']
-        with utilities.WorkingDirectory(self._project_dir_pathname):
-            completed_process = (
-                subprocess.run(args, capture_output=True, text=True))
+        completed_process = subprocess.run(args,
+            cwd=self._project_dir_pathname, capture_output=True, text=True)
         completed_process.check_returncode()
         test_classpath = completed_process.stdout + os.path.sep
         return test_classpath
@@ -132,9 +126,8 @@ class MavenProject(Project):
         args = ['mvn', 'help:evaluate',
             '-Dexpression=project.build.resources[0].directory', '-q',
             '-DforceStdout']
-        with utilities.WorkingDirectory(self._project_dir_pathname):
-            completed_process = (
-                subprocess.run(args, capture_output=True, text=True))
+        completed_process = subprocess.run(args,
+            cwd=self._project_dir_pathname, capture_output=True, text=True)
         completed_process.check_returncode()
         focal_resources_classpath = completed_process.stdout + os.path.sep
         return focal_resources_classpath
@@ -143,9 +136,8 @@ class MavenProject(Project):
         args = ['mvn', 'help:evaluate',
             '-Dexpression=project.build.testResources[0].directory',
             '-q', '-DforceStdout']
-        with utilities.WorkingDirectory(self._project_dir_pathname):
-            completed_process = (
-                subprocess.run(args, capture_output=True, text=True))
+        completed_process = subprocess.run(args,
+            cwd=self._project_dir_pathname, capture_output=True, text=True)
         completed_process.check_returncode()
         test_resources_classpath = completed_process.stdout + os.path.sep
         return test_resources_classpath
@@ -182,9 +174,8 @@ class GradleProject(Project):
                 .relpath(_gradle_init_script_pathname, pathname))
             args = [self.gradle_command, '-q', '--init-script',
                 init_script_rel_pathname, f'{path}:listSubprojectPaths']
-            with utilities.WorkingDirectory(pathname):
-                completed_process = (
-                    subprocess.run(args, capture_output=True, text=True))
+            completed_process = subprocess.run(
+                args, cwd=pathname, capture_output=True, text=True)
             if completed_process.returncode != 0:
                 logging.warn(f'could not find subprojects: {pathname}')
                 continue
@@ -205,9 +196,8 @@ class GradleProject(Project):
     def compile(self: Self) -> None:
         project_name = self._find_project_name()
         args = [self.gradle_command, f'{project_name}:testClasses']
-        with utilities.WorkingDirectory(self._project_dir_pathname):
-            completed_process = subprocess.run(
-                args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        completed_process = subprocess.run(args, cwd=self._project_dir_pathname,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         completed_process.check_returncode()
 
     def find_classpath_pathnames(self: Self) -> list[str]:
@@ -215,9 +205,8 @@ class GradleProject(Project):
         args = [self.gradle_command, '-q', '--init-script',
             self._init_script_rel_pathname,
             f'{project_name}:buildTestRuntimeClasspath']
-        with utilities.WorkingDirectory(self._project_dir_pathname):
-            completed_process = (
-                subprocess.run(args, capture_output=True, text=True))
+        completed_process = subprocess.run(args,
+            cwd=self._project_dir_pathname, capture_output=True, text=True)
         completed_process.check_returncode()
         output = completed_process.stdout
         line = output.split(os.linesep)[0]
@@ -232,9 +221,8 @@ class GradleProject(Project):
         args = [self.gradle_command, '-q', '--init-script',
             self._init_script_rel_pathname,
             f'{project_name}:buildTestRuntimeClasspath']
-        with utilities.WorkingDirectory(self._project_dir_pathname):
-            completed_process = (
-                subprocess.run(args, capture_output=True, text=True))
+        completed_process = subprocess.run(args,
+            cwd=self._project_dir_pathname, capture_output=True, text=True)
         completed_process.check_returncode()
         output = completed_process.stdout
         line = output.split(os.linesep)[0]
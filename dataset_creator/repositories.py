@@ -0,0 +1,46 @@
+import logging
+from typing import Any
+from typing import TypedDict
+
+import git
+
+
+class CloneConfig(TypedDict, total=False):
+    depth: int
+    single_branch: bool
+    filter: str
+    pin_hexsha: bool
+
+
+def clone(
+    repository_url: str,
+    repository_dir_pathname: str,
+    depth: int | None = None,
+    single_branch: bool = False,
+    filter_spec: str | None = None,
+    hexsha: str | None = None,
+) -> git.Repo:
+    """Clones a repository, checking out the default branch or a commit.
+
+    The history can be cut to `depth` commits, other branches left out, and
+    objects left out with a partial clone filter such as 'blob:none', which
+    are then fetched when needed. If `hexsha` is given, only that commit is
+    fetched, which the remote has to allow.
+    """
+    options: dict[str, Any] = dict()
+    if depth is not None:
+        options['depth'] = depth
+    if filter_spec is not None:
+        options['filter'] = filter_spec
+    if hexsha is None:
+        if single_branch:
+            options['single_branch'] = True
+        repo = git.Repo.clone_from(
+            repository_url, repository_dir_pathname, **options)
+        return repo
+    logging.debug(f'fetching {hexsha}: {repository_url}')
+    repo = git.Repo.init(repository_dir_pathname)
+    repo.create_remote('origin', repository_url)
+    repo.git.fetch('origin', hexsha, **options)
+    repo.git.checkout(hexsha)
+    return repo
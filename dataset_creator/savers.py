@@ -1,7 +1,16 @@
 import abc
+from concurrent import futures
+import contextlib
+import hashlib
+import itertools
+import json
+import logging
 import os
 import pathlib
+import posixpath
 from typing import Any
+from typing import BinaryIO
+from typing import Generator
 from typing import Generic
 from typing import Iterator
 try:
@@ -9,9 +18,22 @@ try:
 except ImportError:
     from typing_extensions import Self
 from typing import TypeVar
+import uuid
 
 import datasets
+import fsspec
 import gcsfs
+import pyarrow
+import pyarrow.ipc
+import pyarrow.parquet
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from dataset_creator import indexes
+from dataset_creator import utilities
 
 
 _T = TypeVar('_T')
@@ -23,29 +45,311 @@ class Saver(abc.ABC, Generic[_T]):
         raise NotImplementedError()
 
 
+class WriteBehindSaver(Saver[_T]):
+    """A saver saving samples with another saver in the background.
+
+    The other saver runs on its own thread, taking samples from a queue of up
+    to `depth` samples, so generating samples only waits for it while the queue
+    is full. An exception raised while saving stops the generation and is
+    re-raised, and the queued samples are saved before returning.
+    """
+    def __init__(self: Self, saver: Saver[_T], depth: int = 1) -> None:
+        self._saver = saver
+        self._depth = depth
+
+    def save(self: Self, samples: Iterator[_T]) -> None:
+        utilities.write_behind(samples, self._saver.save, depth=self._depth)
+
+
+class DeduplicatingSaver(Saver[dict[str, Any]]):
+    """A saver dropping duplicate coverage samples before another saver.
+
+    Samples are told apart by a digest of their focal and test method bodies,
+    kept in a persistent index on disk, so that samples saved by earlier runs
+    or by other workers sharing the index are dropped as well. A digest is
+    claimed for `owner` as its sample is passed on to the other saver, and
+    the claims are committed once the other saver has acted on the next
+    `Checkpoint` or has returned. The claims left by a failed run are released
+    when the same owner saves again, so that its unsaved samples are saved.
+    """
+    def __init__(
+        self: Self,
+        saver: Saver[dict[str, Any]],
+        index_pathname: str,
+        owner: str,
+    ) -> None:
+        self._saver = saver
+        self._index_pathname = index_pathname
+        self._owner = owner
+
+    def save(self: Self, samples: Iterator[dict[str, Any]]) -> None:
+        index_pathname = self._index_pathname
+        owner = self._owner
+        with indexes.DigestIndex(index_pathname, owner=owner) as index:
+            released_count = index.release()
+        if released_count > 0:
+            logging.info(f'released {released_count} unsaved sample digests')
+        def generator():
+            # The index is opened here, as the saver may pickle the generator.
+            with indexes.DigestIndex(index_pathname, owner=owner) as index:
+                for sample in samples:
+                    if isinstance(sample, Checkpoint):
+                        yield sample
+                        index.commit()
+                        continue
+                    if not index.add(indexes.digest_method_triplet(sample)):
+                        logging.debug('dropping duplicate sample')
+                        continue
+                    yield sample
+        self._saver.save(utilities.GeneratorFunctionIterator(generator))
+        with indexes.DigestIndex(index_pathname, owner=owner) as index:
+            index.commit()
+
+
+class Checkpoint:
+    """A marker among the samples to save, placed after those of repositories.
+
+    It marks that the samples of the first `repository_count` repositories
+    have all been passed to the saver. Only a `LocalFileSaver` with a
+    checkpoint file acts on it, other savers must not be passed any.
+    """
+    def __init__(self: Self, repository_count: int) -> None:
+        self.repository_count = repository_count
+
+
+def read_checkpoint(checkpoint_pathname: str) -> dict[str, int] | None:
+    """Reads the checkpoint written by a `LocalFileSaver`, if there is one."""
+    if not os.path.isfile(checkpoint_pathname):
+        return None
+    with open(checkpoint_pathname) as checkpoint_file:
+        checkpoint: dict[str, int] = json.load(checkpoint_file)
+    return checkpoint
+
+
+_LINE_FORMATS = {'str', 'jsonl'}
+_ENCODERS = {'json', 'orjson'}
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
 class LocalFileSaver(Saver[Any]):
+    """A saver appending samples to a local file, one per line.
+
+    Samples are written as `str(sample)` by default, or as JSON with the
+    `jsonl` line format, so that the file can be loaded by `JsonlFileLoader`.
+    The optional `orjson` encoder is faster, but, unlike `json`, only encodes
+    string keys and encodes NaN as null.
+
+    Lines are gathered into a buffer of about `buffer_size` bytes before being
+    written. The file is also flushed every `flush_every` samples, if given,
+    and when done, and with `fsync`, each flush is synced to disk.
+
+    Gzip and zstd files are compressed as they are written, with the
+    compression inferred from the extension unless given, using up to
+    `compression_threads` threads.
+
+    If `shard_size` or `shard_bytes` is given, samples are instead written to
+    numbered shard files next to `file_pathname`, e.g. `samples-00000.jsonl`
+    for `samples.jsonl`, moving on to the next shard once one has that many
+    samples or (uncompressed) bytes. A manifest listing the shards and their
+    counts, e.g. `samples.manifest.json`, is updated as each shard is done, and
+    saving again adds new shards after the listed ones. The manifest can be
+    loaded with `JsonlManifestLoader`.
+
+    With a checkpoint file, on reaching a `Checkpoint` among the samples, the
+    file is closed and its size is recorded in the checkpoint file along with
+    the repository count. When saving again, the file is first truncated to
+    that size, dropping the samples of any repository left unfinished, so
+    that repositories after the recorded count can be processed exactly once.
+    """
     def __init__(
         self: Self,
         file_pathname: str,
         limit: int | None = None,
+        compression: str | None = 'infer',
+        compression_threads: int = 1,
+        line_format: str = 'str',
+        encoder: str = 'json',
+        buffer_size: int = 1 << 20,
+        flush_every: int | None = None,
+        fsync: bool = False,
+        shard_size: int | None = None,
+        shard_bytes: int | None = None,
+        checkpoint_pathname: str | None = None,
     ) -> None:
+        if line_format not in _LINE_FORMATS:
+            raise ValueError(f'unknown line format: {line_format}')
+        if encoder not in _ENCODERS:
+            raise ValueError(f'unknown encoder: {encoder}')
+        if encoder == 'orjson' and orjson is None:
+            raise ImportError('the orjson encoder requires the orjson package')
+        if (checkpoint_pathname is not None
+            and (shard_size is not None or shard_bytes is not None)):
+            raise ValueError('checkpoints cannot be used with shards')
         self._file_pathname = file_pathname
         self._limit = limit
+        self._compression = (
+            utilities.find_compression(file_pathname, compression=compression))
+        self._compression_threads = compression_threads
+        self._line_format = line_format
+        self._encoder = encoder
+        self._buffer_size = buffer_size
+        self._flush_every = flush_every
+        self._fsync = fsync
+        self._shard_size = shard_size
+        self._shard_bytes = shard_bytes
+        self._checkpoint_pathname = checkpoint_pathname
 
     def save(self: Self, samples: Iterator[Any]) -> None:
         file_parent_dir_path = pathlib.Path(self._file_pathname).parent
         file_parent_dir_path.mkdir(parents=True, exist_ok=True)
-        i = 0
-        with open(self._file_pathname, mode='a') as file:
-            for sample in samples:
-                sample_str = str(sample).strip()
-                line = f'{sample_str}\n'
-                file.write(line)
-                if self._limit is None:
-                    continue
-                i += 1
-                if i >= self._limit:
-                    break
+        samples = iter(samples)
+        if self._limit is not None:
+            samples = _limit_samples(samples, self._limit)
+        if self._checkpoint_pathname is not None:
+            self._save_checkpointed(samples)
+            return
+        if self._shard_size is None and self._shard_bytes is None:
+            self._write(self._file_pathname, samples)
+            return
+        directory, file_name = os.path.split(self._file_pathname)
+        stem, dot, extension = file_name.partition('.')
+        manifest_pathname = os.path.join(directory, f'{stem}.manifest.json')
+        manifest = dict(shards=list())
+        if os.path.isfile(manifest_pathname):
+            with open(manifest_pathname) as manifest_file:
+                manifest = json.load(manifest_file)
+        for sample in samples:
+            shard_name = f'{stem}-{len(manifest["shards"]):05d}{dot}{extension}'
+            shard_pathname = os.path.join(directory, shard_name)
+            # A shard missing from the manifest is left from a failed save.
+            if os.path.exists(shard_pathname):
+                logging.info(f'removing unlisted shard {shard_pathname}')
+                os.remove(shard_pathname)
+            num_samples, num_bytes, _ = (
+                self._write(shard_pathname, itertools.chain([sample], samples)))
+            manifest['shards'].append(dict(
+                pathname=shard_name, num_samples=num_samples,
+                num_bytes=num_bytes))
+            temp_pathname = f'{manifest_pathname}.tmp'
+            with open(temp_pathname, mode='w') as manifest_file:
+                json.dump(manifest, manifest_file, indent=2)
+            os.replace(temp_pathname, manifest_pathname)
+
+    def _save_checkpointed(self: Self, samples: Iterator[Any]) -> None:
+        checkpoint = read_checkpoint(self._checkpoint_pathname)
+        size = 0
+        if os.path.isfile(self._file_pathname):
+            size = os.path.getsize(self._file_pathname)
+        if checkpoint is None:
+            self._write_checkpoint(0, size)
+        elif size < checkpoint['offset']:
+            raise ValueError(
+                f'{self._file_pathname} is shorter than its checkpoint')
+        else:
+            logging.info(f'truncating {self._file_pathname} to checkpoint')
+            os.truncate(self._file_pathname, checkpoint['offset'])
+        for sample in samples:
+            _, _, checkpoint = self._write(
+                self._file_pathname, itertools.chain([sample], samples))
+            if checkpoint is None:
+                continue
+            size = os.path.getsize(self._file_pathname)
+            self._write_checkpoint(checkpoint.repository_count, size)
+
+    def _write_checkpoint(
+        self: Self,
+        repository_count: int,
+        offset: int,
+    ) -> None:
+        checkpoint = dict(repository_count=repository_count, offset=offset)
+        temp_pathname = f'{self._checkpoint_pathname}.tmp'
+        with open(temp_pathname, mode='w') as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file)
+            if self._fsync:
+                checkpoint_file.flush()
+                os.fsync(checkpoint_file.fileno())
+        os.replace(temp_pathname, self._checkpoint_pathname)
+
+    def _write(
+        self: Self,
+        pathname: str,
+        samples: Iterator[Any],
+    ) -> tuple[int, int, Checkpoint | None]:
+        """Writes samples until a shard is full or a checkpoint is reached."""
+        lines = list()
+        buffered_size = 0
+        num_samples = 0
+        num_bytes = 0
+        checkpoint = None
+        with utilities.open_writer(pathname,
+            compression=self._compression,
+            threads=self._compression_threads) as file:
+            try:
+                for sample in samples:
+                    if isinstance(sample, Checkpoint):
+                        if self._checkpoint_pathname is None:
+                            continue
+                        checkpoint = sample
+                        break
+                    line = self._encode(sample)
+                    lines.append(line)
+                    buffered_size += len(line)
+                    num_samples += 1
+                    num_bytes += len(line)
+                    flushing = (self._flush_every is not None
+                        and num_samples % self._flush_every == 0)
+                    if buffered_size >= self._buffer_size or flushing:
+                        file.write(b''.join(lines))
+                        lines.clear()
+                        buffered_size = 0
+                    if flushing:
+                        self._flush(file)
+                    if self._is_shard_full(num_samples, num_bytes):
+                        break
+            finally:
+                # Lines are written even if the samples raise an exception.
+                file.write(b''.join(lines))
+                self._flush(file)
+        return num_samples, num_bytes, checkpoint
+
+    def _is_shard_full(self: Self, num_samples: int, num_bytes: int) -> bool:
+        if self._shard_size is not None and num_samples >= self._shard_size:
+            return True
+        return self._shard_bytes is not None and num_bytes >= self._shard_bytes
+
+    def _encode(self: Self, sample: Any) -> bytes:
+        if self._line_format == 'str':
+            sample_str = str(sample).strip()
+            return f'{sample_str}\n'.encode()
+        return _encode_json_line(sample, self._encoder)
+
+    def _flush(self: Self, file: BinaryIO) -> None:
+        file.flush()
+        if self._fsync:
+            os.fsync(file.fileno())
+
+
+def _encode_json_line(sample: Any, encoder: str) -> bytes:
+    if encoder == 'orjson':
+        return orjson.dumps(sample, option=orjson.OPT_APPEND_NEWLINE)
+    return f'{_JSON_ENCODER.encode(sample)}\n'.encode()
+
+
+def _limit_samples(
+    samples: Iterator[Any],
+    limit: int,
+) -> Generator[Any, None, None]:
+    """Yields up to `limit` samples, along with the checkpoints among them."""
+    if limit < 1:
+        return
+    i = 0
+    for sample in samples:
+        yield sample
+        if isinstance(sample, Checkpoint):
+            continue
+        i += 1
+        if i >= limit:
+            break
 
 
 class HuggingFaceGoogleCloudStorageSaver(Saver[dict[str, str]]):
@@ -77,3 +381,495 @@ class HuggingFaceGoogleCloudStorageSaver(Saver[dict[str, str]]):
         dataset_path = os.path.join(f'gs://{self._bucket_name}', self._pathname)
         (dataset
             .save_to_disk(dataset_path, storage_options=self._storage_options))
+
+
+def _method_type(
+    *extra_fields: tuple[str, pyarrow.DataType],
+) -> pyarrow.DataType:
+    return pyarrow.struct([
+        ('identifier', pyarrow.string()),
+        ('line_start', pyarrow.int64()),
+        ('col_start', pyarrow.int64()),
+        ('line_end', pyarrow.int64()),
+        ('col_end', pyarrow.int64()),
+        ('body', pyarrow.string()),
+        *extra_fields,
+    ])
+
+
+_CLASS_TYPE = pyarrow.struct([
+    ('package', pyarrow.string()),
+    ('identifier', pyarrow.string()),
+])
+_TEST_METHOD_TYPE = _method_type(
+    ('covered_line_indices', pyarrow.list_(pyarrow.int64())),
+    ('covered_lines', pyarrow.list_(pyarrow.string())),
+)
+COVERAGE_SAMPLE_SCHEMA = pyarrow.schema([
+    ('repository', pyarrow.struct([
+        ('repository_url', pyarrow.string()),
+        ('repository_hexsha', pyarrow.string()),
+    ])),
+    ('project_path', pyarrow.string()),
+    ('focal_file', pyarrow.string()),
+    ('focal_class', _CLASS_TYPE),
+    ('focal_method', _method_type()),
+    ('focal_line_indices', pyarrow.list_(pyarrow.int64())),
+    ('focal_lines', pyarrow.list_(pyarrow.string())),
+    ('test_file', pyarrow.string()),
+    ('test_class', _CLASS_TYPE),
+    ('test_input_method', _TEST_METHOD_TYPE),
+    ('test_target_method', _TEST_METHOD_TYPE),
+])
+"""The schema of the samples generated by `CoverageSamplesProcessor`."""
+
+
+class ParquetSaver(Saver[dict[str, Any]]):
+    """A saver streaming samples into a Parquet file.
+
+    Samples are converted into record batches of `batch_size` rows, each
+    written as a row group as soon as it is full, so memory use does not depend
+    on the number of samples. The file can be at a local path or any fsspec URL.
+    If no schema is given, it is inferred from the first batch, and the later
+    batches are converted to it.
+    """
+    def __init__(
+        self: Self,
+        url: str,
+        storage_options: dict[str, Any] | None = None,
+        schema: pyarrow.Schema | None = None,
+        batch_size: int = 1000,
+        compression: str = 'snappy',
+        limit: int | None = None,
+    ) -> None:
+        self._url = url
+        self._storage_options = (
+            dict() if storage_options is None else storage_options)
+        self._schema = schema
+        self._batch_size = batch_size
+        self._compression = compression
+        self._limit = limit
+
+    def save(self: Self, samples: Iterator[dict[str, Any]]) -> None:
+        samples = iter(samples)
+        if self._limit is not None:
+            samples = itertools.islice(samples, self._limit)
+        batches = self._create_batches(samples)
+        first_batch = next(batches, None)
+        schema = self._schema if first_batch is None else first_batch.schema
+        if schema is None:
+            schema = pyarrow.schema([])
+        file_system, path = (
+            fsspec.core.url_to_fs(self._url, **self._storage_options))
+        file_system.makedirs(posixpath.dirname(path), exist_ok=True)
+        with (file_system.open(path, mode='wb') as file,
+            pyarrow.parquet.ParquetWriter(
+                file, schema, compression=self._compression) as writer):
+            if first_batch is not None:
+                writer.write_batch(first_batch)
+            for batch in batches:
+                writer.write_batch(batch)
+
+    def _create_batches(
+        self: Self,
+        samples: Iterator[dict[str, Any]],
+    ) -> Generator[pyarrow.RecordBatch, None, None]:
+        schema = self._schema
+        while True:
+            rows = list(itertools.islice(samples, self._batch_size))
+            if len(rows) < 1:
+                return
+            batch = pyarrow.RecordBatch.from_pylist(rows, schema=schema)
+            schema = batch.schema
+            yield batch
+
+
+class IncrementalDatasetSaver(Saver[dict[str, Any]]):
+    """A saver uploading a dataset shard by shard while samples are generated.
+
+    Every `shard_size` samples are sealed into an Arrow shard, which is
+    uploaded in the background by up to `max_uploads` threads. Generation only
+    waits once `max_uploads` shards are being uploaded, which also bounds the
+    memory used. The output is laid out like that of `Dataset.save_to_disk`, and
+    the state file listing the shards is updated as each shard is uploaded, so
+    even an interrupted save can be loaded with `datasets.load_from_disk`.
+
+    The output can be at a local path or any fsspec URL. If no schema is given,
+    it is inferred from the first shard.
+    """
+    def __init__(
+        self: Self,
+        url: str,
+        storage_options: dict[str, Any] | None = None,
+        schema: pyarrow.Schema | None = None,
+        shard_size: int = 10000,
+        max_uploads: int = 4,
+        limit: int | None = None,
+    ) -> None:
+        self._url = url
+        self._storage_options = (
+            dict() if storage_options is None else storage_options)
+        self._schema = schema
+        self._shard_size = shard_size
+        self._max_uploads = max_uploads
+        self._limit = limit
+
+    def save(self: Self, samples: Iterator[dict[str, Any]]) -> None:
+        samples = iter(samples)
+        if self._limit is not None:
+            samples = itertools.islice(samples, self._limit)
+        file_system, path = (
+            fsspec.core.url_to_fs(self._url, **self._storage_options))
+        file_system.makedirs(path, exist_ok=True)
+        fingerprint = uuid.uuid4().hex
+        schema = None
+        uploads: dict[futures.Future[None], int] = dict()
+        uploaded_indices = set()
+        failures: list[BaseException] = list()
+        num_committed = 0
+        def commit(done: set[futures.Future[None]]) -> None:
+            nonlocal num_committed
+            for upload in done:
+                shard_index = uploads.pop(upload)
+                exception = upload.exception()
+                if exception is not None:
+                    failures.append(exception)
+                    continue
+                uploaded_indices.add(shard_index)
+            num_uploaded = num_committed
+            while num_uploaded in uploaded_indices:
+                num_uploaded += 1
+            if num_uploaded > num_committed:
+                num_committed = num_uploaded
+                self._write_state(file_system, path, num_committed, fingerprint)
+        with futures.ThreadPoolExecutor(self._max_uploads) as executor:
+            try:
+                for shard_index, table in (
+                    enumerate(self._create_tables(samples))):
+                    if schema is None:
+                        schema = self._write_info(table.schema)
+                    shard_pathname = (
+                        posixpath.join(path, _shard_file_name(shard_index)))
+                    upload = executor.submit(_upload_table,
+                        file_system, shard_pathname, table.cast(schema))
+                    uploads[upload] = shard_index
+                    if len(uploads) >= self._max_uploads:
+                        done, _ = futures.wait(
+                            uploads, return_when=futures.FIRST_COMPLETED)
+                        commit(done)
+                        if len(failures) > 0:
+                            break
+                if schema is None:
+                    # Without samples, an empty shard still records the schema.
+                    table = (self._schema or pyarrow.schema([])).empty_table()
+                    schema = self._write_info(table.schema)
+                    shard_pathname = posixpath.join(path, _shard_file_name(0))
+                    uploads[executor.submit(_upload_table,
+                        file_system, shard_pathname, table.cast(schema))] = 0
+            finally:
+                # Shards already being uploaded are kept even on failure.
+                commit(futures.wait(uploads).done)
+        # An exception raised by the samples is raised instead of these.
+        if len(failures) > 0:
+            raise failures[0]
+
+    def _create_tables(
+        self: Self,
+        samples: Iterator[dict[str, Any]],
+    ) -> Generator[pyarrow.Table, None, None]:
+        while True:
+            rows = list(itertools.islice(samples, self._shard_size))
+            if len(rows) < 1:
+                return
+            yield pyarrow.Table.from_pylist(rows, schema=self._schema)
+
+    def _write_info(self: Self, schema: pyarrow.Schema) -> pyarrow.Schema:
+        """Writes the dataset info, returning the schema with its features."""
+        features = datasets.Features.from_arrow_schema(schema)
+        (datasets
+            .DatasetInfo(features=features)
+            .write_to_directory(
+                self._url, storage_options=self._storage_options))
+        return features.arrow_schema
+
+    def _write_state(
+        self: Self,
+        file_system: fsspec.AbstractFileSystem,
+        path: str,
+        num_shards: int,
+        fingerprint: str,
+    ) -> None:
+        state = dict(
+            _data_files=[dict(filename=_shard_file_name(i))
+                for i in range(num_shards)],
+            _fingerprint=fingerprint,
+            _format_columns=None,
+            _format_kwargs=dict(),
+            _format_type=None,
+            _output_all_columns=False,
+            _split=None,
+        )
+        state_pathname = posixpath.join(path, 'state.json')
+        with file_system.open(state_pathname, mode='w') as state_file:
+            json.dump(state, state_file, indent=2, sort_keys=True)
+
+
+def _shard_file_name(shard_index: int) -> str:
+    return f'data-{shard_index:05d}.arrow'
+
+
+def _upload_table(
+    file_system: fsspec.AbstractFileSystem,
+    pathname: str,
+    table: pyarrow.Table,
+) -> None:
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    file_system.pipe_file(pathname, sink.getvalue().to_pybytes())
+
+
+_SHARD_FORMATS = {'jsonl', 'parquet'}
+
+
+class FsspecSaver(Saver[dict[str, Any]]):
+    """A saver writing samples as shards to a directory at any fsspec URL.
+
+    Every `shard_size` samples are written as a JSON Lines or Parquet shard,
+    e.g. `part-00000.jsonl`, by up to `max_workers` threads at once, so that
+    several shards are written concurrently. Generation only waits once
+    `max_workers` shards are being written, which also bounds the memory used.
+    JSON Lines shards can be compressed with gzip or zstd. A manifest listing
+    the shards and their counts is written to `manifest.json` at the end.
+
+    Parquet shards use the schema given, or else the one inferred from the
+    first shard.
+    """
+    def __init__(
+        self: Self,
+        url: str,
+        storage_options: dict[str, Any] | None = None,
+        shard_format: str = 'jsonl',
+        shard_size: int = 10000,
+        max_workers: int = 4,
+        compression: str | None = None,
+        encoder: str = 'json',
+        schema: pyarrow.Schema | None = None,
+        limit: int | None = None,
+    ) -> None:
+        if shard_format not in _SHARD_FORMATS:
+            raise ValueError(f'unknown shard format: {shard_format}')
+        if encoder not in _ENCODERS:
+            raise ValueError(f'unknown encoder: {encoder}')
+        if encoder == 'orjson' and orjson is None:
+            raise ImportError('the orjson encoder requires the orjson package')
+        self._url = url
+        self._storage_options = (
+            dict() if storage_options is None else storage_options)
+        self._shard_format = shard_format
+        self._shard_size = shard_size
+        self._max_workers = max_workers
+        self._compression = (
+            utilities.find_compression(url, compression=compression))
+        self._encoder = encoder
+        self._schema = schema
+        self._limit = limit
+
+    def save(self: Self, samples: Iterator[dict[str, Any]]) -> None:
+        samples = iter(samples)
+        if self._limit is not None:
+            samples = itertools.islice(samples, self._limit)
+        file_system, path = (
+            fsspec.core.url_to_fs(self._url, **self._storage_options))
+        file_system.makedirs(path, exist_ok=True)
+        extension = self._shard_format
+        if self._shard_format == 'jsonl':
+            extension += utilities.compression_extension(self._compression)
+        schema = self._schema
+        shards: dict[futures.Future[dict[str, Any]], int] = dict()
+        manifest_shards = list()
+        with futures.ThreadPoolExecutor(self._max_workers) as executor:
+            shard_index = 0
+            while True:
+                rows = list(itertools.islice(samples, self._shard_size))
+                if len(rows) < 1:
+                    break
+                if self._shard_format == 'parquet' and schema is None:
+                    schema = pyarrow.Table.from_pylist(rows).schema
+                shard_name = f'part-{shard_index:05d}.{extension}'
+                shard = executor.submit(self._write_shard, file_system,
+                    posixpath.join(path, shard_name), rows, schema)
+                shards[shard] = shard_index
+                shard_index += 1
+                if len(shards) >= self._max_workers:
+                    done, _ = futures.wait(
+                        shards, return_when=futures.FIRST_COMPLETED)
+                    for shard in done:
+                        del shards[shard]
+                        manifest_shards.append(shard.result())
+            for shard in futures.as_completed(shards):
+                manifest_shards.append(shard.result())
+        manifest_shards.sort(key=lambda shard: shard['pathname'])
+        manifest_pathname = posixpath.join(path, 'manifest.json')
+        with file_system.open(manifest_pathname, mode='w') as manifest_file:
+            json.dump(dict(shards=manifest_shards), manifest_file, indent=2)
+
+    def _write_shard(
+        self: Self,
+        file_system: fsspec.AbstractFileSystem,
+        pathname: str,
+        rows: list[dict[str, Any]],
+        schema: pyarrow.Schema | None,
+    ) -> dict[str, Any]:
+        with file_system.open(pathname, mode='wb') as file:
+            if self._shard_format == 'parquet':
+                table = pyarrow.Table.from_pylist(rows, schema=schema)
+                pyarrow.parquet.write_table(table, file)
+                num_bytes = file.tell()
+            else:
+                data = b''.join(
+                    _encode_json_line(row, self._encoder) for row in rows)
+                num_bytes = len(data)
+                file.write(utilities.compress(data, self._compression))
+        shard = dict(pathname=posixpath.basename(pathname),
+            num_samples=len(rows), num_bytes=num_bytes)
+        return shard
+
+
+_ID_TYPE = pyarrow.string()
+NORMALIZED_COVERAGE_SCHEMAS = {
+    'repositories': pyarrow.schema([
+        ('id', _ID_TYPE),
+        ('repository_url', pyarrow.string()),
+        ('repository_hexsha', pyarrow.string()),
+    ]),
+    'focal_methods': pyarrow.schema([
+        ('id', _ID_TYPE),
+        ('repository_id', _ID_TYPE),
+        ('project_path', pyarrow.string()),
+        ('focal_file', pyarrow.string()),
+        ('focal_class', _CLASS_TYPE),
+        ('focal_method', _method_type()),
+    ]),
+    'test_methods': pyarrow.schema([
+        ('id', _ID_TYPE),
+        ('focal_method_id', _ID_TYPE),
+        ('test_method', _TEST_METHOD_TYPE),
+    ]),
+    'pairs': pyarrow.schema([
+        ('focal_method_id', _ID_TYPE),
+        ('test_file', pyarrow.string()),
+        ('test_class', _CLASS_TYPE),
+        ('test_input_method_id', _ID_TYPE),
+        ('test_target_method_id', _ID_TYPE),
+        ('focal_line_indices', pyarrow.list_(pyarrow.int64())),
+    ]),
+}
+"""The schemas of the tables of normalized coverage samples, by name."""
+_CANONICAL_JSON_ENCODER = json.JSONEncoder(
+    ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+
+class NormalizedCoverageSaver(Saver[dict[str, Any]]):
+    """A saver splitting coverage samples into normalized Parquet tables.
+
+    Repositories, focal methods and test methods are each written once to
+    their own table, keyed by a hash of their content, while each sample only
+    adds a row of IDs and focal line indices to the pairs table. The focal
+    lines are left out, as they can be found from the focal method body. The
+    tables are written to a directory at any fsspec URL, in row groups of up to
+    `batch_size` rows, and can be loaded back as samples with
+    `loaders.NormalizedCoverageLoader`.
+
+    The IDs written are kept in memory to skip rows already written.
+    """
+    def __init__(
+        self: Self,
+        url: str,
+        storage_options: dict[str, Any] | None = None,
+        batch_size: int = 1000,
+        limit: int | None = None,
+    ) -> None:
+        self._url = url
+        self._storage_options = (
+            dict() if storage_options is None else storage_options)
+        self._batch_size = batch_size
+        self._limit = limit
+
+    def save(self: Self, samples: Iterator[dict[str, Any]]) -> None:
+        samples = iter(samples)
+        if self._limit is not None:
+            samples = itertools.islice(samples, self._limit)
+        file_system, path = (
+            fsspec.core.url_to_fs(self._url, **self._storage_options))
+        file_system.makedirs(path, exist_ok=True)
+        written_ids = set()
+        rows = {name: list() for name in NORMALIZED_COVERAGE_SCHEMAS}
+        with contextlib.ExitStack() as exit_stack:
+            writers: dict[str, pyarrow.parquet.ParquetWriter] = dict()
+            for name, schema in NORMALIZED_COVERAGE_SCHEMAS.items():
+                table_pathname = posixpath.join(path, f'{name}.parquet')
+                file = exit_stack.enter_context(
+                    file_system.open(table_pathname, mode='wb'))
+                writers[name] = exit_stack.enter_context(
+                    pyarrow.parquet.ParquetWriter(file, schema))
+            def write_rows(name: str) -> None:
+                schema = NORMALIZED_COVERAGE_SCHEMAS[name]
+                batch = pyarrow.RecordBatch.from_pylist(rows[name], schema)
+                writers[name].write_batch(batch)
+                rows[name].clear()
+            for sample in samples:
+                for name, row in _normalize_coverage_sample(sample):
+                    if name != 'pairs':
+                        if row['id'] in written_ids:
+                            continue
+                        written_ids.add(row['id'])
+                    rows[name].append(row)
+                    if len(rows[name]) >= self._batch_size:
+                        write_rows(name)
+            for name in NORMALIZED_COVERAGE_SCHEMAS:
+                if len(rows[name]) > 0:
+                    write_rows(name)
+
+
+def _hash_row(row: dict[str, Any]) -> str:
+    row_json = _CANONICAL_JSON_ENCODER.encode(row)
+    return hashlib.blake2b(row_json.encode(), digest_size=16).hexdigest()
+
+
+def _normalize_coverage_sample(
+    sample: dict[str, Any],
+) -> list[tuple[str, dict[str, Any]]]:
+    repository: dict[str, str] = sample['repository']
+    repository_id = _hash_row(repository)
+    focal_method = dict(
+        repository_id=repository_id,
+        project_path=sample['project_path'],
+        focal_file=sample['focal_file'],
+        focal_class=sample['focal_class'],
+        focal_method=sample['focal_method'],
+    )
+    focal_method_id = _hash_row(focal_method)
+    # Covered lines are of the focal method, so they are only the same for it.
+    test_input_method = dict(focal_method_id=focal_method_id,
+        test_method=sample['test_input_method'])
+    test_input_method_id = _hash_row(test_input_method)
+    test_target_method = dict(focal_method_id=focal_method_id,
+        test_method=sample['test_target_method'])
+    test_target_method_id = _hash_row(test_target_method)
+    pair = dict(
+        focal_method_id=focal_method_id,
+        test_file=sample['test_file'],
+        test_class=sample['test_class'],
+        test_input_method_id=test_input_method_id,
+        test_target_method_id=test_target_method_id,
+        focal_line_indices=sample['focal_line_indices'],
+    )
+    rows = [
+        ('repositories', dict(id=repository_id, **repository)),
+        ('focal_methods', dict(id=focal_method_id, **focal_method)),
+        ('test_methods', dict(id=test_input_method_id, **test_input_method)),
+        ('test_methods', dict(id=test_target_method_id, **test_target_method)),
+        ('pairs', pair),
+    ]
+    return rows
@@ -1,15 +1,31 @@
+import collections
 from collections.abc import Callable
 from collections.abc import Generator
+from collections.abc import Iterable
 from collections.abc import Iterator
+from concurrent import futures
+import gzip
+import io
+import logging
 import os
+import queue
 import re
+import threading
+import traceback
 from types import TracebackType
+from typing import Any
+from typing import BinaryIO
 try:
     from typing import Self
 except ImportError:
     from typing_extensions import Self
 from typing import TypeVar
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 
 _T = TypeVar('_T')
 
@@ -40,14 +56,415 @@ class GeneratorFunctionIterator(Iterator[_T]):
         return next_
 
 
+class _PrefetchFailure:
+    def __init__(self: Self, exception: BaseException) -> None:
+        self.exception = exception
+
+
+_QUEUE_END = object()
+_QUEUE_POLL_INTERVAL = 0.1
+
+
+def prefetch(
+    iterable: Iterable[_T],
+    depth: int = 1,
+) -> Generator[_T, None, None]:
+    """Yields the items of an iterable, loading them in a background thread.
+
+    Up to `depth` items are loaded ahead of the consumer into a bounded queue.
+    An exception raised while loading is re-raised where its item would have
+    been yielded. Closing the generator stops the background thread.
+    """
+    items: queue.Queue = queue.Queue(maxsize=depth)
+    stop_event = threading.Event()
+    def put(item: Any) -> bool:
+        while not stop_event.is_set():
+            try:
+                items.put(item, timeout=_QUEUE_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+    def load() -> None:
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as exception:
+            put(_PrefetchFailure(exception))
+            return
+        put(_QUEUE_END)
+    thread = threading.Thread(target=load, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _QUEUE_END:
+                break
+            if isinstance(item, _PrefetchFailure):
+                raise item.exception
+            yield item
+    finally:
+        stop_event.set()
+
+
+def write_behind(
+    iterable: Iterable[_T],
+    consume: Callable[[Iterator[_T]], None],
+    depth: int = 1,
+) -> None:
+    """Iterates over an iterable, consuming its items in a background thread.
+
+    The items are passed to `consume` through a bounded queue of up to `depth`
+    items, so iterating waits while the queue is full. Iterating stops once
+    `consume` returns or raises an exception, which is then re-raised here.
+    Items already queued are drained before this returns, even if the iterable
+    raises an exception.
+    """
+    items: queue.Queue = queue.Queue(maxsize=depth)
+    done_event = threading.Event()
+    failures: list[BaseException] = list()
+    def put(item: Any) -> bool:
+        while not done_event.is_set():
+            try:
+                items.put(item, timeout=_QUEUE_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+    def get() -> Generator[_T, None, None]:
+        while True:
+            item = items.get()
+            if item is _QUEUE_END:
+                return
+            yield item
+    def run() -> None:
+        try:
+            consume(GeneratorFunctionIterator(get))
+        except BaseException as exception:
+            failures.append(exception)
+        finally:
+            done_event.set()
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        for item in iterable:
+            if not put(item):
+                break
+    finally:
+        put(_QUEUE_END)
+        thread.join()
+    if len(failures) > 0:
+        raise failures[0]
+
+
+def interleave(
+    iterators: list[Iterator[_T]],
+    weights: list[int],
+) -> Generator[_T, None, None]:
+    """Yields the items of iterators interleaved in proportion to weights.
+
+    This uses smooth weighted round-robin, so the order is deterministic and
+    items from each iterator are spread out evenly. An iterator is dropped once
+    it is exhausted.
+    """
+    iterators = list(iterators)
+    weights = [max(weight, 1) for weight in weights]
+    current_weights = [0] * len(weights)
+    while len(iterators) > 0:
+        total_weight = sum(weights)
+        for i, weight in enumerate(weights):
+            current_weights[i] += weight
+        i = max(range(len(iterators)), key=current_weights.__getitem__)
+        current_weights[i] -= total_weight
+        try:
+            item = next(iterators[i])
+        except StopIteration:
+            del iterators[i]
+            del weights[i]
+            del current_weights[i]
+            continue
+        yield item
+
+
+class Stage:
+    """A stage of a pipeline, mapping each item to a list of items.
+
+    The function is run by a pool of `workers` threads, or processes if
+    `executor` is 'process', in which case the function, the items and the
+    lists must be picklable.
+    """
+    def __init__(
+        self: Self,
+        function: Callable[[Any], list[Any]],
+        workers: int = 1,
+        executor: str = 'thread',
+    ) -> None:
+        if executor not in ['thread', 'process']:
+            raise ValueError(f'unknown executor: {executor}')
+        self.function = function
+        self.workers = max(workers, 1)
+        self.executor = executor
+
+    def create_executor(self: Self) -> futures.Executor:
+        if self.executor == 'process':
+            return futures.ProcessPoolExecutor(self.workers)
+        return futures.ThreadPoolExecutor(self.workers)
+
+
+class _StagedItem:
+    def __init__(self: Self, item: Any) -> None:
+        self.item = item
+        self.pending_count = 1
+        self.results: list[tuple[tuple[int, ...], Any]] = list()
+        self.failed = False
+
+
+def run_stages(
+    iterable: Iterable[_T],
+    stages: list[Stage],
+    depth: int = 1,
+    on_done: Callable[[_T], None] | None = None,
+) -> Generator[list[Any], None, None]:
+    """Yields, in order, what each item results in after a pipeline of stages.
+
+    Each item is passed through the stages, each of which runs concurrently
+    with the others in its own pool of workers. Up to `depth` items wait for
+    each stage, so a slow stage holds back the stages before it. The results of
+    each item are in the order they would have been in if run one at a time. An
+    exception raised for an item is logged, and the item then results in an
+    empty list without affecting the other items. `on_done` is called with each
+    item once it has passed through all the stages, which may be out of order.
+    """
+    iterator = iter(iterable)
+    is_exhausted = False
+    max_item_count = depth + sum(stage.workers for stage in stages)
+    staged_items: dict[int, _StagedItem] = dict()
+    next_index = 0
+    next_yielded_index = 0
+    waiting_items = [collections.deque() for _ in stages]
+    running_counts = [0] * len(stages)
+    running: dict[futures.Future, tuple[int, int, tuple[int, ...]]] = dict()
+    def finish(index: int) -> None:
+        staged_item = staged_items[index]
+        staged_item.pending_count -= 1
+        if staged_item.pending_count == 0 and on_done is not None:
+            on_done(staged_item.item)
+    executors = [stage.create_executor() for stage in stages]
+    try:
+        while True:
+            while (not is_exhausted and len(waiting_items[0]) < depth
+                and len(staged_items) < max_item_count):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    is_exhausted = True
+                    break
+                staged_items[next_index] = _StagedItem(item)
+                waiting_items[0].append((next_index, (), item))
+                next_index += 1
+            # The later stages go first, to make room for the earlier ones.
+            for k in reversed(range(len(stages))):
+                while (len(waiting_items[k]) > 0
+                    and running_counts[k] < stages[k].workers
+                    and (k + 1 == len(stages)
+                        or len(waiting_items[k + 1]) < depth)):
+                    index, position, item = waiting_items[k].popleft()
+                    if staged_items[index].failed:
+                        finish(index)
+                        continue
+                    future = executors[k].submit(stages[k].function, item)
+                    running[future] = (k, index, position)
+                    running_counts[k] += 1
+            while (next_yielded_index in staged_items
+                and staged_items[next_yielded_index].pending_count == 0):
+                staged_item = staged_items.pop(next_yielded_index)
+                next_yielded_index += 1
+                if staged_item.failed:
+                    yield list()
+                    continue
+                yield [result for _, result in sorted(staged_item.results,
+                    key=lambda position_result: position_result[0])]
+            if len(running) == 0:
+                if is_exhausted and len(staged_items) == 0:
+                    break
+                continue
+            done, _ = futures.wait(running, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                k, index, position = running.pop(future)
+                running_counts[k] -= 1
+                staged_item = staged_items[index]
+                try:
+                    results = future.result()
+                except Exception as exception:
+                    logging.warn(f'item {index}, stage {k}: {exception}')
+                    logging.debug(f'{traceback.format_exc()}')
+                    staged_item.failed = True
+                    finish(index)
+                    continue
+                # The positions order the results as if run one at a time.
+                positioned_results = [((*position, j), result)
+                    for j, result in enumerate(results)]
+                if staged_item.failed:
+                    pass
+                elif k + 1 == len(stages):
+                    staged_item.results.extend(positioned_results)
+                else:
+                    for position_result in positioned_results:
+                        waiting_items[k + 1].append((index, *position_result))
+                    staged_item.pending_count += len(results)
+                finish(index)
+    finally:
+        for executor in executors:
+            executor.shutdown(cancel_futures=True)
+
+
+_COMPRESSIONS = {'.gz': 'gzip', '.zst': 'zstd', '.zstd': 'zstd'}
+_GZIP_COMPRESS_LEVEL = 6
+_GZIP_BLOCK_SIZE = 1 << 20
+
+
+def find_compression(
+    pathname: str,
+    compression: str | None = 'infer',
+) -> str | None:
+    """Finds the compression of a file, inferring it from the extension."""
+    if compression == 'infer':
+        compression = _COMPRESSIONS.get(os.path.splitext(pathname)[1])
+    if compression not in {None, *_COMPRESSIONS.values()}:
+        raise ValueError(f'unknown compression: {compression}')
+    if compression == 'zstd' and zstandard is None:
+        raise ImportError('zstd compression requires the zstandard package')
+    return compression
+
+
+def compression_extension(compression: str | None) -> str:
+    """Finds the usual file extension of a compression."""
+    if compression is None:
+        return str()
+    return '.gz' if compression == 'gzip' else '.zst'
+
+
+def compress(data: bytes, compression: str | None) -> bytes:
+    """Compresses data in memory."""
+    if compression is None:
+        return data
+    if compression == 'gzip':
+        return gzip.compress(data, _GZIP_COMPRESS_LEVEL, mtime=0)
+    return zstandard.ZstdCompressor().compress(data)
+
+
+def open_reader(
+    pathname: str,
+    compression: str | None = None,
+    buffer_size: int = io.DEFAULT_BUFFER_SIZE,
+) -> BinaryIO:
+    """Opens a file for reading, decompressing it as it is read.
+
+    Files made up of several concatenated gzip members or zstd frames, such as
+    those appended to by `open_writer`, are read as a whole.
+    """
+    if compression is None:
+        return open(pathname, mode='rb', buffering=buffer_size)
+    if compression == 'gzip':
+        return io.BufferedReader(gzip.open(pathname, mode='rb'), buffer_size)
+    file = open(pathname, mode='rb')
+    reader = (zstandard
+        .ZstdDecompressor()
+        .stream_reader(file, read_across_frames=True))
+    return io.BufferedReader(reader, buffer_size)
+
+
+def open_writer(
+    pathname: str,
+    compression: str | None = None,
+    threads: int = 1,
+) -> BinaryIO:
+    """Opens a file for appending, compressing what is written to it.
+
+    With more than one thread, zstd compresses using its own worker threads,
+    while gzip compresses blocks in parallel as separate gzip members.
+    """
+    if compression is None:
+        return open(pathname, mode='ab')
+    if compression == 'gzip':
+        if threads > 1:
+            return _ParallelGzipWriter(open(pathname, mode='ab'), threads)
+        return gzip.open(
+            pathname, mode='ab', compresslevel=_GZIP_COMPRESS_LEVEL)
+    compressor = zstandard.ZstdCompressor(threads=threads if threads > 1 else 0)
+    return compressor.stream_writer(open(pathname, mode='ab'))
+
+
+class _ParallelGzipWriter(io.BufferedIOBase):
+    def __init__(self: Self, file: BinaryIO, threads: int) -> None:
+        self._file = file
+        self._threads = threads
+        self._executor = futures.ThreadPoolExecutor(threads)
+        self._blocks: list[futures.Future[bytes]] = list()
+        self._buffer = bytearray()
+
+    def writable(self: Self) -> bool:
+        return True
+
+    def fileno(self: Self) -> int:
+        return self._file.fileno()
+
+    def write(self: Self, data: bytes) -> int:
+        self._buffer += data
+        if len(self._buffer) >= _GZIP_BLOCK_SIZE:
+            self._compress_buffer()
+        # Bound the number of blocks held in memory while being compressed.
+        while len(self._blocks) > 2 * self._threads:
+            self._file.write(self._blocks.pop(0).result())
+        return len(data)
+
+    def flush(self: Self) -> None:
+        if self.closed:
+            return
+        if len(self._buffer) > 0:
+            self._compress_buffer()
+        while len(self._blocks) > 0:
+            self._file.write(self._blocks.pop(0).result())
+        self._file.flush()
+
+    def close(self: Self) -> None:
+        if self.closed:
+            return
+        try:
+            # This flushes the remaining blocks before marking it as closed.
+            super().close()
+        finally:
+            self._executor.shutdown()
+            self._file.close()
+
+    def _compress_buffer(self: Self) -> None:
+        block = bytes(self._buffer)
+        self._buffer.clear()
+        self._blocks.append(self._executor.submit(
+            gzip.compress, block, _GZIP_COMPRESS_LEVEL, mtime=0))
+
+
+# The working directory is shared by all the threads of the process.
+_WORKING_DIRECTORY_LOCK = threading.RLock()
+
+
 class WorkingDirectory:
-    """A context manager for executing code in a specified working directory."""
+    """A context manager for executing code in a specified working directory.
+
+    Only one thread at a time can be in a working directory this way.
+    """
     def __init__(self: Self, working_dir_pathname: str) -> None:
         self._working_dir_pathname = working_dir_pathname
 
     def __enter__(self: Self) -> None:
+        _WORKING_DIRECTORY_LOCK.acquire()
         self._original_working_dir_pathname = os.getcwd()
-        os.chdir(self._working_dir_pathname)
+        try:
+            os.chdir(self._working_dir_pathname)
+        except BaseException:
+            _WORKING_DIRECTORY_LOCK.release()
+            raise
 
     def __exit__(
         self: Self,
@@ -55,7 +472,10 @@ class WorkingDirectory:
         exception_value: BaseException,
         exception_traceback: TracebackType,
     ) -> bool:
-        os.chdir(self._original_working_dir_pathname)
+        try:
+            os.chdir(self._original_working_dir_pathname)
+        finally:
+            _WORKING_DIRECTORY_LOCK.release()
         return False
 
 
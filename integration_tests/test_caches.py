@@ -0,0 +1,109 @@
+import hashlib
+import os
+import pathlib
+import shutil
+import unittest
+from unittest import mock
+
+import git
+
+from dataset_creator import caches
+
+
+class RepositoryCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._test_directory = os.path.join('test_work_dir', 'repository_cache')
+        pathlib.Path(self._test_directory).mkdir(parents=True, exist_ok=True)
+        self._cache_directory = os.path.join(self._test_directory, 'cache')
+        self._actor = git.Actor('Author', 'author@example.com')
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self._test_directory)
+
+    def _create_remote(self, name: str) -> tuple[git.Repo, str]:
+        remote_dir_pathname = os.path.join(self._test_directory, name)
+        remote_repo = git.Repo.init(remote_dir_pathname, initial_branch='main')
+        self._commit(remote_repo, 'version 0\n')
+        remote_url = (
+            pathlib.Path(os.path.abspath(remote_dir_pathname)).as_uri())
+        return remote_repo, remote_url
+
+    def _commit(self, repo: git.Repo, content: str) -> str:
+        with open(os.path.join(repo.working_dir, 'file.txt'), 'w') as file:
+            file.write(content)
+        repo.index.add(['file.txt'])
+        commit = repo.index.commit(
+            content, author=self._actor, committer=self._actor)
+        return commit.hexsha
+
+    def _read_file(self, repo: git.Repo) -> str:
+        with open(os.path.join(repo.working_dir, 'file.txt')) as file:
+            return file.read()
+
+    def test_check_out__cached__does_not_touch_remote(self):
+        remote_repo, remote_url = self._create_remote('remote')
+        hexsha = remote_repo.head.commit.hexsha
+        cache = caches.RepositoryCache(self._cache_directory)
+        repo = cache.check_out(remote_url,
+            os.path.join(self._test_directory, 'worktree_0'))
+        self.assertEqual(hexsha, repo.head.commit.hexsha)
+        remote_repo.close()
+        shutil.rmtree(remote_repo.working_dir)
+        worktree_pathname = os.path.join(self._test_directory, 'worktree_1')
+        os.mkdir(worktree_pathname)
+        repo = cache.check_out(remote_url, worktree_pathname, hexsha=hexsha)
+        self.assertEqual(hexsha, repo.head.commit.hexsha)
+        self.assertEqual('version 0\n', self._read_file(repo))
+
+    def test_check_out__missing_commit__fetches(self):
+        remote_repo, remote_url = self._create_remote('remote')
+        cache = caches.RepositoryCache(self._cache_directory)
+        cache.check_out(remote_url,
+            os.path.join(self._test_directory, 'worktree_0'))
+        hexsha = self._commit(remote_repo, 'version 1\n')
+        repo = cache.check_out(remote_url,
+            os.path.join(self._test_directory, 'worktree_1'), hexsha=hexsha)
+        self.assertEqual(hexsha, repo.head.commit.hexsha)
+        self.assertEqual('version 1\n', self._read_file(repo))
+
+    def test_check_out__exceeds_max_size__evicts_unused_mirrors(self):
+        _, remote_url_0 = self._create_remote('remote_0')
+        _, remote_url_1 = self._create_remote('remote_1')
+        _, remote_url_2 = self._create_remote('remote_2')
+        cache = caches.RepositoryCache(self._cache_directory, max_size=1)
+        worktree_pathname_0 = os.path.join(self._test_directory, 'worktree_0')
+        cache.check_out(remote_url_0, worktree_pathname_0)
+        cache.check_out(remote_url_1,
+            os.path.join(self._test_directory, 'worktree_1'))
+        shutil.rmtree(worktree_pathname_0)
+        cache.check_out(remote_url_2,
+            os.path.join(self._test_directory, 'worktree_2'))
+        mirror_names = sorted(name for name in os.listdir(self._cache_directory)
+            if name.endswith('.git'))
+        expected_mirror_names = sorted(
+            hashlib.sha256(remote_url.encode()).hexdigest() + '.git'
+            for remote_url in [remote_url_1, remote_url_2])
+        self.assertEqual(expected_mirror_names, mirror_names)
+
+    def test_check_out__cached__evicts_by_recorded_sizes(self):
+        _, remote_url_0 = self._create_remote('remote_0')
+        _, remote_url_1 = self._create_remote('remote_1')
+        cache = caches.RepositoryCache(self._cache_directory, max_size=1 << 30)
+        cache.check_out(remote_url_0,
+            os.path.join(self._test_directory, 'worktree_0'))
+        cache.check_out(remote_url_1,
+            os.path.join(self._test_directory, 'worktree_1'))
+        with mock.patch('dataset_creator.caches._find_dir_size',
+            side_effect=AssertionError()):
+            cache.check_out(remote_url_0,
+                os.path.join(self._test_directory, 'worktree_2'))
+
+    def test_check_out__remote_missing__leaves_no_mirror(self):
+        cache = caches.RepositoryCache(self._cache_directory)
+        remote_url = pathlib.Path(
+            os.path.abspath(self._test_directory), 'missing').as_uri()
+        with self.assertRaises(git.GitCommandError):
+            cache.check_out(remote_url,
+                os.path.join(self._test_directory, 'worktree_0'))
+        self.assertEqual([], [name for name in os.listdir(self._cache_directory)
+            if not name.endswith('.lock')])
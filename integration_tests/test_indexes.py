@@ -0,0 +1,70 @@
+import os
+import pathlib
+import shutil
+import unittest
+
+from dataset_creator import indexes
+
+
+class DigestIndexTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._test_directory = os.path.join('test_work_dir', 'digest_index')
+        pathlib.Path(cls._test_directory).mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls._test_directory)
+
+    def test_add__reopened__remembers_digests(self):
+        pathname = os.path.join(
+            self.__class__._test_directory, 'dir', 'index.sqlite')
+        with indexes.DigestIndex(pathname) as index:
+            self.assertTrue(index.add(b'digest'))
+            self.assertFalse(index.add(b'digest'))
+        with indexes.DigestIndex(pathname) as index:
+            self.assertIn(b'digest', index)
+            self.assertNotIn(b'other', index)
+            self.assertFalse(index.add(b'digest'))
+            self.assertTrue(index.add(b'other'))
+
+    def test_add__shared_index__new_to_only_one(self):
+        pathname = os.path.join(self.__class__._test_directory, 'shared.sqlite')
+        with (indexes.DigestIndex(pathname) as index_0,
+            indexes.DigestIndex(pathname) as index_1):
+            self.assertTrue(index_0.add(b'digest'))
+            self.assertFalse(index_1.add(b'digest'))
+
+
+    def test_release__uncommitted_claims__releases_only_those(self):
+        pathname = os.path.join(self.__class__._test_directory, 'owned.sqlite')
+        with (indexes.DigestIndex(pathname, owner='a') as index_a,
+            indexes.DigestIndex(pathname, owner='b') as index_b):
+            self.assertTrue(index_a.add(b'committed'))
+            index_a.commit()
+            self.assertTrue(index_a.add(b'claimed'))
+            self.assertFalse(index_b.add(b'claimed'))
+            self.assertEqual(1, index_a.release())
+            self.assertIn(b'committed', index_b)
+            self.assertTrue(index_b.add(b'claimed'))
+
+class SpillingDigestSetTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._test_directory = os.path.join('test_work_dir', 'spilling_digests')
+        pathlib.Path(cls._test_directory).mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls._test_directory)
+
+    def test_add__over_memory_budget__remembers_spilled_digests(self):
+        digests = [bytes([i]) * 16 for i in range(10)]
+        with indexes.SpillingDigestSet(memory_budget=250,
+            directory=self.__class__._test_directory) as digest_set:
+            for digest in digests:
+                self.assertTrue(digest_set.add(digest))
+            self.assertEqual(1, len(os.listdir(self.__class__._test_directory)))
+            for digest in digests:
+                self.assertFalse(digest_set.add(digest))
+        self.assertEqual([], os.listdir(self.__class__._test_directory))
@@ -1,12 +1,206 @@
+import gzip
+import json
 import os
+import pathlib
+import shutil
 from typing import Generator
 from typing import Iterator
 import unittest
+from unittest import mock
 
+import datasets
+import fsspec
+import pyarrow
+import pyarrow.parquet
+
+from dataset_creator import caches
 from dataset_creator import loaders
+from dataset_creator import savers
+
+
+def _write_parquet_shards(
+    directory: str,
+    num_shards: int,
+    num_rows: int,
+) -> list[str]:
+    pathlib.Path(directory).mkdir(parents=True, exist_ok=True)
+    pathnames = list()
+    for i in range(num_shards):
+        table = pyarrow.table(
+            {'index': [i * num_rows + j for j in range(num_rows)]})
+        pathname = os.path.join(directory, f'shard-{i:05d}.parquet')
+        pyarrow.parquet.write_table(table, pathname)
+        pathnames.append(os.path.abspath(pathname))
+    return pathnames
+
+
+class HuggingFaceLoaderTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._test_directory = (
+            os.path.join('test_work_dir', 'hugging_face_loader'))
+        pathlib.Path(cls._test_directory).mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls._test_directory)
+
+    def test_load__skip_past_shards__loads_from_remaining_shards(self):
+        directory = os.path.join(self.__class__._test_directory, 'skip')
+        pathnames = _write_parquet_shards(directory, 3, 2)
+        config = {'path': 'parquet', 'data_files': pathnames, 'split': 'train'}
+        loader = loaders.HuggingFaceLoader(config, skip=3)
+        with mock.patch('datasets.load_dataset',
+            wraps=datasets.load_dataset) as mock_load_dataset:
+            iterator = loader.load()
+            actual_indices = [sample['index'] for sample in iterator]
+        self.assertEqual([3, 4, 5], actual_indices)
+        last_call = mock_load_dataset.call_args_list[-1]
+        self.assertEqual(
+            {'train': pathnames[1:]}, last_call.kwargs['data_files'])
+
+    def test_load__sharded_by_data_files__loads_disjoint_data_files(self):
+        directory = os.path.join(self.__class__._test_directory, 'shard')
+        pathnames = _write_parquet_shards(directory, 4, 2)
+        config = {'path': 'parquet', 'data_files': pathnames, 'split': 'train'}
+        loader_0 = loaders.HuggingFaceLoader(
+            config, skip=1, shard_index=0, shard_count=2)
+        loader_1 = loaders.HuggingFaceLoader(
+            config, shard_index=1, shard_count=2)
+        actual_indices_0 = [sample['index'] for sample in loader_0.load()]
+        actual_indices_1 = [sample['index'] for sample in loader_1.load()]
+        self.assertEqual([1, 2, 3], actual_indices_0)
+        self.assertEqual([4, 5, 6, 7], actual_indices_1)
+
+    def test_load__fewer_data_files_than_shards__splits_by_example(self):
+        directory = (
+            os.path.join(self.__class__._test_directory, 'shard_examples'))
+        pathnames = _write_parquet_shards(directory, 1, 4)
+        config = {'path': 'parquet', 'data_files': pathnames, 'split': 'train'}
+        actual_indices = list()
+        for shard_index in range(2):
+            loader = loaders.HuggingFaceLoader(
+                config, shard_index=shard_index, shard_count=2)
+            actual_indices.append(
+                [sample['index'] for sample in loader.load()])
+        self.assertEqual([[0, 2], [1, 3]], actual_indices)
+
+    def test_load__with_cache__loads_from_local_copies(self):
+        directory = os.path.join(self.__class__._test_directory, 'remote')
+        pathnames = _write_parquet_shards(directory, 2, 2)
+        file_system = fsspec.filesystem('memory')
+        urls = list()
+        for i, pathname in enumerate(pathnames):
+            file_system.put_file(pathname, f'/hugging_face_loader/{i}.parquet')
+            urls.append(f'memory://hugging_face_loader/{i}.parquet')
+        cache_directory = os.path.join(self.__class__._test_directory, 'cache')
+        cache = caches.ShardCache(cache_directory)
+        config = {'path': 'parquet', 'data_files': urls, 'split': 'train'}
+        loader = loaders.HuggingFaceLoader(config, skip=1, cache=cache)
+        with mock.patch('datasets.load_dataset',
+            wraps=datasets.load_dataset) as mock_load_dataset:
+            actual_indices = [sample['index'] for sample in loader.load()]
+        file_system.rm('/hugging_face_loader', recursive=True)
+        self.assertEqual([1, 2, 3], actual_indices)
+        last_call = mock_load_dataset.call_args_list[-1]
+        local_data_files = last_call.kwargs['data_files']['train']
+        self.assertEqual(2, len(local_data_files))
+        for local_data_file in local_data_files:
+            self.assertEqual(
+                os.path.abspath(cache_directory),
+                os.path.dirname(os.path.abspath(local_data_file)))
+
+    def test_load__skip_past_all_shards__loads_nothing(self):
+        directory = os.path.join(self.__class__._test_directory, 'skip_all')
+        pathnames = _write_parquet_shards(directory, 2, 2)
+        config = {'path': 'parquet', 'data_files': pathnames, 'split': 'train'}
+        loader = loaders.HuggingFaceLoader(config, skip=5)
+        iterator = loader.load()
+        with self.assertRaises(StopIteration):
+            next(iterator)
+
+
+class HuggingFaceMultiLoaderTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._test_directory = (
+            os.path.join('test_work_dir', 'hugging_face_multi_loader'))
+        pathlib.Path(cls._test_directory).mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls._test_directory)
+
+    def test_load__skip_past_configs__loads_from_remaining_shards(self):
+        directory_0 = os.path.join(self.__class__._test_directory, 'skip', '0')
+        directory_1 = os.path.join(self.__class__._test_directory, 'skip', '1')
+        pathnames_0 = _write_parquet_shards(directory_0, 2, 2)
+        pathnames_1 = _write_parquet_shards(directory_1, 2, 2)
+        configs = [
+            {'path': 'parquet', 'data_files': pathnames_0, 'split': 'train'},
+            {'path': 'parquet', 'data_files': pathnames_1, 'split': 'train'},
+        ]
+        loader = loaders.HuggingFaceMultiLoader(configs, skip=7)
+        iterator = loader.load()
+        self.assertEqual({'index': 3}, next(iterator))
+        with self.assertRaises(StopIteration):
+            next(iterator)
+
+
+class HuggingFaceDiskLoaderTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._test_directory = (
+            os.path.join('test_work_dir', 'hugging_face_disk_loader'))
+        pathlib.Path(cls._test_directory).mkdir(parents=True, exist_ok=True)
+        cls._pathnames = list()
+        for i in range(2):
+            dataset = datasets.Dataset.from_dict(
+                {'index': [4 * i + j for j in range(4)]})
+            pathname = os.path.join(cls._test_directory, str(i))
+            dataset.save_to_disk(pathname)
+            cls._pathnames.append(pathname)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls._test_directory)
+
+    def test_load__typical_case__loads_all_datasets(self):
+        loader = loaders.HuggingFaceDiskLoader(self.__class__._pathnames)
+        actual_indices = [sample['index'] for sample in loader.load()]
+        self.assertEqual(list(range(8)), actual_indices)
+
+    def test_load__sharded_with_skip_and_limit__loads_range(self):
+        loader = loaders.HuggingFaceDiskLoader(self.__class__._pathnames,
+            skip=1, limit=2, shard_index=1, shard_count=2)
+        actual_indices = [sample['index'] for sample in loader.load()]
+        self.assertEqual([5, 6], actual_indices)
+
+    def test_load_batches__typical_case__loads_arrow_batches(self):
+        loader = loaders.HuggingFaceDiskLoader(
+            self.__class__._pathnames, skip=3, batch_size=3)
+        actual_batches = list(loader.load_batches())
+        self.assertIsInstance(actual_batches[0], pyarrow.Table)
+        actual_indices = [batch['index'].to_pylist()
+            for batch in actual_batches]
+        self.assertEqual([[3, 4, 5], [6, 7]], actual_indices)
+
+    def test_load_sample__typical_case__loads_by_index(self):
+        loader = loaders.HuggingFaceDiskLoader(self.__class__._pathnames,
+            skip=2)
+        self.assertEqual({'index': 7}, loader.load_sample(5))
 
 
 class JsonlFileLoaderTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._test_directory = os.path.join('test_work_dir', 'jsonl_file_loader')
+        pathlib.Path(cls._test_directory).mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls._test_directory)
+
     def test_load__typical_case__loads_correctly(self):
         pathname = (
             os.path.join('integration_tests', 'resources', 'samples.jsonl'))
@@ -18,3 +212,156 @@ class JsonlFileLoaderTest(unittest.TestCase):
         self.assertEqual(dict(Hello='there', num=2), next(actual_iter))
         with self.assertRaises(StopIteration):
             next(actual_iter)
+
+    def test_load__skip_not_none__skips_before_loading(self):
+        pathname = (
+            os.path.join('integration_tests', 'resources', 'samples.jsonl'))
+        loader = loaders.JsonlFileLoader(pathname, skip=1)
+        actual_iter = loader.load()
+        self.assertEqual(dict(Hello='there', num=2), next(actual_iter))
+        with self.assertRaises(StopIteration):
+            next(actual_iter)
+
+    def test_load__limit_not_none__loads_up_to_limit(self):
+        pathname = (
+            os.path.join('integration_tests', 'resources', 'samples.jsonl'))
+        loader = loaders.JsonlFileLoader(pathname, limit=1)
+        actual_iter = loader.load()
+        self.assertEqual(dict(Hello='World!', num=4), next(actual_iter))
+        with self.assertRaises(StopIteration):
+            next(actual_iter)
+
+    def test_load__zero_limit__loads_nothing(self):
+        pathname = (
+            os.path.join('integration_tests', 'resources', 'samples.jsonl'))
+        loader = loaders.JsonlFileLoader(pathname, limit=0)
+        self.assertEqual([], list(loader.load()))
+
+    def test_load__offset_not_none__seeks_before_loading(self):
+        pathname = (
+            os.path.join('integration_tests', 'resources', 'samples.jsonl'))
+        with open(pathname, mode='rb') as file:
+            offset = len(file.readline())
+        loader = loaders.JsonlFileLoader(pathname, offset=offset)
+        actual_iter = loader.load()
+        self.assertEqual(dict(Hello='there', num=2), next(actual_iter))
+        with self.assertRaises(StopIteration):
+            next(actual_iter)
+
+    def test_load__sharded__loads_disjoint_lines(self):
+        pathname = os.path.join(self.__class__._test_directory, 'shard.jsonl')
+        with open(pathname, mode='w') as file:
+            for i in range(20):
+                file.write(f'{{"index": {i}, "padding": "{"x" * i}"}}\n')
+        actual_indices = list()
+        for shard_index in range(3):
+            loader = loaders.JsonlFileLoader(
+                pathname, shard_index=shard_index, shard_count=3)
+            indices = [sample['index'] for sample in loader.load()]
+            self.assertGreater(len(indices), 0)
+            actual_indices.extend(indices)
+        self.assertEqual(list(range(20)), actual_indices)
+
+    def test_load__gzip_file__decompresses_while_loading(self):
+        pathname = os.path.join(self.__class__._test_directory, 'a.jsonl.gz')
+        with gzip.open(pathname, mode='wt') as file:
+            file.write('{"Hello": "World!"}\n{"Hello": "there"}\n')
+        loader = loaders.JsonlFileLoader(pathname, skip=1)
+        actual_samples = list(loader.load())
+        self.assertEqual([dict(Hello='there')], actual_samples)
+
+    def test_load__compressed_offset__seeks_decompressed_bytes(self):
+        pathname = os.path.join(self.__class__._test_directory, 'offset.gz')
+        with gzip.open(pathname, mode='wt') as file:
+            file.write('{"index": 0}\n{"index": 1}\n')
+        loader = loaders.JsonlFileLoader(
+            pathname, offset=len('{"index": 0}\n'))
+        actual_samples = list(loader.load())
+        self.assertEqual([dict(index=1)], actual_samples)
+
+    def test_load__compressed_sharded__loads_disjoint_lines(self):
+        pathname = os.path.join(self.__class__._test_directory, 'shard.gz')
+        with gzip.open(pathname, mode='wt') as file:
+            for i in range(20):
+                file.write(f'{{"index": {i}}}\n')
+        actual_indices = list()
+        for shard_index in range(3):
+            loader = loaders.JsonlFileLoader(
+                pathname, shard_index=shard_index, shard_count=3)
+            actual_indices.extend(
+                sample['index'] for sample in loader.load())
+        self.assertEqual(list(range(20)), sorted(actual_indices))
+
+
+class JsonlManifestLoaderTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._test_directory = (
+            os.path.join('test_work_dir', 'jsonl_manifest_loader'))
+        pathlib.Path(cls._test_directory).mkdir(parents=True, exist_ok=True)
+        shards = list()
+        for i in range(3):
+            shard_name = f'samples-{i:05d}.jsonl'
+            pathname = os.path.join(cls._test_directory, shard_name)
+            with open(pathname, mode='w') as file:
+                for j in range(4):
+                    file.write(f'{{"index": {i * 4 + j}}}\n')
+            shards.append(dict(pathname=shard_name, num_samples=4))
+        cls._manifest_pathname = (
+            os.path.join(cls._test_directory, 'samples.manifest.json'))
+        with open(cls._manifest_pathname, mode='w') as manifest_file:
+            json.dump(dict(shards=shards), manifest_file)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls._test_directory)
+
+    def test_load__skip_and_limit__spans_shards(self):
+        loader = loaders.JsonlManifestLoader(
+            self.__class__._manifest_pathname, skip=5, limit=5)
+        actual_indices = [sample['index'] for sample in loader.load()]
+        self.assertEqual([5, 6, 7, 8, 9], actual_indices)
+
+    def test_load__zero_limit__loads_nothing(self):
+        loader = loaders.JsonlManifestLoader(
+            self.__class__._manifest_pathname, limit=0)
+        self.assertEqual([], list(loader.load()))
+
+    def test_load__sharded__splits_shard_files(self):
+        actual_indices = list()
+        for shard_index in range(2):
+            loader = loaders.JsonlManifestLoader(
+                self.__class__._manifest_pathname, shard_index=shard_index,
+                shard_count=2)
+            actual_indices.append(
+                [sample['index'] for sample in loader.load()])
+        expected_indices = [[0, 1, 2, 3, 8, 9, 10, 11], [4, 5, 6, 7]]
+        self.assertEqual(expected_indices, actual_indices)
+
+
+class NormalizedCoverageLoaderTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        samples_file_pathname = os.path.join('integration_tests', 'resources',
+            'expected_coverage_samples', 'maven', 'guess-the-number',
+            'typical_case.json')
+        with open(samples_file_pathname) as samples_file:
+            cls._samples = json.load(samples_file)
+        cls._url = 'memory://normalized_coverage_loader'
+        saver = savers.NormalizedCoverageSaver(cls._url, batch_size=4)
+        saver.save(iter(cls._samples))
+
+    def test_load__saved_samples__expands_to_same_samples(self):
+        loader = loaders.NormalizedCoverageLoader(
+            self.__class__._url, batch_size=5)
+        actual_samples = list(loader.load())
+        self.assertEqual(self.__class__._samples, actual_samples)
+        self.assertEqual(
+            [list(sample) for sample in self.__class__._samples],
+            [list(sample) for sample in actual_samples])
+
+    def test_load__skip_and_limit__expands_part(self):
+        loader = loaders.NormalizedCoverageLoader(
+            self.__class__._url, skip=3, limit=2)
+        actual_samples = list(loader.load())
+        self.assertEqual(self.__class__._samples[3:5], actual_samples)
@@ -88,3 +88,76 @@ class MainTest(unittest.TestCase):
         with open(save_file_pathname) as file:
             actual_lines = file.readlines()
             self.assertEqual(expected_lines, actual_lines)
+
+    def test_main__sharded__creates_dataset_per_shard(self):
+        config_file_pathname = (
+            os.path.join(self.__class__._test_directory, 'sharded.json'))
+        save_directory = os.path.join(self.__class__._test_directory, 'dir')
+        config = {
+            'loader': {'config': {}},
+            'saver': {
+                'file_pathname': os.path.join(save_directory, 'sharded.out'),
+            },
+        }
+        with open(config_file_pathname, mode='w') as config_file:
+            json.dump(config, config_file)
+        def generator():
+            yield {'ignore': 'me', 'max_stars_repo_name': 'user1/repo1'}
+            yield {'ignore': 'me', 'max_stars_repo_name': 'user1/repo2'}
+        dataset = datasets.Dataset.from_generator(generator)
+        parser = argument_parsers.create_parser()
+        for shard_index in range(2):
+            args = parser.parse_args(['--creator', 'stack_local',
+                '--config_path', config_file_pathname,
+                '--shard_index', str(shard_index), '--shard_count', '2'])
+            with mock.patch('datasets.load_dataset') as mock_load_dataset:
+                mock_load_dataset.return_value = dataset
+                main.main(args)
+        expected_lines = [
+            ["{'repository_name': 'user1/repo1', "
+                + "'repository_url': 'https://github.com/user1/repo1'}\n"],
+            ["{'repository_name': 'user1/repo2', "
+                + "'repository_url': 'https://github.com/user1/repo2'}\n"],
+        ]
+        actual_lines = list()
+        for shard_index in range(2):
+            save_file_pathname = os.path.join(
+                save_directory, f'sharded-shard-{shard_index:05d}.out')
+            with open(save_file_pathname) as file:
+                actual_lines.append(file.readlines())
+        self.assertEqual(expected_lines, actual_lines)
+
+    def test_main__url_with_checkpoint__raises(self):
+        config_file_pathname = (
+            os.path.join(self.__class__._test_directory, 'url.json'))
+        config = {
+            'loader': {'config': {}},
+            'saver': {
+                'url': 'memory://main/samples',
+                'checkpoint_pathname': os.path.join(
+                    self.__class__._test_directory, 'checkpoint.json'),
+            },
+        }
+        with open(config_file_pathname, mode='w') as config_file:
+            json.dump(config, config_file)
+        parser = argument_parsers.create_parser()
+        args = parser.parse_args(
+            ['--creator', 'stack_local', '--config_path', config_file_pathname])
+        with self.assertRaises(ValueError):
+            main.main(args)
+
+    def test_main__sharded_bucket_url__raises(self):
+        config_file_pathname = (
+            os.path.join(self.__class__._test_directory, 'bucket.json'))
+        config = {
+            'loader': {'config': {}},
+            'saver': {'url': 'memory://bucket'},
+        }
+        with open(config_file_pathname, mode='w') as config_file:
+            json.dump(config, config_file)
+        parser = argument_parsers.create_parser()
+        args = parser.parse_args(['--creator', 'stack_local',
+            '--config_path', config_file_pathname,
+            '--shard_index', '0', '--shard_count', '2'])
+        with self.assertRaises(ValueError):
+            main.main(args)
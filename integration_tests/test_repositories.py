@@ -0,0 +1,77 @@
+import os
+import pathlib
+import shutil
+import unittest
+
+import git
+
+from dataset_creator import repositories
+
+
+class CloneTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._test_directory = os.path.join('test_work_dir', 'repositories')
+        pathlib.Path(cls._test_directory).mkdir(parents=True, exist_ok=True)
+        remote_dir_pathname = os.path.join(cls._test_directory, 'remote')
+        remote_repo = git.Repo.init(remote_dir_pathname, initial_branch='main')
+        with remote_repo.config_writer() as config_writer:
+            config_writer.set_value('uploadpack', 'allowFilter', 'true')
+            config_writer.set_value('uploadpack', 'allowAnySHA1InWant', 'true')
+        actor = git.Actor('Author', 'author@example.com')
+        cls._hexshas = list()
+        for i in range(3):
+            file_pathname = os.path.join(remote_dir_pathname, 'file.txt')
+            with open(file_pathname, 'w') as file:
+                file.write(f'version {i}\n')
+            remote_repo.index.add(['file.txt'])
+            commit = remote_repo.index.commit(
+                f'commit {i}', author=actor, committer=actor)
+            cls._hexshas.append(commit.hexsha)
+        remote_repo.create_head('other', cls._hexshas[0])
+        # Depths and filters are ignored for local paths, but not file URLs.
+        cls._remote_url = (
+            pathlib.Path(os.path.abspath(remote_dir_pathname)).as_uri())
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls._test_directory)
+
+    def _read_file(self, repo: git.Repo) -> str:
+        with open(os.path.join(repo.working_dir, 'file.txt')) as file:
+            return file.read()
+
+    def test_clone__no_options__clones_full_history(self):
+        repo = repositories.clone(self.__class__._remote_url,
+            os.path.join(self.__class__._test_directory, 'full'))
+        self.assertEqual(self.__class__._hexshas[-1], repo.head.commit.hexsha)
+        self.assertEqual(3, len(list(repo.iter_commits())))
+        self.assertEqual(['origin/HEAD', 'origin/main', 'origin/other'],
+            sorted(ref.name for ref in repo.remotes.origin.refs))
+
+    def test_clone__shallow_single_branch__clones_head_only(self):
+        repo = repositories.clone(self.__class__._remote_url,
+            os.path.join(self.__class__._test_directory, 'shallow'), depth=1,
+            single_branch=True)
+        self.assertEqual(self.__class__._hexshas[-1], repo.head.commit.hexsha)
+        self.assertEqual(1, len(list(repo.iter_commits())))
+        self.assertNotIn('origin/other',
+            [ref.name for ref in repo.remotes.origin.refs])
+        self.assertEqual('version 2\n', self._read_file(repo))
+
+    def test_clone__blob_filter__fetches_blobs_when_needed(self):
+        repo = repositories.clone(self.__class__._remote_url,
+            os.path.join(self.__class__._test_directory, 'partial'),
+            filter_spec='blob:none')
+        self.assertEqual('true', repo.git.config('remote.origin.promisor'))
+        self.assertEqual('version 2\n', self._read_file(repo))
+        repo.git.checkout(self.__class__._hexshas[0])
+        self.assertEqual('version 0\n', self._read_file(repo))
+
+    def test_clone__hexsha__checks_out_commit(self):
+        repo = repositories.clone(self.__class__._remote_url,
+            os.path.join(self.__class__._test_directory, 'pinned'), depth=1,
+            hexsha=self.__class__._hexshas[1])
+        self.assertEqual(self.__class__._hexshas[1], repo.head.commit.hexsha)
+        self.assertEqual(1, len(list(repo.iter_commits())))
+        self.assertEqual('version 1\n', self._read_file(repo))
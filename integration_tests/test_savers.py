@@ -1,9 +1,28 @@
+import gzip
+import json
 import os
 import pathlib
 import shutil
 import unittest
+from unittest import mock
 
+import datasets
+import fsspec
+import pyarrow
+import pyarrow.parquet
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from dataset_creator import loaders
 from dataset_creator import savers
+from dataset_creator import utilities
 
 
 class LocalFileSaverTest(unittest.TestCase):
@@ -67,3 +86,474 @@ class LocalFileSaverTest(unittest.TestCase):
         with open(file_pathname) as file:
             actual_lines = file.readlines()
             self.assertEqual(expected_lines, actual_lines)
+
+    def test_save__samples_raise__writes_buffered_lines(self):
+        directory = os.path.join(self.__class__._test_directory, 'save')
+        pathlib.Path(directory).mkdir(parents=True, exist_ok=True)
+        file_pathname = os.path.join(directory, 'raising.txt')
+        def generator():
+            yield 'Hello'
+            yield 'World!'
+            yield 'Bye'
+            raise RuntimeError()
+        saver = savers.LocalFileSaver(file_pathname)
+        with self.assertRaises(RuntimeError):
+            saver.save(generator())
+        expected_lines = ['Hello\n', 'World!\n', 'Bye\n']
+        with open(file_pathname) as file:
+            actual_lines = file.readlines()
+            self.assertEqual(expected_lines, actual_lines)
+
+    def test_save__gzip_file_with_threads__compresses_appended_lines(self):
+        directory = os.path.join(self.__class__._test_directory, 'save')
+        pathlib.Path(directory).mkdir(parents=True, exist_ok=True)
+        file_pathname = os.path.join(directory, 'compressed.txt.gz')
+        saver = savers.LocalFileSaver(file_pathname)
+        saver.save(['Hello'])
+        saver = savers.LocalFileSaver(file_pathname, compression_threads=2)
+        saver.save(['World!', 'Bye'])
+        expected_lines = ['Hello\n', 'World!\n', 'Bye\n']
+        with gzip.open(file_pathname, mode='rt') as file:
+            actual_lines = file.readlines()
+            self.assertEqual(expected_lines, actual_lines)
+
+    @unittest.skipIf(zstandard is None, 'zstandard is not installed')
+    def test_save__zstd_compression__round_trips_through_reader(self):
+        directory = os.path.join(self.__class__._test_directory, 'save')
+        pathlib.Path(directory).mkdir(parents=True, exist_ok=True)
+        file_pathname = os.path.join(directory, 'compressed.txt')
+        for samples in [['Hello'], ['World!']]:
+            saver = savers.LocalFileSaver(file_pathname, compression='zstd',
+                compression_threads=2)
+            saver.save(samples)
+        with utilities.open_reader(
+            file_pathname, compression='zstd') as file:
+            actual_lines = file.readlines()
+        self.assertEqual([b'Hello\n', b'World!\n'], actual_lines)
+
+    def test_save__jsonl_line_format__round_trips_through_loader(self):
+        directory = os.path.join(self.__class__._test_directory, 'save')
+        pathlib.Path(directory).mkdir(parents=True, exist_ok=True)
+        file_pathname = os.path.join(directory, 'round_trip.jsonl')
+        samples = [
+            {'focal_method': 'void f() {\n}', 'lines': [1, 2], 'name': 'é'},
+            {'focal_method': None, 'score': 0.5, 'nested': {'a': True}},
+        ]
+        saver = savers.LocalFileSaver(
+            file_pathname, line_format='jsonl', buffer_size=1)
+        saver.save(iter(samples))
+        loader = loaders.JsonlFileLoader(file_pathname)
+        self.assertEqual(samples, list(loader.load()))
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def test_save__orjson_encoder__round_trips_through_loader(self):
+        directory = os.path.join(self.__class__._test_directory, 'save')
+        pathlib.Path(directory).mkdir(parents=True, exist_ok=True)
+        file_pathname = os.path.join(directory, 'orjson.jsonl.gz')
+        samples = [{'focal_method': 'void f() {\n}', 'name': 'é'}] * 3
+        saver = savers.LocalFileSaver(file_pathname, limit=2,
+            line_format='jsonl', encoder='orjson', flush_every=1, fsync=True)
+        saver.save(iter(samples))
+        loader = loaders.JsonlFileLoader(file_pathname)
+        self.assertEqual(samples[:2], list(loader.load()))
+
+    def test_save__shard_size__rolls_over_and_writes_manifest(self):
+        directory = os.path.join(self.__class__._test_directory, 'shards')
+        file_pathname = os.path.join(directory, 'samples.jsonl')
+        samples = [{'index': i} for i in range(5)]
+        saver = savers.LocalFileSaver(
+            file_pathname, line_format='jsonl', shard_size=2)
+        saver.save(iter(samples[:3]))
+        saver.save(iter(samples[3:]))
+        manifest_pathname = os.path.join(directory, 'samples.manifest.json')
+        with open(manifest_pathname) as manifest_file:
+            manifest = json.load(manifest_file)
+        expected_shards = [
+            ('samples-00000.jsonl', 2),
+            ('samples-00001.jsonl', 1),
+            ('samples-00002.jsonl', 2),
+        ]
+        actual_shards = [(shard['pathname'], shard['num_samples'])
+            for shard in manifest['shards']]
+        self.assertEqual(expected_shards, actual_shards)
+        self.assertFalse(os.path.exists(file_pathname))
+        loader = loaders.JsonlManifestLoader(manifest_pathname)
+        self.assertEqual(samples, list(loader.load()))
+
+    def test_save__failed_then_saved_again__replaces_unlisted_shard(self):
+        directory = os.path.join(self.__class__._test_directory, 'failed')
+        file_pathname = os.path.join(directory, 'samples.jsonl')
+        def generator():
+            yield {'index': 0}
+            yield {'index': 1}
+            yield {'index': 100}
+            raise RuntimeError()
+        saver = savers.LocalFileSaver(
+            file_pathname, line_format='jsonl', shard_size=2)
+        with self.assertRaises(RuntimeError):
+            saver.save(generator())
+        saver.save(iter([{'index': 2}, {'index': 3}]))
+        manifest_pathname = os.path.join(directory, 'samples.manifest.json')
+        loader = loaders.JsonlManifestLoader(manifest_pathname)
+        self.assertEqual([{'index': i} for i in range(4)], list(loader.load()))
+        loader = loaders.JsonlManifestLoader(manifest_pathname, skip=3)
+        self.assertEqual([{'index': 3}], list(loader.load()))
+
+    def test_save__shard_bytes__rolls_over_at_bytes(self):
+        directory = os.path.join(self.__class__._test_directory, 'bytes')
+        file_pathname = os.path.join(directory, 'samples.jsonl.gz')
+        saver = savers.LocalFileSaver(file_pathname, line_format='jsonl',
+            shard_bytes=len('{"index":0}\n') * 3)
+        saver.save(iter([{'index': i} for i in range(7)]))
+        actual_names = sorted(os.listdir(directory))
+        expected_names = [
+            'samples-00000.jsonl.gz',
+            'samples-00001.jsonl.gz',
+            'samples-00002.jsonl.gz',
+            'samples.manifest.json',
+        ]
+        self.assertEqual(expected_names, actual_names)
+
+
+class CheckpointedLocalFileSaverTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._test_directory = (
+            os.path.join('test_work_dir', 'checkpointed_local_file_saver'))
+        pathlib.Path(cls._test_directory).mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls._test_directory)
+
+    def _test_save__interrupted_then_resumed__saves_exactly_once(
+        self, file_name):
+        file_pathname = os.path.join(self.__class__._test_directory, file_name)
+        checkpoint_pathname = f'{file_pathname}.checkpoint.json'
+        def generate_interrupted_samples():
+            yield {'index': 0}
+            yield {'index': 1}
+            yield savers.Checkpoint(1)
+            yield {'index': 2}
+            raise RuntimeError()
+        saver = savers.LocalFileSaver(file_pathname, line_format='jsonl',
+            buffer_size=1, checkpoint_pathname=checkpoint_pathname)
+        with self.assertRaises(RuntimeError):
+            saver.save(generate_interrupted_samples())
+        checkpoint = savers.read_checkpoint(checkpoint_pathname)
+        self.assertEqual(1, checkpoint['repository_count'])
+        self.assertLess(checkpoint['offset'], os.path.getsize(file_pathname))
+        resumed_samples = [
+            {'index': 2},
+            {'index': 3},
+            savers.Checkpoint(2),
+        ]
+        saver.save(iter(resumed_samples))
+        self.assertEqual(
+            2, savers.read_checkpoint(checkpoint_pathname)['repository_count'])
+        loader = loaders.JsonlFileLoader(file_pathname)
+        actual_indices = [sample['index'] for sample in loader.load()]
+        self.assertEqual([0, 1, 2, 3], actual_indices)
+
+    def test_save__interrupted_then_resumed__saves_exactly_once(self):
+        self._test_save__interrupted_then_resumed__saves_exactly_once(
+            'samples.jsonl')
+
+    def test_save__compressed_interrupted_then_resumed__saves_exactly_once(
+        self):
+        self._test_save__interrupted_then_resumed__saves_exactly_once(
+            'samples.jsonl.gz')
+
+    def test___init____checkpoint_with_shards__raises(self):
+        with self.assertRaises(ValueError):
+            savers.LocalFileSaver('samples.jsonl', shard_size=1,
+                checkpoint_pathname='checkpoint.json')
+
+
+class ParquetSaverTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._test_directory = os.path.join('test_work_dir', 'parquet_saver')
+        pathlib.Path(cls._test_directory).mkdir(parents=True, exist_ok=True)
+        samples_file_pathname = os.path.join('integration_tests', 'resources',
+            'expected_coverage_samples', 'maven', 'guess-the-number',
+            'typical_case.json')
+        with open(samples_file_pathname) as samples_file:
+            cls._samples = json.load(samples_file)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls._test_directory)
+
+    def test_save__coverage_samples__writes_row_group_per_batch(self):
+        pathname = os.path.join(
+            self.__class__._test_directory, 'dir', 'samples.parquet')
+        samples = self.__class__._samples
+        saver = savers.ParquetSaver(pathname,
+            schema=savers.COVERAGE_SAMPLE_SCHEMA, batch_size=2)
+        saver.save(iter(samples))
+        parquet_file = pyarrow.parquet.ParquetFile(pathname)
+        self.assertEqual((len(samples) + 1) // 2, parquet_file.num_row_groups)
+        self.assertEqual(
+            savers.COVERAGE_SAMPLE_SCHEMA, parquet_file.schema_arrow)
+        self.assertEqual(samples, parquet_file.read().to_pylist())
+
+    def test_save__fsspec_url_with_limit__writes_up_to_limit(self):
+        url = 'memory://parquet_saver/samples.parquet'
+        saver = savers.ParquetSaver(url, limit=2)
+        saver.save(iter([{'index': i} for i in range(5)]))
+        with fsspec.open(url, mode='rb') as file:
+            table = pyarrow.parquet.read_table(file)
+        self.assertEqual([{'index': 0}, {'index': 1}], table.to_pylist())
+
+    def test_save__later_batch_with_other_types__converts_to_first(self):
+        url = 'memory://parquet_saver/converted.parquet'
+        saver = savers.ParquetSaver(url, batch_size=1)
+        samples = [{'index': 0, 'score': 0.5}, {'index': None, 'score': 1}]
+        saver.save(iter(samples))
+        with fsspec.open(url, mode='rb') as file:
+            table = pyarrow.parquet.read_table(file)
+        expected_schema = pyarrow.schema(
+            [('index', pyarrow.int64()), ('score', pyarrow.float64())])
+        self.assertEqual(expected_schema, table.schema)
+        self.assertEqual(
+            [{'index': 0, 'score': 0.5}, {'index': None, 'score': 1.0}],
+            table.to_pylist())
+
+    def test_save__no_samples__writes_empty_file_with_schema(self):
+        pathname = os.path.join(self.__class__._test_directory, 'empty.parquet')
+        saver = savers.ParquetSaver(
+            pathname, schema=savers.COVERAGE_SAMPLE_SCHEMA)
+        saver.save(iter([]))
+        table = pyarrow.parquet.read_table(pathname)
+        self.assertEqual(0, table.num_rows)
+        self.assertEqual(savers.COVERAGE_SAMPLE_SCHEMA, table.schema)
+
+
+class IncrementalDatasetSaverTest(unittest.TestCase):
+    def test_save__coverage_samples__loads_from_disk(self):
+        samples_file_pathname = os.path.join('integration_tests', 'resources',
+            'expected_coverage_samples', 'maven', 'guess-the-number',
+            'typical_case.json')
+        with open(samples_file_pathname) as samples_file:
+            samples = json.load(samples_file)
+        url = 'memory://incremental_dataset_saver/coverage'
+        saver = savers.IncrementalDatasetSaver(url,
+            schema=savers.COVERAGE_SAMPLE_SCHEMA, shard_size=4, max_uploads=2)
+        saver.save(iter(samples))
+        file_system = fsspec.filesystem('memory')
+        shard_pathnames = file_system.glob(
+            'incremental_dataset_saver/coverage/data-*.arrow')
+        self.assertEqual((len(samples) + 3) // 4, len(shard_pathnames))
+        dataset = datasets.load_from_disk(url)
+        self.assertEqual(samples, dataset.to_list())
+
+    def test_save__interrupted__keeps_uploaded_shards(self):
+        def generate_samples():
+            for i in range(5):
+                yield {'index': i}
+            raise RuntimeError()
+        url = 'memory://incremental_dataset_saver/interrupted'
+        saver = savers.IncrementalDatasetSaver(url, shard_size=2)
+        with self.assertRaises(RuntimeError):
+            saver.save(generate_samples())
+        dataset = datasets.load_from_disk(url)
+        self.assertEqual([0, 1, 2, 3], dataset['index'])
+
+    def test_save__interrupted_with_failed_upload__raises_interruption(self):
+        def generate_samples():
+            for i in range(3):
+                yield {'index': i}
+            raise RuntimeError()
+        upload_table = savers._upload_table
+        def upload_table_but_second(file_system, pathname, table):
+            if pathname.endswith(savers._shard_file_name(1)):
+                raise OSError()
+            upload_table(file_system, pathname, table)
+        url = 'memory://incremental_dataset_saver/failed_upload'
+        saver = savers.IncrementalDatasetSaver(
+            url, shard_size=1, max_uploads=4)
+        with (mock.patch('dataset_creator.savers._upload_table',
+                upload_table_but_second),
+            self.assertRaises(RuntimeError)):
+            saver.save(generate_samples())
+        dataset = datasets.load_from_disk(url)
+        self.assertEqual([0], dataset['index'])
+
+
+class FsspecSaverTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._test_directory = os.path.join('test_work_dir', 'fsspec_saver')
+        pathlib.Path(cls._test_directory).mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls._test_directory)
+
+    def test_save__compressed_jsonl__writes_shards_and_manifest(self):
+        url = 'memory://fsspec_saver/jsonl'
+        saver = savers.FsspecSaver(url, shard_size=3, max_workers=2,
+            compression='gzip', limit=7)
+        saver.save(iter([{'index': i} for i in range(10)]))
+        with fsspec.open(f'{url}/manifest.json') as manifest_file:
+            manifest = json.load(manifest_file)
+        expected_shards = [
+            ('part-00000.jsonl.gz', 3),
+            ('part-00001.jsonl.gz', 3),
+            ('part-00002.jsonl.gz', 1),
+        ]
+        actual_shards = [(shard['pathname'], shard['num_samples'])
+            for shard in manifest['shards']]
+        self.assertEqual(expected_shards, actual_shards)
+        actual_samples = list()
+        for shard_name, _ in expected_shards:
+            with fsspec.open(f'{url}/{shard_name}', mode='rt',
+                compression='gzip') as shard_file:
+                actual_samples.extend(json.loads(line) for line in shard_file)
+        self.assertEqual([{'index': i} for i in range(7)], actual_samples)
+
+    def test_save__parquet__writes_shards_with_schema(self):
+        directory = os.path.abspath(
+            os.path.join(self.__class__._test_directory, 'parquet'))
+        schema = pyarrow.schema([('index', pyarrow.int32())])
+        saver = savers.FsspecSaver(f'file://{directory}',
+            shard_format='parquet', shard_size=2, schema=schema)
+        saver.save(iter([{'index': i} for i in range(5)]))
+        table = pyarrow.parquet.read_table(
+            os.path.join(directory, 'part-00002.parquet'))
+        self.assertEqual(schema, table.schema.remove_metadata())
+        self.assertEqual([{'index': 4}], table.to_pylist())
+
+
+class NormalizedCoverageSaverTest(unittest.TestCase):
+    def test_save__coverage_samples__stores_each_method_once(self):
+        samples_file_pathname = os.path.join('integration_tests', 'resources',
+            'expected_coverage_samples', 'maven', 'guess-the-number',
+            'typical_case.json')
+        with open(samples_file_pathname) as samples_file:
+            samples = json.load(samples_file)
+        url = 'memory://normalized_coverage_saver'
+        saver = savers.NormalizedCoverageSaver(url)
+        saver.save(iter(samples))
+        def read_table(name):
+            with fsspec.open(f'{url}/{name}.parquet') as file:
+                return pyarrow.parquet.read_table(file)
+        focal_method_bodies = {
+            sample['focal_method']['body'] for sample in samples}
+        focal_methods = read_table('focal_methods')
+        self.assertEqual(len(focal_method_bodies), focal_methods.num_rows)
+        self.assertEqual(1, read_table('repositories').num_rows)
+        self.assertEqual(len(samples), read_table('pairs').num_rows)
+        self.assertEqual(
+            savers.NORMALIZED_COVERAGE_SCHEMAS['pairs'],
+            read_table('pairs').schema.remove_metadata())
+
+
+class WriteBehindSaverTest(unittest.TestCase):
+    def test_save__hugging_face_saver__saves_dataset(self):
+        saver = savers.WriteBehindSaver(
+            savers.HuggingFaceGoogleCloudStorageSaver(
+                'project_id', 'bucket_name', 'path/name'),
+            depth=2)
+        samples = [dict(i=i) for i in range(5)]
+        with mock.patch('datasets.Dataset.save_to_disk',
+            autospec=True) as mock_save_to_disk:
+            saver.save(iter(samples))
+        dataset = mock_save_to_disk.call_args.args[0]
+        self.assertEqual(samples, list(dataset))
+
+
+class DeduplicatingSaverTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._test_directory = (
+            os.path.join('test_work_dir', 'deduplicating_saver'))
+        pathlib.Path(cls._test_directory).mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls._test_directory)
+
+    def _create_sample(self, focal_body):
+        return dict(focal_method=dict(body=focal_body),
+            test_input_method=dict(body='a'),
+            test_target_method=dict(body='b'))
+
+    def test_save__duplicates_across_runs__saves_each_once(self):
+        file_pathname = (
+            os.path.join(self.__class__._test_directory, 'samples.jsonl'))
+        index_pathname = (
+            os.path.join(self.__class__._test_directory, 'index.sqlite'))
+        for focal_bodies in [['f', 'g', 'f'], ['g', 'h']]:
+            saver = savers.DeduplicatingSaver(
+                savers.LocalFileSaver(file_pathname, line_format='jsonl'),
+                index_pathname, 'worker')
+            saver.save(iter(self._create_sample(body) for body in focal_bodies))
+        loader = loaders.JsonlFileLoader(file_pathname)
+        actual_bodies = [
+            sample['focal_method']['body'] for sample in loader.load()]
+        self.assertEqual(['f', 'g', 'h'], actual_bodies)
+
+    def test_save__resumed_after_failure__saves_unfinished_samples(self):
+        directory = os.path.join(self.__class__._test_directory, 'resumed')
+        file_pathname = os.path.join(directory, 'samples.jsonl')
+        checkpoint_pathname = os.path.join(directory, 'checkpoint.json')
+        index_pathname = os.path.join(directory, 'index.sqlite')
+        def create_saver():
+            return savers.DeduplicatingSaver(
+                savers.LocalFileSaver(file_pathname, line_format='jsonl',
+                    checkpoint_pathname=checkpoint_pathname),
+                index_pathname, 'worker')
+        def generator():
+            yield self._create_sample('f')
+            yield savers.Checkpoint(1)
+            yield self._create_sample('g')
+            raise RuntimeError('failed')
+        with self.assertRaises(RuntimeError):
+            create_saver().save(generator())
+        create_saver().save(
+            iter([self._create_sample('g'), savers.Checkpoint(2)]))
+        loader = loaders.JsonlFileLoader(file_pathname)
+        actual_bodies = [
+            sample['focal_method']['body'] for sample in loader.load()]
+        self.assertEqual(['f', 'g'], actual_bodies)
+
+    def test_save__claimed_by_failed_worker__saved_by_its_rerun(self):
+        directory = os.path.join(self.__class__._test_directory, 'claimed')
+        index_pathname = os.path.join(directory, 'index.sqlite')
+        def create_saver(owner):
+            file_pathname = os.path.join(directory, f'samples-{owner}.jsonl')
+            return savers.DeduplicatingSaver(
+                savers.LocalFileSaver(file_pathname, line_format='jsonl'),
+                index_pathname, owner)
+        def generator():
+            yield self._create_sample('f')
+            raise RuntimeError('failed')
+        with self.assertRaises(RuntimeError):
+            create_saver('a').save(generator())
+        create_saver('b').save(
+            iter([self._create_sample(body) for body in ['f', 'g']]))
+        create_saver('a').save(iter([self._create_sample('f')]))
+        actual_bodies = list()
+        for owner in ['a', 'b']:
+            loader = loaders.JsonlFileLoader(
+                os.path.join(directory, f'samples-{owner}.jsonl'))
+            actual_bodies.append(
+                [sample['focal_method']['body'] for sample in loader.load()])
+        self.assertEqual([['f', 'f'], ['g']], actual_bodies)
+
+    def test_save__hugging_face_saver__saves_dataset(self):
+        index_pathname = (
+            os.path.join(self.__class__._test_directory, 'hf_index.sqlite'))
+        saver = savers.DeduplicatingSaver(
+            savers.HuggingFaceGoogleCloudStorageSaver(
+                'project_id', 'bucket_name', 'path/name'),
+            index_pathname, 'worker')
+        with mock.patch('datasets.Dataset.save_to_disk',
+            autospec=True) as mock_save_to_disk:
+            saver.save(
+                iter([self._create_sample(body) for body in ['f', 'g', 'f']]))
+        dataset = mock_save_to_disk.call_args.args[0]
+        self.assertEqual(['f', 'g'],
+            [sample['focal_method']['body'] for sample in dataset])
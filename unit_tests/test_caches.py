@@ -0,0 +1,66 @@
+import os
+import pathlib
+import shutil
+import unittest
+from unittest import mock
+
+import fsspec
+from fsspec.implementations import memory
+
+from dataset_creator import caches
+
+
+class ShardCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._test_directory = os.path.join('test_work_dir', 'shard_cache')
+        pathlib.Path(self._test_directory).mkdir(parents=True, exist_ok=True)
+        self._file_system = fsspec.filesystem('memory')
+        for i in range(3):
+            with self._file_system.open(f'/shard_cache/{i}.txt', 'wb') as file:
+                file.write(str(i).encode() * 10)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self._test_directory)
+        self._file_system.rm('/shard_cache', recursive=True)
+
+    def test_fetch__not_cached__downloads_copy(self):
+        cache = caches.ShardCache(self._test_directory)
+        pathname = cache.fetch('memory://shard_cache/0.txt')
+        with open(pathname) as file:
+            self.assertEqual('0' * 10, file.read())
+
+    def test_fetch__cached__reuses_copy(self):
+        cache = caches.ShardCache(self._test_directory)
+        pathname = cache.fetch('memory://shard_cache/0.txt')
+        with mock.patch.object(memory.MemoryFileSystem, 'get_file') as mock_get:
+            actual_pathname = cache.fetch('memory://shard_cache/0.txt')
+        mock_get.assert_not_called()
+        self.assertEqual(pathname, actual_pathname)
+
+    def test_fetch__remote_file_changed__downloads_again(self):
+        cache = caches.ShardCache(self._test_directory)
+        pathname = cache.fetch('memory://shard_cache/0.txt')
+        with self._file_system.open('/shard_cache/0.txt', 'wb') as file:
+            file.write(b'changed')
+        actual_pathname = cache.fetch('memory://shard_cache/0.txt')
+        self.assertNotEqual(pathname, actual_pathname)
+        with open(actual_pathname) as file:
+            self.assertEqual('changed', file.read())
+
+    def test_fetch_all__exceeds_max_size__evicts_least_recently_used(self):
+        cache = caches.ShardCache(self._test_directory, max_size=20)
+        pathname_0 = cache.fetch('memory://shard_cache/0.txt')
+        os.utime(pathname_0, (0, 0))
+        pathname_1 = cache.fetch('memory://shard_cache/1.txt')
+        os.utime(pathname_1, (1, 1))
+        pathname_2 = cache.fetch('memory://shard_cache/2.txt')
+        self.assertFalse(os.path.exists(pathname_0))
+        self.assertTrue(os.path.exists(pathname_1))
+        self.assertTrue(os.path.exists(pathname_2))
+
+    def test_fetch_all__fetched_exceed_max_size__keeps_fetched(self):
+        cache = caches.ShardCache(self._test_directory, max_size=10)
+        urls = [f'memory://shard_cache/{i}.txt' for i in range(3)]
+        pathnames = cache.fetch_all(urls)
+        for pathname in pathnames:
+            self.assertTrue(os.path.exists(pathname))
@@ -119,6 +119,29 @@ class CodeCovCliTest(CodeCovTest):
             actual_coverage = code_cov_cli.create_coverage(self._request_data)
         mock_run.assert_called_once_with(
             [self._script_file_pathname],
+            cwd=None,
+            timeout=10,
+            check=True,
+            capture_output=True,
+            text=True,
+            input=input_json_str,
+        )
+        self.assertEqual(expected_coverage, actual_coverage)
+
+    def test_create_coverage__working_dir__runs_in_working_dir(self):
+        mock_completed_process = mock.MagicMock()
+        input_json_str = json.dumps(self._request_data)
+        mock_completed_process.stdout = '{"coveredLineNumbers": [4]}'
+        expected_coverage = coverages.Coverage(coveredLineNumbers=[4])
+        code_cov_cli = (
+            coverages.CodeCovCli(self._script_file_pathname, timeout=10))
+        with mock.patch('subprocess.run') as mock_run:
+            mock_run.return_value = mock_completed_process
+            actual_coverage = code_cov_cli.create_coverage(self._request_data,
+                working_dir_pathname='/project')
+        mock_run.assert_called_once_with(
+            [self._script_file_pathname],
+            cwd='/project',
             timeout=10,
             check=True,
             capture_output=True,
@@ -151,6 +174,7 @@ class CodeCovCliTest(CodeCovTest):
             actual_coverage = code_cov_cli.create_coverage(request_data)
         mock_run.assert_called_once_with(
             [self._script_file_pathname],
+            cwd=None,
             timeout=10,
             check=True,
             capture_output=True,
@@ -169,6 +193,7 @@ class CodeCovCliTest(CodeCovTest):
                 code_cov_cli.create_coverage(self._request_data)
         mock_run.assert_called_once_with(
             [self._script_file_pathname],
+            cwd=None,
             timeout=10,
             check=True,
             capture_output=True,
@@ -0,0 +1,26 @@
+import unittest
+
+from dataset_creator import indexes
+
+
+def _create_sample(focal_body, test_input_body, test_target_body):
+    sample = dict(
+        focal_method=dict(body=focal_body),
+        test_input_method=dict(body=test_input_body),
+        test_target_method=dict(body=test_target_body),
+    )
+    return sample
+
+
+class DigestMethodTripletTest(unittest.TestCase):
+    def test_digest_method_triplet__same_bodies__same_digest(self):
+        digest = indexes.digest_method_triplet(_create_sample('a', 'b', 'c'))
+        self.assertEqual(16, len(digest))
+        other_digest = (
+            indexes.digest_method_triplet(_create_sample('a', 'b', 'c')))
+        self.assertEqual(digest, other_digest)
+
+    def test_digest_method_triplet__moved_boundary__different_digest(self):
+        self.assertNotEqual(
+            indexes.digest_method_triplet(_create_sample('ab', 'c', 'd')),
+            indexes.digest_method_triplet(_create_sample('a', 'bc', 'd')))
@@ -2,10 +2,29 @@ import unittest
 from unittest import mock
 
 import datasets
+import dill
 
 from dataset_creator import loaders
 
 
+class PrefetchLoaderTest(unittest.TestCase):
+    def test_load__typical_case__loads_all_samples(self):
+        mock_loader = mock.MagicMock()
+        mock_loader.load.return_value = iter(['Hello', 'World!'])
+        loader = loaders.PrefetchLoader(mock_loader, depth=2)
+        iterator = loader.load()
+        self.assertEqual('Hello', next(iterator))
+        self.assertEqual('World!', next(iterator))
+        with self.assertRaises(StopIteration):
+            next(iterator)
+
+    def test_load__not_started__can_be_pickled(self):
+        jsonl_file_loader = loaders.JsonlFileLoader('samples.jsonl')
+        loader = loaders.PrefetchLoader(jsonl_file_loader)
+        iterator = loader.load()
+        dill.dumps(iterator)
+
+
 class HuggingFaceLoaderTest(unittest.TestCase):
     def test_load__streaming_not_configured__loads_via_stream(self):
         config = {'path': 'path'}
@@ -65,6 +84,74 @@ class HuggingFaceLoaderTest(unittest.TestCase):
         with self.assertRaises(StopIteration):
             next(iterator)
 
+    def test_load__sharded__loads_contiguous_shard(self):
+        config = {'path': 'path'}
+        loader = loaders.HuggingFaceLoader(config, shard_index=1, shard_count=2)
+        def generator():
+            for i in range(4):
+                yield {'index': i}
+        dataset = datasets.Dataset.from_generator(generator)
+        with mock.patch('datasets.load_dataset') as mock_load_dataset:
+            mock_load_dataset.return_value = dataset
+            iterator = loader.load()
+        self.assertEqual({'index': 2}, next(iterator))
+        self.assertEqual({'index': 3}, next(iterator))
+        with self.assertRaises(StopIteration):
+            next(iterator)
+
+    def test_load__columns_not_none__loads_only_columns(self):
+        config = {'path': 'path'}
+        loader = loaders.HuggingFaceLoader(config, columns=['message'])
+        def generator():
+            yield {'message': 'Hello'}
+            yield {'message': 'World!'}
+        dataset = datasets.Dataset.from_generator(generator)
+        with mock.patch('datasets.load_dataset') as mock_load_dataset:
+            mock_load_dataset.return_value = dataset
+            iterator = loader.load()
+        mock_load_dataset.assert_called_once_with(
+            path='path', streaming=True, columns=['message'])
+        self.assertEqual({'message': 'Hello'}, next(iterator))
+        self.assertEqual({'message': 'World!'}, next(iterator))
+        with self.assertRaises(StopIteration):
+            next(iterator)
+
+
+class HuggingFaceArrowLoaderTest(unittest.TestCase):
+    def test_load__typical_case__loads_batches(self):
+        config = {'path': 'path'}
+        loader = loaders.HuggingFaceArrowLoader(config, batch_size=2)
+        def generator():
+            for i in range(5):
+                yield {'index': i}
+        dataset = datasets.Dataset.from_generator(generator)
+        with mock.patch('datasets.load_dataset') as mock_load_dataset:
+            mock_load_dataset.return_value = dataset
+            iterator = loader.load()
+        mock_load_dataset.assert_called_once_with(path='path', streaming=True)
+        self.assertEqual({'index': [0, 1]}, next(iterator).to_pydict())
+        self.assertEqual({'index': [2, 3]}, next(iterator).to_pydict())
+        self.assertEqual({'index': [4]}, next(iterator).to_pydict())
+        with self.assertRaises(StopIteration):
+            next(iterator)
+
+    def test_load__skip_and_limit_not_none__slices_batches(self):
+        config = {'path': 'path'}
+        loader = loaders.HuggingFaceArrowLoader(
+            config, skip=3, limit=4, batch_size=2)
+        def generator():
+            for i in range(10):
+                yield {'index': i}
+        dataset = datasets.Dataset.from_generator(generator)
+        with mock.patch('datasets.load_dataset') as mock_load_dataset:
+            mock_load_dataset.return_value = dataset
+            iterator = loader.load()
+        self.assertEqual({'index': [3]}, next(iterator).to_pydict())
+        self.assertEqual({'index': [4, 5]}, next(iterator).to_pydict())
+        self.assertEqual({'index': [6]}, next(iterator).to_pydict())
+        with self.assertRaises(StopIteration):
+            next(iterator)
+
 
 class HuggingFaceMultiLoaderTest(unittest.TestCase):
     def test_load__streaming_not_configured__loads_via_stream(self):
@@ -81,22 +168,12 @@ class HuggingFaceMultiLoaderTest(unittest.TestCase):
             mock_load_dataset.side_effect = do_side_effect
             iterator = loader.load()
         calls = mock_load_dataset.call_args_list
-        self.assertEqual(1 + 4, len(calls))
+        self.assertEqual(4, len(calls))
         # first_dataset
         self.assertEqual((), calls[0].args)
         self.assertEqual(dict(path='1', streaming=True), calls[0].kwargs)
         # dsets
         self.assertEqual((), calls[1].args)
-        expected_kwargs_1 = dict(
-            path='1',
-            streaming=True,
-            features=dict(
-                even=datasets.Value('int64'),
-                odd=datasets.Value('int64'),
-            ),
-        )
-        self.assertEqual(expected_kwargs_1, calls[1].kwargs)
-        self.assertEqual((), calls[2].args)
         expected_kwargs_2 = dict(
             path='0',
             streaming=True,
@@ -105,8 +182,8 @@ class HuggingFaceMultiLoaderTest(unittest.TestCase):
                 odd=datasets.Value('int64'),
             ),
         )
-        self.assertEqual(expected_kwargs_2, calls[2].kwargs)
-        self.assertEqual((), calls[3].args)
+        self.assertEqual(expected_kwargs_2, calls[1].kwargs)
+        self.assertEqual((), calls[2].args)
         expected_kwargs_3 = dict(
             path='3',
             streaming=True,
@@ -115,8 +192,8 @@ class HuggingFaceMultiLoaderTest(unittest.TestCase):
                 odd=datasets.Value('int64'),
             ),
         )
-        self.assertEqual(expected_kwargs_3, calls[3].kwargs)
-        self.assertEqual((), calls[4].args)
+        self.assertEqual(expected_kwargs_3, calls[2].kwargs)
+        self.assertEqual((), calls[3].args)
         expected_kwargs_4 = dict(
             path='2',
             streaming=True,
@@ -125,7 +202,7 @@ class HuggingFaceMultiLoaderTest(unittest.TestCase):
                 odd=datasets.Value('int64'),
             ),
         )
-        self.assertEqual(expected_kwargs_4, calls[4].kwargs)
+        self.assertEqual(expected_kwargs_4, calls[3].kwargs)
         self.assertEqual({'even': 2, 'odd': 3}, next(iterator))
         self.assertEqual({'even': -2, 'odd': -3}, next(iterator))
         self.assertEqual({'even': 0, 'odd': 1}, next(iterator))
@@ -151,22 +228,12 @@ class HuggingFaceMultiLoaderTest(unittest.TestCase):
             mock_load_dataset.side_effect = do_side_effect
             iterator = loader.load()
         calls = mock_load_dataset.call_args_list
-        self.assertEqual(1 + 4, len(calls))
+        self.assertEqual(4, len(calls))
         # first_dataset
         self.assertEqual((), calls[0].args)
         self.assertEqual(dict(path='1', streaming=True), calls[0].kwargs)
         # dsets
         self.assertEqual((), calls[1].args)
-        expected_kwargs_1 = dict(
-            path='1',
-            streaming=True,
-            features=dict(
-                even=datasets.Value('int64'),
-                odd=datasets.Value('int64'),
-            ),
-        )
-        self.assertEqual(expected_kwargs_1, calls[1].kwargs)
-        self.assertEqual((), calls[2].args)
         expected_kwargs_2 = dict(
             path='0',
             streaming=True,
@@ -175,8 +242,8 @@ class HuggingFaceMultiLoaderTest(unittest.TestCase):
                 odd=datasets.Value('int64'),
             ),
         )
-        self.assertEqual(expected_kwargs_2, calls[2].kwargs)
-        self.assertEqual((), calls[3].args)
+        self.assertEqual(expected_kwargs_2, calls[1].kwargs)
+        self.assertEqual((), calls[2].args)
         expected_kwargs_3 = dict(
             path='3',
             streaming=True,
@@ -185,8 +252,8 @@ class HuggingFaceMultiLoaderTest(unittest.TestCase):
                 odd=datasets.Value('int64'),
             ),
         )
-        self.assertEqual(expected_kwargs_3, calls[3].kwargs)
-        self.assertEqual((), calls[4].args)
+        self.assertEqual(expected_kwargs_3, calls[2].kwargs)
+        self.assertEqual((), calls[3].args)
         expected_kwargs_4 = dict(
             path='2',
             streaming=True,
@@ -195,7 +262,7 @@ class HuggingFaceMultiLoaderTest(unittest.TestCase):
                 odd=datasets.Value('int64'),
             ),
         )
-        self.assertEqual(expected_kwargs_4, calls[4].kwargs)
+        self.assertEqual(expected_kwargs_4, calls[3].kwargs)
         self.assertEqual({'even': 0, 'odd': -1}, next(iterator))
         self.assertEqual({'even': 6, 'odd': 7}, next(iterator))
         self.assertEqual({'even': -6, 'odd': -7}, next(iterator))
@@ -218,22 +285,12 @@ class HuggingFaceMultiLoaderTest(unittest.TestCase):
             mock_load_dataset.side_effect = do_side_effect
             iterator = loader.load()
         calls = mock_load_dataset.call_args_list
-        self.assertEqual(1 + 4, len(calls))
+        self.assertEqual(4, len(calls))
         # first_dataset
         self.assertEqual((), calls[0].args)
         self.assertEqual(dict(path='1', streaming=True), calls[0].kwargs)
         # dsets
         self.assertEqual((), calls[1].args)
-        expected_kwargs_1 = dict(
-            path='1',
-            streaming=True,
-            features=dict(
-                even=datasets.Value('int64'),
-                odd=datasets.Value('int64'),
-            ),
-        )
-        self.assertEqual(expected_kwargs_1, calls[1].kwargs)
-        self.assertEqual((), calls[2].args)
         expected_kwargs_2 = dict(
             path='0',
             streaming=True,
@@ -242,8 +299,8 @@ class HuggingFaceMultiLoaderTest(unittest.TestCase):
                 odd=datasets.Value('int64'),
             ),
         )
-        self.assertEqual(expected_kwargs_2, calls[2].kwargs)
-        self.assertEqual((), calls[3].args)
+        self.assertEqual(expected_kwargs_2, calls[1].kwargs)
+        self.assertEqual((), calls[2].args)
         expected_kwargs_3 = dict(
             path='3',
             streaming=True,
@@ -252,8 +309,8 @@ class HuggingFaceMultiLoaderTest(unittest.TestCase):
                 odd=datasets.Value('int64'),
             ),
         )
-        self.assertEqual(expected_kwargs_3, calls[3].kwargs)
-        self.assertEqual((), calls[4].args)
+        self.assertEqual(expected_kwargs_3, calls[2].kwargs)
+        self.assertEqual((), calls[3].args)
         expected_kwargs_4 = dict(
             path='2',
             streaming=True,
@@ -262,9 +319,50 @@ class HuggingFaceMultiLoaderTest(unittest.TestCase):
                 odd=datasets.Value('int64'),
             ),
         )
-        self.assertEqual(expected_kwargs_4, calls[4].kwargs)
+        self.assertEqual(expected_kwargs_4, calls[3].kwargs)
         self.assertEqual({'even': 2, 'odd': 3}, next(iterator))
         self.assertEqual({'even': -2, 'odd': -3}, next(iterator))
         self.assertEqual({'even': 0, 'odd': 1}, next(iterator))
         with self.assertRaises(StopIteration):
             next(iterator)
+
+    def test_load__round_robin__interleaves_datasets(self):
+        configs = [{'path': '1'}, {'path': '2'}, {'path': '3'}]
+        loader = (loaders
+            .HuggingFaceMultiLoader(configs, interleaving='round_robin'))
+        def do_side_effect(path: str, *args, **kwargs) -> datasets.Dataset:
+            i = int(path)
+            def generator():
+                for j in range(i):
+                    yield {'source': i, 'index': j}
+            dataset = datasets.Dataset.from_generator(generator)
+            return dataset
+        with mock.patch('datasets.load_dataset') as mock_load_dataset:
+            mock_load_dataset.side_effect = do_side_effect
+            iterator = loader.load()
+        self.assertEqual(3, len(mock_load_dataset.call_args_list))
+        actual_samples = [(sample['source'], sample['index'])
+            for sample in iterator]
+        expected_samples = [(1, 0), (2, 0), (3, 0), (2, 1), (3, 1), (3, 2)]
+        self.assertEqual(expected_samples, actual_samples)
+
+    def test_load__size_weighted__interleaves_in_proportion(self):
+        configs = [{'path': '2'}, {'path': '4'}]
+        loader = (loaders
+            .HuggingFaceMultiLoader(configs, interleaving='size_weighted'))
+        def do_side_effect(path: str, *args, **kwargs) -> datasets.Dataset:
+            i = int(path)
+            def generator():
+                for j in range(i):
+                    yield {'source': i, 'index': j}
+            dataset = datasets.Dataset.from_generator(generator)
+            return dataset
+        with mock.patch('datasets.load_dataset') as mock_load_dataset:
+            mock_load_dataset.side_effect = do_side_effect
+            iterator = loader.load()
+        actual_sources = [sample['source'] for sample in iterator]
+        self.assertEqual([4, 2, 4, 4, 2, 4], actual_sources)
+
+    def test___init____unknown_interleaving__raises_error(self):
+        with self.assertRaises(ValueError):
+            loaders.HuggingFaceMultiLoader([{'path': '0'}], interleaving='x')
@@ -1,9 +1,40 @@
+import os
+import threading
+import time
 import unittest
 from unittest import mock
 
+import pyarrow
+
 from dataset_creator import processors
 
 
+def _create_focal_method_data(test_method_identifiers):
+    test_methods = [dict(
+        identifier=identifier,
+        **{'class': dict(package='p', identifier='ATest')},
+    ) for identifier in test_method_identifiers]
+    focal_method_data = dict(
+        repository_index=0,
+        repository_url='url',
+        repository_hexsha='hexsha',
+        project_pathname=os.getcwd(),
+        project_rel_pathname='.',
+        classpath_pathnames=['classes'],
+        focal_classpath='classes',
+        focal_method_sample=dict(
+            focal_method=dict(
+                line_start=1,
+                line_end=3,
+                body='void a() {\n    b();\n}',
+                **{'class': dict(package='p', identifier='A')},
+            ),
+            test_methods=test_methods,
+        ),
+    )
+    return focal_method_data
+
+
 class TheStackRepositoryProcessorTest(unittest.TestCase):
     def test_process__typical_data__takes_repositories_and_deduplicates(self):
         mock_loader = mock.MagicMock()
@@ -38,6 +69,152 @@ class TheStackRepositoryProcessorTest(unittest.TestCase):
             next(actual_iterator)
 
 
+class TheStackRepositoryBatchProcessorTest(unittest.TestCase):
+    def test_process__typical_data__takes_repositories_and_deduplicates(self):
+        mock_loader = mock.MagicMock()
+        batches = [
+            pyarrow.table({
+                'max_stars_repo_name': ['user1/repo1', 'user1/repo2',
+                    'user1/repo1', None],
+                'ignored': [0, 0, 1, 0],
+            }),
+            pyarrow.table({
+                'max_stars_repo_name': ['user1/repo2', 'user2/repo1'],
+                'ignored': [1, 0],
+            }),
+        ]
+        mock_loader.load.return_value = iter(batches)
+        mock_saver = mock.MagicMock()
+        processor = (processors
+            .TheStackRepositoryBatchProcessor(mock_loader, mock_saver))
+        processor.process()
+        mock_saver.save.assert_called_once()
+        save_call = mock_saver.save.call_args
+        save_args = save_call.args
+        self.assertEqual(1, len(save_args))
+        actual_iterator = save_args[0]
+        expected_repository_sample_0 = {'repository_name': 'user1/repo1',
+            'repository_url': 'https://github.com/user1/repo1'}
+        self.assertEqual(expected_repository_sample_0, next(actual_iterator))
+        expected_repository_sample_1 = {'repository_name': 'user1/repo2',
+            'repository_url': 'https://github.com/user1/repo2'}
+        self.assertEqual(expected_repository_sample_1, next(actual_iterator))
+        expected_repository_sample_2 = {'repository_name': 'user2/repo1',
+            'repository_url': 'https://github.com/user2/repo1'}
+        self.assertEqual(expected_repository_sample_2, next(actual_iterator))
+        with self.assertRaises(StopIteration):
+            next(actual_iterator)
+
+
+class CoverageSamplesProcessorTest(unittest.TestCase):
+    def test_process__checkpointing__marks_finished_repositories(self):
+        mock_loader = mock.MagicMock()
+        repository_samples = [
+            {'samples': ['a0', 'a1']},
+            {'samples': []},
+            {'samples': ['c0']},
+        ]
+        mock_loader.load.return_value = iter(repository_samples)
+        mock_saver = mock.MagicMock()
+        processor = processors.CoverageSamplesProcessor(mock_loader,
+            mock_saver, mock.MagicMock(), mock.MagicMock(), ('a', 'b'),
+            checkpoint_repository_count=5)
+        def create_sample_generator(repository_samples):
+            for repository_sample in repository_samples:
+                yield from repository_sample['samples']
+        with mock.patch.object(processor, '_create_sample_generator',
+            create_sample_generator):
+            processor.process()
+            actual_iterator = mock_saver.save.call_args.args[0]
+            actual_items = [item if isinstance(item, str)
+                else item.repository_count for item in actual_iterator]
+        self.assertEqual(['a0', 'a1', 7, 'c0', 8], actual_items)
+
+    def test_process__stages__saves_in_repository_order(self):
+        mock_loader = mock.MagicMock()
+        repository_samples = [{'repository_url': url} for url in 'abc']
+        mock_loader.load.return_value = iter(repository_samples)
+        mock_saver = mock.MagicMock()
+        processor = processors.CoverageSamplesProcessor(mock_loader,
+            mock_saver, mock.MagicMock(), mock.MagicMock(), ('a', 'b'),
+            checkpoint_repository_count=5,
+            stage_configs={'clone': {'workers': 3}, 'cover': {'workers': 2}},
+            stage_depth=2)
+        cloned_dir_pathnames = list()
+        def clone(repository_job):
+            i, repository_sample, repository_dir_pathname = repository_job
+            cloned_dir_pathnames.append(repository_dir_pathname)
+            os.mkdir(repository_dir_pathname)
+            # The first repository finishes last.
+            time.sleep(0.2 if i == 0 else 0.0)
+            url = repository_sample['repository_url']
+            return [f'{url}0', f'{url}1'] if url != 'b' else list()
+        def generate_data_samples(with_coverage_data):
+            yield with_coverage_data
+        with (
+            mock.patch.object(processor._stages, 'clone', clone),
+            mock.patch.object(processor._stages, 'compile',
+                lambda project_data: [project_data]),
+            mock.patch.object(processor._stages, 'parse',
+                lambda project_data: [project_data]),
+            mock.patch.object(processor._stages, 'cover',
+                lambda focal_method_data: [focal_method_data.upper()]),
+            mock.patch.object(processor, '_generate_data_samples',
+                generate_data_samples),
+        ):
+            processor.process()
+            actual_iterator = mock_saver.save.call_args.args[0]
+            actual_items = [item if isinstance(item, str)
+                else item.repository_count for item in actual_iterator]
+        self.assertEqual(['A0', 'A1', 6, 7, 'C0', 'C1', 8], actual_items)
+        self.assertEqual(3, len(cloned_dir_pathnames))
+        for cloned_dir_pathname in cloned_dir_pathnames:
+            self.assertFalse(os.path.exists(cloned_dir_pathname))
+
+
+class CoverageStagesTest(unittest.TestCase):
+    def test_cover_all__concurrent_requests__reassembles_in_order(self):
+        covered_line_numbers = dict(t0=[2, 3], t1=[3, 9], t2=[2], t3=[4])
+        running_count = 0
+        running_counts = list()
+        running_lock = threading.Lock()
+        def create_coverage(request_data, working_dir_pathname=None):
+            nonlocal running_count
+            test_method_name = request_data['testMethodName']
+            with running_lock:
+                running_count += 1
+                running_counts.append(running_count)
+            # The earlier requests finish last.
+            time.sleep(0.1 / (int(test_method_name[1:]) + 1))
+            with running_lock:
+                running_count -= 1
+            if test_method_name == 't2':
+                raise RuntimeError('coverage not found')
+            return dict(
+                coveredLineNumbers=covered_line_numbers[test_method_name])
+        mock_code_cov = mock.MagicMock()
+        mock_code_cov.create_coverage.side_effect = create_coverage
+        stages = processors._CoverageStages(mock_code_cov, mock.MagicMock(),
+            ('a', 'b'), max_coverage_requests=3)
+        focal_method_data_list = [_create_focal_method_data(['t0', 't1']),
+            _create_focal_method_data(['t2', 't3'])]
+        actual_data_list = list(stages.cover_all(focal_method_data_list))
+        self.assertEqual(2, len(actual_data_list))
+        actual_test_methods_list = [data['with_coverage_focal_method_sample']
+            ['test_methods'] for data in actual_data_list]
+        self.assertEqual(['t0', 't1'], [test_method['identifier']
+            for test_method in actual_test_methods_list[0]])
+        self.assertEqual([[1, 2], [2]], [
+            test_method['focal_covered_line_indices']
+            for test_method in actual_test_methods_list[0]])
+        self.assertEqual(['t3'], [test_method['identifier']
+            for test_method in actual_test_methods_list[1]])
+        self.assertEqual(4, mock_code_cov.create_coverage.call_count)
+        mock_code_cov.create_coverage.assert_any_call(mock.ANY,
+            working_dir_pathname=os.getcwd())
+        self.assertEqual(3, max(running_counts))
+
+
 class IdentityProcessorTest(unittest.TestCase):
     def test_process__typical_data__saves_loaded_data_exactly(self):
         mock_loader = mock.MagicMock()
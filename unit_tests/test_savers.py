@@ -58,3 +58,55 @@ class HuggingFaceGoogleCloudStorageSaver(unittest.TestCase):
             'gs://bucket_name/path/name',
             storage_options={'project': 'project_id', 'token': None},
         )
+
+
+class LocalFileSaverTest(unittest.TestCase):
+    def test_save__typical_case__writes_buffered_lines_once(self):
+        file = mock.MagicMock()
+        saver = savers.LocalFileSaver('a/b.jsonl', line_format='jsonl')
+        with (mock.patch('pathlib.Path.mkdir'),
+            mock.patch('dataset_creator.utilities.open_writer') as mock_open):
+            mock_open.return_value.__enter__.return_value = file
+            saver.save(iter([{'a': 1}, {'b': [2]}]))
+        mock_open.assert_called_once_with(
+            'a/b.jsonl', compression=None, threads=1)
+        file.write.assert_called_once_with(b'{"a":1}\n{"b":[2]}\n')
+
+    def test_save__flush_every_with_fsync__syncs_periodically(self):
+        file = mock.MagicMock()
+        file.fileno.return_value = 3
+        saver = savers.LocalFileSaver(
+            'a/b.jsonl', line_format='jsonl', flush_every=2, fsync=True)
+        with (mock.patch('pathlib.Path.mkdir'),
+            mock.patch('dataset_creator.utilities.open_writer') as mock_open,
+            mock.patch('os.fsync') as mock_fsync):
+            mock_open.return_value.__enter__.return_value = file
+            saver.save(iter([{'a': 1}, {'a': 2}, {'a': 3}]))
+        self.assertEqual(
+            [mock.call(b'{"a":1}\n{"a":2}\n'), mock.call(b'{"a":3}\n')],
+            file.write.call_args_list)
+        self.assertEqual(2, file.flush.call_count)
+        self.assertEqual(
+            [mock.call(3), mock.call(3)], mock_fsync.call_args_list)
+
+    def test___init____unknown_line_format__raises(self):
+        with self.assertRaises(ValueError):
+            savers.LocalFileSaver('a/b.jsonl', line_format='csv')
+
+
+class WriteBehindSaverTest(unittest.TestCase):
+    def test_save__typical_case__saves_with_other_saver(self):
+        saved_samples = list()
+        mock_saver = mock.MagicMock()
+        mock_saver.save.side_effect = saved_samples.extend
+        saver = savers.WriteBehindSaver(mock_saver, depth=2)
+        saver.save(iter([{'data': 0}, {'data': 1}, {'data': 2}]))
+        mock_saver.save.assert_called_once()
+        self.assertEqual(
+            [{'data': 0}, {'data': 1}, {'data': 2}], saved_samples)
+
+
+class FsspecSaverTest(unittest.TestCase):
+    def test___init____unknown_encoder__raises(self):
+        with self.assertRaises(ValueError):
+            savers.FsspecSaver('memory://a/b', encoder='ujson')
@@ -1,4 +1,5 @@
 import os
+import time
 from typing import Generator
 from typing import Iterator
 import unittest
@@ -22,6 +23,134 @@ class GeneratorFunctionIteratorTest(unittest.TestCase):
             next(iterator)
 
 
+class PrefetchTest(unittest.TestCase):
+    def test_prefetch__typical_case__yields_in_order(self):
+        items = list(range(10))
+        actual_items = list(utilities.prefetch(iter(items), depth=3))
+        self.assertEqual(items, actual_items)
+
+    def test_prefetch__loading_fails__raises_when_reached(self):
+        def generator_function():
+            yield 'Hello'
+            raise ValueError('World!')
+        generator = utilities.prefetch(generator_function())
+        self.assertEqual('Hello', next(generator))
+        with self.assertRaises(ValueError):
+            next(generator)
+
+    def test_prefetch__closed_early__stops_loading(self):
+        loaded_items = list()
+        def generator_function():
+            for i in range(100):
+                loaded_items.append(i)
+                yield i
+        generator = utilities.prefetch(generator_function(), depth=2)
+        self.assertEqual(0, next(generator))
+        generator.close()
+        time.sleep(0.5)
+        self.assertLess(len(loaded_items), 100)
+
+
+class WriteBehindTest(unittest.TestCase):
+    def test_write_behind__typical_case__consumes_in_order(self):
+        items = list(range(10))
+        consumed_items = list()
+        utilities.write_behind(iter(items), consumed_items.extend, depth=3)
+        self.assertEqual(items, consumed_items)
+
+    def test_write_behind__consuming_fails__raises_and_stops(self):
+        produced_items = list()
+        def generator_function():
+            for i in range(100):
+                produced_items.append(i)
+                yield i
+        def consume(items):
+            next(items)
+            raise ValueError('World!')
+        with self.assertRaises(ValueError):
+            utilities.write_behind(generator_function(), consume, depth=2)
+        self.assertLess(len(produced_items), 100)
+
+    def test_write_behind__producing_fails__drains_then_raises(self):
+        def generator_function():
+            yield 'Hello'
+            yield 'World!'
+            raise RuntimeError()
+        consumed_items = list()
+        with self.assertRaises(RuntimeError):
+            utilities.write_behind(
+                generator_function(), consumed_items.extend, depth=2)
+        self.assertEqual(['Hello', 'World!'], consumed_items)
+
+
+class InterleaveTest(unittest.TestCase):
+    def test_interleave__equal_weights__takes_in_turn(self):
+        iterators = [iter('ab'), iter('cde'), iter('')]
+        actual_items = list(utilities.interleave(iterators, [1, 1, 1]))
+        self.assertEqual(['a', 'c', 'b', 'd', 'e'], actual_items)
+
+    def test_interleave__unequal_weights__takes_in_proportion(self):
+        iterators = [iter('abc'), iter('DEFGHI')]
+        actual_items = list(utilities.interleave(iterators, [1, 2]))
+        self.assertEqual(list('DaEFbGHcI'), actual_items)
+
+
+def _repeat(item):
+    return [item] * item
+
+
+class RunStagesTest(unittest.TestCase):
+    def test_run_stages__slow_first_item__yields_in_order(self):
+        def split(item):
+            # The first item finishes last.
+            time.sleep(0.2 if item == 0 else 0.0)
+            return [f'{item}a', f'{item}b']
+        stages = [utilities.Stage(split, workers=3),
+            utilities.Stage(lambda item: [item.upper()], workers=2)]
+        done_items = list()
+        actual_results = list(utilities.run_stages(range(3), stages, depth=2,
+            on_done=done_items.append))
+        self.assertEqual([['0A', '0B'], ['1A', '1B'], ['2A', '2B']],
+            actual_results)
+        self.assertEqual([1, 2, 0], done_items)
+
+    def test_run_stages__stage_fails__isolates_item(self):
+        def fail_on_one(item):
+            if item == 1:
+                raise ValueError('failed')
+            return [item]
+        stages = [utilities.Stage(lambda item: [item, item]),
+            utilities.Stage(fail_on_one, workers=2)]
+        actual_results = list(utilities.run_stages(range(3), stages))
+        self.assertEqual([[0, 0], [], [2, 2]], actual_results)
+
+    def test_run_stages__processes__yields_in_order(self):
+        stages = [utilities.Stage(_repeat, workers=2, executor='process')]
+        actual_results = list(utilities.run_stages(range(4), stages, depth=2))
+        self.assertEqual([[], [1], [2, 2], [3, 3, 3]], actual_results)
+
+    def test___init____unknown_executor__raises(self):
+        with self.assertRaises(ValueError):
+            utilities.Stage(_repeat, executor='fiber')
+
+
+class FindCompressionTest(unittest.TestCase):
+    def test_find_compression__infer__uses_extension(self):
+        self.assertEqual('gzip', utilities.find_compression('a.jsonl.gz'))
+        self.assertIsNone(utilities.find_compression('a.jsonl'))
+
+    def test_find_compression__given__overrides_extension(self):
+        actual_compression = (
+            utilities.find_compression('a.jsonl', compression='gzip'))
+        self.assertEqual('gzip', actual_compression)
+        self.assertIsNone(
+            utilities.find_compression('a.jsonl.gz', compression=None))
+
+    def test_find_compression__unknown__raises(self):
+        with self.assertRaises(ValueError):
+            utilities.find_compression('a.jsonl', compression='lzma')
+
+
 class WorkingDirectoryTest(unittest.TestCase):
     def test___typical_case__executes_in_respective_working_directories(self):
         current_working_directory = os.getcwd()